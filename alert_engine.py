@@ -0,0 +1,583 @@
+"""
+Vectorized alert evaluation
+
+coins_config.json is compiled once into a sorted threshold index: flat
+NumPy arrays with one entry per distinct rule (coin index, kind,
+threshold value), ordered by kind, coin and value so every (kind, coin)
+pair is a contiguous, sorted segment. A market snapshot is then
+evaluated for all coins with binary searches over that index:
+
+- ATH rules trigger when the drop from ATH (%) is at or above the value,
+  i.e. the triggered rules are the segment prefix up to the drop
+- price rules trigger when the current price is at or below the value,
+  i.e. the triggered rules are the segment suffix from the price
+- rules whose alert was already sent are masked out (sent state is a
+  bitmask per coin, one stable bit per level)
+- the best ATH rule per coin is the highest unsent triggered drop and the
+  best price rule the lowest unsent triggered target
+
+Per coin that is O(log k) in the number of configured levels k.
+
+CrossIndex applies the same layout to cross_alerts levels, returning the
+levels a coin's price passed between two snapshots.
+"""
+
+import heapq
+
+import numpy as np
+
+ATH = 0
+PRICE = 1
+KIND_NAMES = {ATH: "ath", PRICE: "price"}
+
+NO_RULE = -1
+
+
+class _CoinRules:
+    """One coin's compiled levels, reusable while its config is unchanged"""
+
+    def __init__(self, coin):
+        self.config = coin
+        levels = []
+        for kind, field in ((ATH, "ath_thresholds"), (PRICE, "price_alerts")):
+            for value in coin.get(field) or []:
+                levels.append((kind, float(value), value))
+        levels.sort(key=lambda level: level[:2])
+
+        # Equal thresholds (e.g. 80000 and 80000.0) are one rule
+        distinct = []
+        for level in levels:
+            if not distinct or distinct[-1][:2] != level[:2]:
+                distinct.append(level)
+
+        self.values = np.array([level[1] for level in distinct], dtype=np.float64)
+        self.raw = [level[2] for level in distinct]
+        self.num_ath = sum(1 for level in distinct if level[0] == ATH)
+        self.slots = np.arange(len(distinct), dtype=np.int64)
+
+    def levels(self, coin_id):
+        """
+        (coin_id, kind name, value) of each rule, for slot assignment
+
+        Levels quoted in another currency than USD get their own slots
+        ("price.eur"), so switching a coin's currency does not carry its
+        sent state over to levels that now mean something else.
+        """
+        currency = self.config.get("quote_currency", "usd")
+        suffix = "" if currency == "usd" else f".{currency}"
+        return [(coin_id, KIND_NAMES[ATH if pos < self.num_ath else PRICE] + suffix, value)
+                for pos, value in enumerate(self.values.tolist())]
+
+
+class CompiledRules:
+    """
+    Sorted, de-duplicated threshold index of every alert rule in a coins config
+
+    Attributes:
+        coin_ids: Coin IDs in config order; array positions index into it
+        coins: Coin config dicts, aligned with coin_ids
+        rule_coin: Coin index per rule (int32)
+        rule_kind: ATH or PRICE per rule (int8)
+        rule_value: Threshold per rule (float64)
+        rule_raw: Threshold per rule as written in the config
+        rule_slot: Bit index of each rule in its coin's sent bitmask
+        bounds: Per kind, (start, end) arrays giving each coin's segment
+            [start, end) of rule indices
+        changes: With `previous`, the (added, removed, changed) coin IDs
+            relative to it, else None
+    """
+
+    def __init__(self, coins_config, slot_of=None, previous=None):
+        coins = coins_config.get("coins", [])
+        self.coin_ids = [coin["id"] for coin in coins]
+        self.coins = list(coins)
+        self.coin_index = {coin_id: idx for idx, coin_id in enumerate(self.coin_ids)}
+
+        # Compile each coin, reusing the previous compilation of coins whose
+        # config is unchanged
+        reused = {}
+        if previous is not None:
+            reused = {coin_id: previous._coin_rules[idx] for coin_id, idx in previous.coin_index.items()}
+        self._coin_rules = []
+        recompiled = []
+        for coin_id, coin in zip(self.coin_ids, coins):
+            piece = reused.get(coin_id)
+            if piece is None or piece.config != coin:
+                piece = _CoinRules(coin)
+                recompiled.append((coin_id, piece))
+            self._coin_rules.append(piece)
+
+        # Sent state is a bitmask per coin; slot_of maps (coin_id, kind name,
+        # value) levels to stable bit indices, by default the rule's
+        # position among its coin's rules
+        if slot_of is not None and recompiled:
+            levels = [level for coin_id, piece in recompiled for level in piece.levels(coin_id)]
+            slots = iter(slot_of(levels))
+            for _, piece in recompiled:
+                piece.slots = np.array([next(slots) for _ in piece.raw], dtype=np.int64)
+
+        if previous is None:
+            self.changes = None
+        else:
+            recompiled_ids = {coin_id for coin_id, _ in recompiled}
+            self.changes = (
+                [coin_id for coin_id in self.coin_ids if coin_id not in previous.coin_index],
+                [coin_id for coin_id in previous.coin_ids if coin_id not in self.coin_index],
+                [coin_id for coin_id in self.coin_ids if coin_id in previous.coin_index and coin_id in recompiled_ids]
+            )
+
+        # Flatten kind-major: all ATH segments (coin by coin), then all price ones
+        pieces = self._coin_rules
+        spans = [(slice(0, piece.num_ath), slice(piece.num_ath, len(piece.raw))) for piece in pieces]
+        parts = {"kind": [], "coin": [], "value": [], "slot": []}
+        self.rule_raw = []
+        for kind in (ATH, PRICE):
+            counts = np.array([len(piece.raw[span[kind]]) for piece, span in zip(pieces, spans)], dtype=np.int64)
+            parts["kind"].append(np.full(int(counts.sum()), kind, dtype=np.int8))
+            parts["coin"].append(np.repeat(np.arange(len(pieces), dtype=np.int32), counts))
+            parts["value"].extend(piece.values[span[kind]] for piece, span in zip(pieces, spans))
+            parts["slot"].extend(piece.slots[span[kind]] for piece, span in zip(pieces, spans))
+            for piece, span in zip(pieces, spans):
+                self.rule_raw.extend(piece.raw[span[kind]])
+
+        self.rule_kind = np.concatenate(parts["kind"])
+        self.rule_coin = np.concatenate(parts["coin"])
+        self.rule_value = np.concatenate(parts["value"]) if parts["value"] else np.empty(0)
+        self.rule_slot = np.concatenate(parts["slot"]) if parts["slot"] else np.empty(0, dtype=np.int64)
+        self.slot_rules = [{} for _ in self.coin_ids]
+        for rule_idx, (coin_idx, slot) in enumerate(zip(self.rule_coin.tolist(), self.rule_slot.tolist())):
+            self.slot_rules[coin_idx][slot] = rule_idx
+
+        # Per kind, rules are keyed by coin * (U + 1) + rank of their value
+        # among the kind's U distinct values, so one searchsorted over the
+        # keys finds a position inside any coin's segment
+        num_coins = len(self.coin_ids)
+        coin_range = np.arange(num_coins, dtype=np.int64)
+        self._search = {}
+        self.bounds = {}
+        for kind in (ATH, PRICE):
+            lo, hi = (int(i) for i in np.searchsorted(self.rule_kind, [kind, kind + 1]))
+            values = np.unique(self.rule_value[lo:hi])
+            stride = len(values) + 1
+            keys = self.rule_coin[lo:hi].astype(np.int64) * stride + np.searchsorted(values, self.rule_value[lo:hi])
+            self._search[kind] = (lo, values, stride, keys)
+            self.bounds[kind] = (lo + np.searchsorted(keys, coin_range * stride),
+                                 lo + np.searchsorted(keys, (coin_range + 1) * stride))
+
+        start, end = self.bounds[ATH]
+        self.has_ath_rules = end > start
+
+    def __len__(self):
+        return len(self.rule_value)
+
+    def locate(self, kind, metrics, side, coins=None):
+        """
+        Per coin, the rule index where metric would be inserted in its segment
+
+        Args:
+            kind: ATH or PRICE
+            metrics: Values to look up, aligned with coins
+            side: "left" (before equal thresholds) or "right" (after them)
+            coins: Coin indices to look up (all coins if None)
+        """
+        lo, values, stride, keys = self._search[kind]
+        ranks = np.searchsorted(values, metrics, side=side)
+        if coins is None:
+            coins = np.arange(len(self.coin_ids), dtype=np.int64)
+        return lo + np.searchsorted(keys, np.asarray(coins, dtype=np.int64) * stride + ranks)
+
+    def sent_mask(self, sent_bits):
+        """
+        Boolean per-rule array of rules already sent
+
+        Args:
+            sent_bits: Dict of coin ID to sent bitmask
+        """
+        mask = np.zeros(len(self.rule_value), dtype=bool)
+        for coin_id, bits in sent_bits.items():
+            idx = self.coin_index.get(coin_id)
+            if idx is None:
+                continue
+            slot_rules = self.slot_rules[idx]
+            while bits:
+                low = bits & -bits
+                rule_idx = slot_rules.get(low.bit_length() - 1)
+                if rule_idx is not None:
+                    mask[rule_idx] = True
+                bits ^= low
+        return mask
+
+    def sent_bits(self, rule_indices):
+        """Dict of coin ID to the bitmask of the given rules"""
+        bits = {}
+        for rule_idx in rule_indices:
+            coin_id = self.coin_ids[self.rule_coin[rule_idx]]
+            bits[coin_id] = bits.get(coin_id, 0) | (1 << int(self.rule_slot[rule_idx]))
+        return bits
+
+
+def compile_rules(coins_config, slot_of=None, previous=None):
+    """
+    Compile a coins config into CompiledRules
+
+    Args:
+        coins_config: Parsed coins_config.json
+        slot_of: Optional callable mapping a list of (coin_id, kind name,
+            value) levels to their sent-bitmask slots (e.g.
+            StateStore.alert_slots)
+        previous: CompiledRules of an earlier version of the config; coins
+            whose config is unchanged reuse its compilation and slots
+    """
+    return CompiledRules(coins_config, slot_of, previous)
+
+
+class Evaluation:
+    """
+    Result of evaluating a snapshot against compiled rules
+
+    Attributes:
+        prices, aths, drops: Per-coin arrays (NaN where unknown)
+        ath_range, price_range: Per-coin (start, end) arrays; rules
+            [start, end) are the ones the snapshot triggers, sent or not
+        sent: Per-rule boolean array of alerts already sent
+        best_ath, best_price: Per-coin rule index of the best unsent
+            triggered ATH / price rule, or NO_RULE
+    """
+
+    def __init__(self, prices, aths, drops, ath_range, price_range, sent, best_ath, best_price):
+        self.prices = prices
+        self.aths = aths
+        self.drops = drops
+        self.ath_range = ath_range
+        self.price_range = price_range
+        self.sent = sent
+        self.best_ath = best_ath
+        self.best_price = best_price
+
+    def alerting_coins(self):
+        """Indices of coins with at least one triggered rule"""
+        return np.flatnonzero((self.best_ath != NO_RULE) | (self.best_price != NO_RULE))
+
+    def triggered_rules(self, coin_idx):
+        """Rule indices of a coin's unsent triggered rules"""
+        rule_indices = []
+        for start, end in (self.ath_range, self.price_range):
+            lo, hi = int(start[coin_idx]), int(end[coin_idx])
+            rule_indices.extend(lo + np.flatnonzero(~self.sent[lo:hi]))
+        return rule_indices
+
+
+def _best_unsent(sent, start, end, from_end):
+    """
+    Per coin, the unsent rule of [start, end) nearest to its end (or start)
+
+    The extreme rule is checked for all coins at once; only coins whose
+    extreme rule was already sent have their range scanned.
+    """
+    best = np.full(len(start), NO_RULE, dtype=np.intp)
+    nonempty = np.flatnonzero(end > start)
+    if nonempty.size == 0:
+        return best
+    candidates = end[nonempty] - 1 if from_end else start[nonempty]
+    was_sent = sent[candidates]
+    best[nonempty[~was_sent]] = candidates[~was_sent]
+    for coin_idx in nonempty[was_sent]:
+        unsent = np.flatnonzero(~sent[start[coin_idx]:end[coin_idx]])
+        if unsent.size:
+            best[coin_idx] = start[coin_idx] + unsent[-1 if from_end else 0]
+    return best
+
+
+def evaluate(rules, prices, aths, sent, coins=None):
+    """
+    Evaluate every rule against one market snapshot
+
+    Args:
+        rules: CompiledRules
+        prices: Current price per coin (aligned with rules.coin_ids, NaN if unknown)
+        aths: All-time high per coin (NaN if unknown)
+        sent: Per-rule boolean array of alerts already sent
+        coins: Only evaluate these coin indices (e.g. NextTriggers
+            candidates); other coins trigger nothing. All coins if None.
+
+    Returns:
+        Evaluation
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    aths = np.asarray(aths, dtype=np.float64)
+    sent = np.asarray(sent, dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drops = np.where(aths > 0, (aths - prices) / aths * 100, np.nan)
+
+    ath_start, ath_end = rules.bounds[ATH]
+    price_start, price_end = rules.bounds[PRICE]
+    if coins is None:
+        # ATH: thresholds <= drop are a prefix of the segment
+        ath_cut = np.where(np.isnan(drops), ath_start, rules.locate(ATH, drops, "right"))
+        # Price: targets >= price are a suffix of the segment
+        price_cut = np.where(np.isnan(prices), price_end, rules.locate(PRICE, prices, "left"))
+    else:
+        coins = np.asarray(coins, dtype=np.intp)
+        ath_cut = ath_start.copy()
+        ath_cut[coins] = np.where(np.isnan(drops[coins]), ath_start[coins],
+                                  rules.locate(ATH, drops[coins], "right", coins))
+        price_cut = price_end.copy()
+        price_cut[coins] = np.where(np.isnan(prices[coins]), price_end[coins],
+                                    rules.locate(PRICE, prices[coins], "left", coins))
+
+    best_ath = _best_unsent(sent, ath_start, ath_cut, from_end=True)
+    best_price = _best_unsent(sent, price_cut, price_end, from_end=False)
+    return Evaluation(prices, aths, drops, (ath_start, ath_cut), (price_cut, price_end),
+                      sent, best_ath, best_price)
+
+
+def next_trigger_prices(rules, aths, sent, coins=None):
+    """
+    Highest price at which each coin would trigger its next unsent alert
+
+    That is the larger of the highest unsent price target and the price
+    at the lowest unsent ATH drop threshold (ath * (1 - t / 100)). A coin
+    can only alert while its price is at or below this value.
+
+    Args:
+        coins: Coin indices to compute (all coins if None)
+
+    Returns:
+        Array aligned with coins (-inf where nothing can trigger)
+    """
+    all_coins = np.arange(len(rules.coin_ids), dtype=np.intp)
+    coins = all_coins if coins is None else np.asarray(coins, dtype=np.intp)
+    aths = np.asarray(aths, dtype=np.float64)
+    sent = np.asarray(sent, dtype=bool)
+
+    trigger = np.full(len(coins), -np.inf)
+    start, end = (bound[coins] for bound in rules.bounds[PRICE])
+    rule = _best_unsent(sent, start, end, from_end=True)
+    found = rule != NO_RULE
+    trigger[found] = rules.rule_value[rule[found]]
+
+    start, end = (bound[coins] for bound in rules.bounds[ATH])
+    rule = _best_unsent(sent, start, end, from_end=False)
+    found = (rule != NO_RULE) & (aths[coins] > 0)
+    at_threshold = aths[coins][found] * (1 - rules.rule_value[rule[found]] / 100)
+    trigger[found] = np.maximum(trigger[found], at_threshold)
+    return trigger
+
+
+def level_prices(rules, rule_indices, aths):
+    """
+    Price at which each rule triggers (NaN for ATH rules of coins without an ATH)
+
+    Args:
+        rule_indices: Rules to look up
+        aths: All-time high per coin (NaN if unknown)
+    """
+    rule_indices = np.asarray(rule_indices, dtype=np.intp)
+    values = rules.rule_value[rule_indices]
+    coin_aths = np.asarray(aths, dtype=np.float64)[rules.rule_coin[rule_indices]]
+    return np.where(rules.rule_kind[rule_indices] == ATH, coin_aths * (1 - values / 100), values)
+
+
+class NextTriggers:
+    """
+    Cached next trigger price per coin
+
+    The cache is refreshed only where it can change: for coins whose ATH
+    moved (checked on every call) and for coins passed to invalidate()
+    after an alert fired. Each snapshot then costs one comparison per coin;
+    only coins at or below their trigger price need evaluate().
+    """
+
+    # Slack so float rounding in the drop % never hides a coin that triggers
+    TOLERANCE = 1e-9
+
+    def __init__(self, rules, sent):
+        self.rules = rules
+        self.sent = sent
+        self.aths = np.full(len(rules.coin_ids), np.nan)
+        self.prices = next_trigger_prices(rules, self.aths, sent)
+
+    def invalidate(self, coins):
+        """Recompute coins whose sent state changed"""
+        coins = np.unique(np.asarray(coins, dtype=np.intp))
+        if coins.size:
+            self.prices[coins] = next_trigger_prices(self.rules, self.aths, self.sent, coins)
+
+    def candidates(self, prices, aths):
+        """
+        Coin indices whose price may trigger an alert
+
+        Args:
+            prices: Current price per coin (NaN if unknown)
+            aths: All-time high per coin (NaN if unknown)
+        """
+        aths = np.asarray(aths, dtype=np.float64)
+        moved = np.flatnonzero((aths != self.aths) & ~(np.isnan(aths) & np.isnan(self.aths)))
+        if moved.size:
+            self.aths[moved] = aths[moved]
+            self.invalidate(moved)
+        with np.errstate(invalid="ignore"):
+            return np.flatnonzero(np.asarray(prices, dtype=np.float64) <= self.prices * (1 + self.TOLERANCE))
+
+
+UP = 0
+DOWN = 1
+DIRECTION_NAMES = {UP: "up", DOWN: "down"}
+
+
+def _concat_ranges(start, end):
+    """Indices of the ranges [start, end), concatenated in order"""
+    lengths = np.maximum(end - start, 0)
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=np.intp)
+    offsets = np.cumsum(lengths) - lengths
+    return (np.repeat(start, lengths) + np.arange(total) - np.repeat(offsets, lengths)).astype(np.intp)
+
+
+class CrossIndex:
+    """
+    Sorted index of every cross_alerts level, for crossing detection
+
+    Levels are ordered by direction, coin and value and keyed like
+    CompiledRules (coin * (U + 1) + rank among the direction's U distinct
+    values), so the levels a coin crossed between two prices are one
+    contiguous slice found with two binary searches: O(log n + k) per coin
+    for n levels and k crossed.
+
+    A level is crossed upward when previous < level <= current and
+    downward when current <= level < previous.
+
+    Attributes:
+        coin_ids: Coin IDs; price arrays are aligned with it
+        rule_direction: UP or DOWN per level (int8)
+        rule_coin: Coin index per level
+        rule_value: Level per rule (float64)
+        rule_raw: Level as written in the config
+    """
+
+    def __init__(self, coin_ids, coins):
+        self.coin_ids = list(coin_ids)
+        levels = set()
+        for coin_idx, coin in enumerate(coins):
+            cross = coin.get("cross_alerts") or {}
+            for direction in (UP, DOWN):
+                for value in cross.get(DIRECTION_NAMES[direction]) or []:
+                    levels.add((direction, coin_idx, float(value), value))
+        # Equal levels (e.g. 80000 and 80000.0) are one rule
+        distinct = {}
+        for level in sorted(levels, key=lambda level: level[:3]):
+            distinct.setdefault(level[:3], level[3])
+
+        self.rule_direction = np.array([key[0] for key in distinct], dtype=np.int8)
+        self.rule_coin = np.array([key[1] for key in distinct], dtype=np.int64)
+        self.rule_value = np.array([key[2] for key in distinct], dtype=np.float64)
+        self.rule_raw = list(distinct.values())
+
+        self._search = {}
+        for direction in (UP, DOWN):
+            lo, hi = (int(i) for i in np.searchsorted(self.rule_direction, [direction, direction + 1]))
+            values = np.unique(self.rule_value[lo:hi])
+            stride = len(values) + 1
+            keys = self.rule_coin[lo:hi] * stride + np.searchsorted(values, self.rule_value[lo:hi])
+            self._search[direction] = (lo, values, stride, keys)
+
+    def __len__(self):
+        return len(self.rule_value)
+
+    def _slice(self, direction, coins, low, high, side):
+        """Per coin, rule range of levels ranked in [rank(low), rank(high))"""
+        lo, values, stride, keys = self._search[direction]
+        base = coins * stride
+        start = lo + np.searchsorted(keys, base + np.searchsorted(values, low, side=side))
+        end = lo + np.searchsorted(keys, base + np.searchsorted(values, high, side=side))
+        return start, end
+
+    def crossed(self, previous, current):
+        """
+        Levels crossed between two price snapshots
+
+        Args:
+            previous: Previous price per coin (NaN if unknown)
+            current: Current price per coin (NaN if unknown)
+
+        Returns:
+            Array of rule indices, grouped by direction and coin, levels
+            ascending within a coin
+        """
+        previous = np.asarray(previous, dtype=np.float64)
+        current = np.asarray(current, dtype=np.float64)
+        with np.errstate(invalid="ignore"):
+            rising = np.flatnonzero(current > previous)
+            falling = np.flatnonzero(current < previous)
+        up = self._slice(UP, rising, previous[rising], current[rising], "right")
+        down = self._slice(DOWN, falling, current[falling], previous[falling], "left")
+        return np.concatenate([_concat_ranges(*up), _concat_ranges(*down)])
+
+
+class TopK:
+    """
+    Keeps the k highest-priority items pushed so far in a bounded min-heap
+
+    Each push is O(log k) and at most k items are held, so selecting the
+    most important alerts never sorts (or keeps) every candidate. Among
+    equal priorities the item pushed first wins.
+
+    Attributes:
+        deferred: Number of pushed items not (or no longer) kept
+    """
+
+    def __init__(self, k=None):
+        self.k = k
+        self.deferred = 0
+        self._heap = []
+        self._count = 0
+
+    def push(self, priority, item):
+        """Offer an item; returns the item it displaced (or itself if rejected), else None"""
+        entry = (priority, -self._count, item)
+        self._count += 1
+        if self.k is None or len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return None
+        self.deferred += 1
+        if self.k == 0 or entry <= self._heap[0]:
+            return item
+        return heapq.heapreplace(self._heap, entry)[2]
+
+    def items(self):
+        """Kept items in the order they were pushed"""
+        return [entry[2] for entry in sorted(self._heap, key=lambda entry: -entry[1])]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+def snapshot_arrays(rules, current_data, fallback_aths=None):
+    """
+    Align a /coins/markets snapshot with the compiled coin order
+
+    Returns:
+        Tuple of (prices, aths, positions) arrays; positions holds each
+        coin's index in current_data, or -1 if it is not in the snapshot
+    """
+    num_coins = len(rules.coin_ids)
+    prices = np.full(num_coins, np.nan)
+    aths = np.full(num_coins, np.nan)
+    positions = np.full(num_coins, -1, dtype=np.intp)
+    fallback_aths = fallback_aths or {}
+
+    for position, crypto in enumerate(current_data):
+        idx = rules.coin_index.get(crypto["id"])
+        if idx is None:
+            continue
+        positions[idx] = position
+        price = crypto.get("current_price")
+        if price is not None:
+            prices[idx] = price
+        ath = crypto.get("ath")
+        if ath is None:
+            ath = fallback_aths.get(crypto["id"])
+        if ath:
+            aths[idx] = ath
+    return prices, aths, positions
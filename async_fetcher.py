@@ -0,0 +1,93 @@
+"""
+Concurrent fetch engine for per-coin CoinGecko endpoints
+
+Per-coin requests (/coins/{id}/market_chart, /coins/{id}) are run
+concurrently on a small thread pool driven by asyncio. Concurrency is
+bounded by the configured maximum and, below that, by the adaptive
+AIMD limit in retry_policy, which shrinks after 429s and grows back on
+success. Every request still goes through http_client.get, so the
+shared rate limiter decides how fast requests actually leave. Results
+are streamed back as they complete.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import retry_policy
+
+DEFAULT_CONCURRENCY = 4
+
+
+def get_concurrency():
+    """Return the configured max number of in-flight requests"""
+    try:
+        return max(1, int(os.getenv("COINWATCH_CONCURRENCY", DEFAULT_CONCURRENCY)))
+    except ValueError:
+        return DEFAULT_CONCURRENCY
+
+
+async def fetch_concurrently(items, fetch_one, concurrency=None):
+    """
+    Run fetch_one(item) for every item with bounded, adaptive concurrency
+
+    fetch_one is a blocking function (e.g. fetch_52w_high_low); it runs on
+    a worker thread so the shared pooled session can be reused.
+
+    Yields:
+        (item, result) tuples in completion order
+    """
+    items = list(items)
+    if not items:
+        return
+
+    concurrency = concurrency or get_concurrency()
+    controller = retry_policy.get_controller()
+    slot_freed = asyncio.Condition()
+    in_flight = [0]
+    loop = asyncio.get_running_loop()
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(items))) as executor:
+        async def run(item):
+            async with slot_freed:
+                await slot_freed.wait_for(lambda: in_flight[0] < controller.concurrency_limit(concurrency))
+                in_flight[0] += 1
+            try:
+                result = await loop.run_in_executor(executor, fetch_one, item)
+            finally:
+                async with slot_freed:
+                    in_flight[0] -= 1
+                    slot_freed.notify_all()
+            return item, result
+
+        tasks = [asyncio.ensure_future(run(item)) for item in items]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def fetch_all(items, fetch_one, concurrency=None, on_result=None):
+    """
+    Synchronous entry point for fetch_concurrently
+
+    Args:
+        items: Items to fetch (usually coin IDs)
+        fetch_one: Blocking function called with each item
+        concurrency: Max in-flight requests (defaults to get_concurrency())
+        on_result: Optional callback(item, result) invoked as each completes
+
+    Returns:
+        Dict mapping item to result
+    """
+    async def collect():
+        results = {}
+        async for item, result in fetch_concurrently(items, fetch_one, concurrency):
+            results[item] = result
+            if on_result:
+                on_result(item, result)
+        return results
+
+    return asyncio.run(collect())
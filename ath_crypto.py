@@ -1,4 +1,4 @@
-import requests
+import http_client
 import time
 import json
 from datetime import datetime
@@ -20,7 +20,7 @@ def get_current_prices():
     """
     Fetch current prices for specified cryptocurrencies
     """
-    url = "https://api.coingecko.com/api/v3/coins/markets"
+    url = http_client.coingecko_url("/coins/markets")
     params = {
         "vs_currency": "usd",
         "ids": ",".join(CRYPTOCURRENCIES),
@@ -30,7 +30,7 @@ def get_current_prices():
         "sparkline": "false"
     }
     
-    response = requests.get(url, params=params)
+    response = http_client.get(url, params=params)
     
     if response.status_code == 200:
         return response.json()
@@ -42,7 +42,7 @@ def get_ath_price(crypto_id):
     """
     Fetch all-time high price for a specific cryptocurrency
     """
-    url = f"https://api.coingecko.com/api/v3/coins/{crypto_id}"
+    url = http_client.coingecko_url(f"/coins/{crypto_id}")
     params = {
         "localization": "false",
         "tickers": "false",
@@ -51,7 +51,7 @@ def get_ath_price(crypto_id):
         "developer_data": "false"
     }
     
-    response = requests.get(url, params=params)
+    response = http_client.get(url, params=params)
     
     if response.status_code == 200:
         return response.json()
@@ -132,7 +132,7 @@ def send_discord_alert(alerts):
         "Content-Type": "application/json"
     }
     
-    response = requests.post(DISCORD_WEBHOOK_URL, json=payload, headers=headers)
+    response = http_client.post(DISCORD_WEBHOOK_URL, json=payload, headers=headers)
     
     if response.status_code == 204:
         print(f"Successfully sent {len(alerts)} alerts to Discord")
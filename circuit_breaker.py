@@ -0,0 +1,136 @@
+"""
+Persistent circuit breaker for the CoinGecko API
+
+The breaker state is kept in a flock-guarded JSON file, so it survives
+across cron runs and is shared by every CoinWatch process:
+
+- closed: requests flow; consecutive 5xx/timeout/connection failures
+  are counted and the breaker opens at failure_threshold
+- open: requests fail immediately with CircuitOpenError until
+  reset_timeout has passed since the breaker opened
+- half_open: exactly one probe request is let through; success closes
+  the breaker, failure re-opens it. Other callers keep failing fast
+  unless the probe has not reported back within probe_timeout.
+"""
+
+import os
+import threading
+import time
+
+import requests
+
+import state_file
+
+DEFAULT_STATE_FILE = "circuit_breaker_state.json"
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 300  # seconds the breaker stays open
+DEFAULT_PROBE_TIMEOUT = 60  # seconds before a silent probe is replaced
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_breaker = None
+_breaker_lock = threading.Lock()
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of sending a request while the circuit is open"""
+
+    def __init__(self, retry_in):
+        self.retry_in = retry_in
+        super().__init__(f"CoinGecko API circuit open after repeated failures, next probe in {retry_in:.0f}s")
+
+
+class CircuitBreaker:
+    """Circuit breaker whose state is shared between processes through a file"""
+
+    def __init__(self, state_file=DEFAULT_STATE_FILE, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout=DEFAULT_RESET_TIMEOUT, probe_timeout=DEFAULT_PROBE_TIMEOUT, clock=time.time):
+        self.state_file = state_file
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe_timeout = probe_timeout
+        self.clock = clock
+
+    def state(self):
+        """Return the current state name"""
+        with state_file.locked_json(self.state_file) as state:
+            return state.get("state", CLOSED)
+
+    def before_request(self):
+        """
+        Check whether a request may be sent
+
+        Raises:
+            CircuitOpenError: if the circuit is open or a probe is in flight
+        """
+        with state_file.locked_json(self.state_file) as state:
+            now = self.clock()
+            current = state.get("state", CLOSED)
+
+            if current == CLOSED:
+                return
+
+            if current == OPEN:
+                retry_in = state.get("opened_at", 0) + self.reset_timeout - now
+                if retry_in > 0:
+                    raise CircuitOpenError(retry_in)
+                # Cool-down over: this caller becomes the probe
+                state["state"] = HALF_OPEN
+                state["probe_started"] = now
+                return
+
+            # HALF_OPEN: only one probe at a time
+            probe_age = now - state.get("probe_started", 0)
+            if probe_age < self.probe_timeout:
+                raise CircuitOpenError(self.probe_timeout - probe_age)
+            state["probe_started"] = now
+
+    def record_success(self):
+        """Close the circuit after a successful request"""
+        with state_file.locked_json(self.state_file) as state:
+            if state.get("state", CLOSED) != CLOSED or state.get("failures"):
+                state.clear()
+                state["state"] = CLOSED
+
+    def record_failure(self):
+        """Count an upstream failure, opening the circuit at the threshold"""
+        with state_file.locked_json(self.state_file) as state:
+            now = self.clock()
+            current = state.get("state", CLOSED)
+            failures = state.get("failures", 0) + 1
+            state["failures"] = failures
+
+            if current == HALF_OPEN or failures >= self.failure_threshold:
+                state["state"] = OPEN
+                state["opened_at"] = now
+                state.pop("probe_started", None)
+
+
+def _env_number(name, default):
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def get_breaker():
+    """Return the process-wide breaker configured from the environment"""
+    global _breaker
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(
+                    state_file=os.getenv("COINWATCH_BREAKER_FILE", DEFAULT_STATE_FILE),
+                    failure_threshold=int(_env_number("COINWATCH_BREAKER_THRESHOLD", DEFAULT_FAILURE_THRESHOLD)),
+                    reset_timeout=_env_number("COINWATCH_BREAKER_RESET_SECONDS", DEFAULT_RESET_TIMEOUT)
+                )
+    return _breaker
+
+
+def reset_breaker():
+    """Forget the process-wide breaker so the next call re-reads configuration"""
+    global _breaker
+    with _breaker_lock:
+        _breaker = None
@@ -0,0 +1,130 @@
+"""
+Change detection for config files in long-running processes
+
+FileWatcher.changed() reports which watched files were modified since the
+previous call. On Linux it listens for inotify events on the files'
+directories (via ctypes, no extra dependency), so a poll with no events
+costs one non-blocking read; elsewhere, or if inotify is unavailable, it
+falls back to comparing each file's (mtime, size, inode) on every poll.
+Either way a file only counts as changed when that signature differs, so
+events for other files in the same directory are ignored.
+
+Directories are watched rather than files because editors and atomic
+writers replace the file (a new inode) instead of modifying it.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+
+def file_signature(path):
+    """(mtime_ns, size, inode) of a file, or None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class _Inotify:
+    """Minimal non-blocking inotify reader for a set of directories"""
+
+    def __init__(self, directories):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}
+        for directory in directories:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                os.close(self.fd)
+                raise OSError(errno, f"inotify_add_watch failed for {directory}")
+            self.directories[wd] = directory
+
+    def read_paths(self):
+        """Paths named by events received since the last read"""
+        paths = set()
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return paths
+            offset = 0
+            while offset < len(data):
+                wd, _, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + name_len].rstrip(b"\0")
+                offset += name_len
+                if wd in self.directories and name:
+                    paths.add(os.path.join(self.directories[wd], os.fsdecode(name)))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """Reports which of a set of files changed between calls to changed()"""
+
+    def __init__(self, paths, use_inotify=True):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.signatures = {path: file_signature(path) for path in self.paths}
+        self._pending = set()
+        self._inotify = None
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify({os.path.dirname(path) for path in self.paths})
+            except (OSError, AttributeError, TypeError):
+                self._inotify = None
+
+    @property
+    def mode(self):
+        """'inotify' or 'poll'"""
+        return "inotify" if self._inotify else "poll"
+
+    def changed(self):
+        """
+        Return the watched paths modified since the previous call
+
+        Returns:
+            Set of absolute paths (empty if nothing changed)
+        """
+        if self._inotify:
+            candidates = self._inotify.read_paths().intersection(self.paths) | self._pending
+        else:
+            candidates = self.paths
+        self._pending = set()
+
+        changed = set()
+        for path in candidates:
+            signature = file_signature(path)
+            if signature != self.signatures[path]:
+                self.signatures[path] = signature
+                changed.add(path)
+        return changed
+
+    def forget(self, path):
+        """Report `path` as changed again on the next check (e.g. after a failed load)"""
+        path = os.path.abspath(path)
+        self.signatures[path] = ()
+        self._pending.add(path)
+
+    def close(self):
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
@@ -0,0 +1,51 @@
+import pytest
+import circuit_breaker
+import rate_limiter
+import response_cache
+import retry_policy
+import storage
+
+
+@pytest.fixture(autouse=True)
+def isolated_rate_limiter(tmp_path, monkeypatch):
+    """Keep the shared rate limiter state out of the working directory"""
+    monkeypatch.setenv("COINWATCH_RATE_LIMIT_FILE", str(tmp_path / "rate_limit_state.json"))
+    rate_limiter.reset_limiter()
+    retry_policy.reset_controller()
+    yield
+    rate_limiter.reset_limiter()
+    retry_policy.reset_controller()
+
+
+@pytest.fixture(autouse=True)
+def disabled_response_cache(tmp_path, monkeypatch):
+    """Disable the on-disk response cache unless a test enables it"""
+    monkeypatch.setenv("COINWATCH_CACHE", "0")
+    monkeypatch.setenv("COINWATCH_CACHE_DIR", str(tmp_path / "cache"))
+    response_cache.reset_cache()
+    yield
+    response_cache.reset_cache()
+
+
+@pytest.fixture(autouse=True)
+def isolated_circuit_breaker(tmp_path, monkeypatch):
+    """Keep the shared circuit breaker state out of the working directory"""
+    monkeypatch.setenv("COINWATCH_BREAKER_FILE", str(tmp_path / "circuit_breaker_state.json"))
+    circuit_breaker.reset_breaker()
+    yield
+    circuit_breaker.reset_breaker()
+
+
+@pytest.fixture(autouse=True)
+def isolated_history_store(tmp_path, monkeypatch):
+    """Keep price history column files out of the working directory"""
+    monkeypatch.setenv("COINWATCH_HISTORY_DIR", str(tmp_path / "price_history"))
+
+
+@pytest.fixture(autouse=True)
+def isolated_state_store(tmp_path, monkeypatch):
+    """Use a fresh state database per test"""
+    monkeypatch.setenv("COINWATCH_DB", str(tmp_path / "coinwatch.db"))
+    storage.reset_store()
+    yield
+    storage.reset_store()
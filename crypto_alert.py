@@ -1,8 +1,22 @@
 import requests
+import http_client
+import circuit_breaker
+import async_fetcher
+import retry_policy
+import rolling_window
+import storage
+import alert_engine
+import config_watch
+import velocity
+import rearm
+import numpy as np
 import json
+import sqlite3
 from datetime import datetime, date
+from urllib.parse import quote
 import os
 import logging
+import threading
 import time
 from dotenv import load_dotenv
 
@@ -28,6 +42,18 @@ COINS_CONFIG_FILE = "coins_config.json"
 ALERT_CONFIG_FILE = "alert_config.json"
 STATS_52W_FILE = "52w_stats.json"
 
+# Daemon mode
+DEFAULT_CHECK_INTERVAL_MINUTES = 15
+
+# Ranking used to pick alerts when a run exceeds max_alerts_per_run
+ALERT_PRIORITIES = ("depth", "ath_drop", "market_cap_rank")
+DEFAULT_ALERT_PRIORITY = "depth"
+
+# CoinGecko /coins/markets batching
+MARKETS_PER_PAGE = 250  # API maximum
+ENCODED_ID_SEPARATOR = quote(",", safe="")
+MAX_IDS_QUERY_LENGTH = 1800  # URL-encoded characters of comma-joined IDs per request
+
 def load_coins_config():
     """Load coins configuration from JSON file"""
     try:
@@ -57,51 +83,93 @@ def load_alert_config():
         logger.warning(f"⚠️  Using default alert configuration")
         return {"reset_alerts_daily": True, "alert_tracking_file": "sent_alerts.json"}
 
-def load_sent_alerts(alert_config):
-    """Load tracking of sent alerts"""
+def rearm_schedule(alert_config):
+    """
+    Empty RearmSchedule for the configured rearm policy
+
+    Alerts re-arm rearm_cooldown_hours after they fired. Without a
+    cooldown they re-arm at midnight (reset_alerts_daily, the default) or
+    never. With rearm_hysteresis_percent, the price must also recover that
+    far above the alert's level first.
+    """
+    cooldown_hours = alert_config.get('rearm_cooldown_hours')
+    if cooldown_hours is not None:
+        rearm_at = lambda fired_at: fired_at + cooldown_hours * 3600
+    elif alert_config.get('reset_alerts_daily', True):
+        rearm_at = rearm.next_midnight
+    else:
+        rearm_at = lambda fired_at: None
+    return rearm.RearmSchedule(rearm_at, alert_config.get('rearm_hysteresis_percent', 0))
+
+def load_sent_alerts(alert_config, coin_ids=None):
+    """
+    Load tracking of sent alerts from the state database
+
+    Sent state is a bitmask per coin (one bit per configured level, see
+    storage.StateStore.alert_slots) of the alerts that are not armed, per
+    the rearm schedule of the alert config. Only coin_ids are read (all
+    coins if None). The legacy tracking JSON file is imported on first use.
+
+    Returns:
+        Dict with "date" (today), "sent_bits" (coin ID to bitmask) and
+        "schedule" (the RearmSchedule; alerts re-armed while loading are
+        its pending changes)
+    """
     tracking_file = alert_config.get("alert_tracking_file", "sent_alerts.json")
     today = str(date.today())
+    store = storage.get_store()
 
     try:
-        with open(tracking_file, 'r') as f:
-            data = json.load(f)
-            if data.get("date") != today and alert_config.get("reset_alerts_daily", True):
-                # Reset alerts for new day
-                return {"date": today, "sent_alerts": {}}
-            return data
-    except FileNotFoundError:
-        return {"date": today, "sent_alerts": {}}
-    except json.JSONDecodeError:
-        return {"date": today, "sent_alerts": {}}
+        store.migrate_json_once("sent_alerts", tracking_file)
+    except ValueError as e:
+        logger.error(f"❌ Could not import '{tracking_file}' into the state database: {e}")
+
+    schedule = rearm_schedule(alert_config)
+    schedule.load(store.alert_states(coin_ids))
+    schedule.expire(datetime.now().timestamp())
+    return {"date": today, "sent_bits": schedule.sent_bits(), "schedule": schedule}
 
 def save_sent_alerts(alert_data, alert_config):
-    """Save tracking of sent alerts"""
-    tracking_file = alert_config.get("alert_tracking_file", "sent_alerts.json")
+    """
+    Save tracking of sent alerts
+
+    The rearm states in the alert_state table are the only record of sent
+    alerts. alert_data["states"], if present, holds the changed states
+    (RearmSchedule.take_changes()); otherwise the newly sent bits in
+    alert_data["sent_bits"] are recorded as fired now.
+    """
+    store = storage.get_store()
+    states = alert_data.get("states")
+    if states is None:
+        fired = rearm.fired_states(alert_data["sent_bits"], datetime.now().timestamp())
+        states = {(coin_id, slot): state for coin_id, slots in fired.items() for slot, state in slots.items()}
     try:
-        with open(tracking_file, 'w') as f:
-            json.dump(alert_data, f, indent=2)
-    except PermissionError:
-        logger.error(f"❌ Permission denied writing to '{tracking_file}'")
-        logger.error(f"💡 Check file permissions or run with appropriate access")
-    except IOError as e:
-        logger.error(f"❌ Failed to save alert tracking to '{tracking_file}': {e}")
+        store.set_alert_states(states)
+    except sqlite3.Error as e:
+        logger.error(f"❌ Failed to save alert tracking to '{store.path}': {e}")
         logger.error(f"💡 Check disk space and file system permissions")
 
-def load_52w_stats():
-    """Load 52w stats from JSON file"""
+def load_52w_stats(coin_ids=None):
+    """
+    Load 52w stats from the state database
+
+    Only rows for coin_ids are read (all coins if None). The legacy
+    52w_stats.json file is imported on first use.
+    """
+    store = storage.get_store()
     try:
-        with open(STATS_52W_FILE, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        logger.warning(f"⚠️  52-week stats file '{STATS_52W_FILE}' not found")
+        store.migrate_json_once("52w_stats", STATS_52W_FILE)
+    except ValueError as e:
+        logger.error(f"❌ Invalid JSON syntax in '{STATS_52W_FILE}'")
+        logger.error(f"💡 Error details: {e}")
+        logger.warning(f"⚠️  Continuing without importing it")
+
+    coins = store.get_52w_stats_many(coin_ids)
+    if not coins:
+        logger.warning(f"⚠️  No 52-week stats in '{store.path}'")
         logger.warning(f"💡 Run 'python update_52w_stats.py' to generate 52w high/low data")
         logger.warning(f"💡 Alerts will work but won't include 52w range information")
-        return {"last_updated": None, "coins": {}}
-    except json.JSONDecodeError as e:
-        logger.error(f"❌ Invalid JSON syntax in '{STATS_52W_FILE}'")
-        logger.error(f"💡 Error at line {e.lineno}, column {e.colno}: {e.msg}")
-        logger.warning(f"⚠️  Continuing without 52w stats")
-        return {"last_updated": None, "coins": {}}
+    return {"last_updated": store.get_meta("52w_last_updated"), "coins": coins}
 
 def validate_coins_config(config):
     """
@@ -146,11 +214,44 @@ def validate_coins_config(config):
         if 'symbol' in coin and not isinstance(coin['symbol'], str):
             errors.append(f"{coin_prefix}: 'symbol' must be a string")
 
-        if 'ath_thresholds' in coin and not isinstance(coin['ath_thresholds'], list):
-            errors.append(f"{coin_prefix}: 'ath_thresholds' must be a list")
-
-        if 'price_alerts' in coin and not isinstance(coin['price_alerts'], list):
-            errors.append(f"{coin_prefix}: 'price_alerts' must be a list")
+        for field in ('ath_thresholds', 'price_alerts'):
+            if field not in coin:
+                continue
+            if not isinstance(coin[field], list):
+                errors.append(f"{coin_prefix}: '{field}' must be a list")
+            elif not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in coin[field]):
+                errors.append(f"{coin_prefix}: '{field}' must contain only numbers")
+
+        # Optional: [{"drop_percent": 10, "window_minutes": 30}, ...] (daemon mode)
+        if 'velocity_alerts' in coin:
+            if not isinstance(coin['velocity_alerts'], list):
+                errors.append(f"{coin_prefix}: 'velocity_alerts' must be a list")
+            else:
+                for rule in coin['velocity_alerts']:
+                    if not isinstance(rule, dict) or not all(
+                        isinstance(rule.get(field), (int, float)) and not isinstance(rule.get(field), bool)
+                        and rule.get(field) > 0 for field in ('drop_percent', 'window_minutes')
+                    ):
+                        errors.append(f"{coin_prefix}: each velocity alert needs positive 'drop_percent' and 'window_minutes'")
+                        break
+
+        # Optional: {"up": [75000, 80000], "down": [60000]} price levels to cross
+        if 'cross_alerts' in coin:
+            cross = coin['cross_alerts']
+            if not isinstance(cross, dict) or set(cross) - {'up', 'down'}:
+                errors.append(f"{coin_prefix}: 'cross_alerts' must be an object with 'up' and/or 'down' lists")
+            elif not all(
+                isinstance(levels, list) and all(
+                    isinstance(level, (int, float)) and not isinstance(level, bool) and level > 0 for level in levels
+                ) for levels in cross.values()
+            ):
+                errors.append(f"{coin_prefix}: 'cross_alerts' levels must be lists of positive prices")
+
+        # Optional: CoinGecko vs_currency its price levels are quoted in ("usd" by default)
+        if 'quote_currency' in coin:
+            currency = coin['quote_currency']
+            if not isinstance(currency, str) or not currency.isalpha() or currency != currency.lower():
+                errors.append(f"{coin_prefix}: 'quote_currency' must be a lowercase currency code like 'eur'")
 
     return errors
 
@@ -168,7 +269,9 @@ def validate_alert_config(config):
         'reset_alerts_daily': bool,
         'check_interval_minutes': int,
         'max_alerts_per_run': int,
-        'alert_tracking_file': str
+        'alert_tracking_file': str,
+        'ath_fallback_fetch': bool,
+        'alert_priority': str
     }
 
     for field, expected_type in expected_types.items():
@@ -176,25 +279,80 @@ def validate_alert_config(config):
             if not isinstance(config[field], expected_type):
                 errors.append(f"'{field}' must be of type {expected_type.__name__}, got {type(config[field]).__name__}")
 
+    interval = config.get('check_interval_minutes')
+    if isinstance(interval, int) and interval < 1:
+        errors.append(f"'check_interval_minutes' must be at least 1, got {interval}")
+
+    max_alerts = config.get('max_alerts_per_run')
+    if isinstance(max_alerts, int) and max_alerts < 1:
+        errors.append(f"'max_alerts_per_run' must be at least 1, got {max_alerts}")
+
+    priority = config.get('alert_priority')
+    if isinstance(priority, str) and priority not in ALERT_PRIORITIES:
+        errors.append(f"'alert_priority' must be one of {', '.join(ALERT_PRIORITIES)}, got '{priority}'")
+
+    for field in ('rearm_cooldown_hours', 'rearm_hysteresis_percent'):
+        value = config.get(field)
+        if field in config and (not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0):
+            errors.append(f"'{field}' must be a non-negative number, got {value!r}")
+
     return errors
 
-def get_current_prices(coin_ids):
+def chunk_coin_ids(coin_ids, max_ids=MARKETS_PER_PAGE, max_query_length=MAX_IDS_QUERY_LENGTH):
     """
-    Fetch current prices for specified cryptocurrencies
+    Split coin IDs into chunks that fit in one markets request
+
+    Each chunk holds at most max_ids IDs and its comma-joined 'ids' value
+    stays under max_query_length characters once URL-encoded (each comma
+    is sent as '%2C'), keeping URLs well below common server limits.
+
+    Returns:
+        List of lists of coin IDs
+    """
+    chunks = []
+    current = []
+    current_length = 0
+
+    for coin_id in coin_ids:
+        encoded_length = len(quote(coin_id, safe=""))
+        added_length = encoded_length + (len(ENCODED_ID_SEPARATOR) if current else 0)
+        if current and (len(current) >= max_ids or current_length + added_length > max_query_length):
+            chunks.append(current)
+            current = []
+            current_length = 0
+            added_length = encoded_length
+        current.append(coin_id)
+        current_length += added_length
+
+    if current:
+        chunks.append(current)
+
+    return chunks
+
+def fetch_markets_page(ids_chunk, page, use_cache=True):
     """
-    url = "https://api.coingecko.com/api/v3/coins/markets"
+    Fetch one page of /coins/markets for a chunk of coin IDs
+
+    Args:
+        use_cache: If False, bypass the response cache (daemon ticks may be
+            closer together than the markets TTL)
+
+    Returns:
+        List of market entries, or None on error
+    """
+    url = http_client.coingecko_url("/coins/markets")
     params = {
         "vs_currency": "usd",
-        "ids": ",".join(coin_ids),
+        "ids": ",".join(ids_chunk),
         "order": "market_cap_desc",
-        "per_page": 100,
-        "page": 1,
+        "per_page": MARKETS_PER_PAGE,
+        "page": page,
         "sparkline": "false",
         "price_change_percentage": "24h,7d"
     }
-    
+
     try:
-        response = requests.get(url, params=params, timeout=30)
+        response = http_client.get(url, params=params, use_cache=use_cache)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.Timeout:
@@ -215,15 +373,75 @@ def get_current_prices(coin_ids):
         logger.error(f"❌ Network connection error")
         logger.error(f"💡 Check your internet connection")
         return None
+    except circuit_breaker.CircuitOpenError as e:
+        logger.error(f"❌ Skipping price fetch: {e}")
+        logger.error(f"💡 CoinGecko looked down on recent runs, a probe request will be retried automatically")
+        return None
     except requests.exceptions.RequestException as e:
         logger.error(f"❌ Unexpected error fetching current prices: {str(e)}")
         return None
 
+def fetch_markets_snapshot(coin_ids, use_cache=True):
+    """
+    Fetch market data for any number of coins in URL-safe, paginated batches
+
+    IDs are split with chunk_coin_ids() and each chunk is paged at
+    MARKETS_PER_PAGE until a short page is returned. Results are merged
+    into a single snapshot with duplicates removed.
+
+    Returns:
+        Tuple (market entries, list of requested IDs missing from the response),
+        or (None, coin_ids) if no chunk could be fetched
+    """
+    snapshot = []
+    seen_ids = set()
+    fetched_any = False
+
+    for ids_chunk in chunk_coin_ids(coin_ids):
+        page = 1
+        while True:
+            entries = fetch_markets_page(ids_chunk, page, use_cache=use_cache)
+            if entries is None:
+                break
+            fetched_any = True
+
+            for entry in entries:
+                if entry.get('id') not in seen_ids:
+                    seen_ids.add(entry.get('id'))
+                    snapshot.append(entry)
+
+            # A short page is the last one, and a chunk no larger than a page
+            # is covered by its first page
+            if len(entries) < MARKETS_PER_PAGE or page * MARKETS_PER_PAGE >= len(ids_chunk):
+                break
+            page += 1
+
+    if not fetched_any:
+        return None, list(coin_ids)
+
+    missing_ids = [coin_id for coin_id in coin_ids if coin_id not in seen_ids]
+    if missing_ids:
+        logger.warning(f"⚠️  {len(missing_ids)} coin(s) missing from markets response: {', '.join(missing_ids[:20])}"
+                       + (" ..." if len(missing_ids) > 20 else ""))
+        logger.warning(f"💡 Check the IDs with './coinwatch search <name>'")
+
+    return snapshot, missing_ids
+
+def get_current_prices(coin_ids, use_cache=True):
+    """
+    Fetch current prices for specified cryptocurrencies
+
+    Returns:
+        List of market entries, or None if nothing could be fetched
+    """
+    snapshot, _ = fetch_markets_snapshot(coin_ids, use_cache=use_cache)
+    return snapshot
+
 def get_ath_price(crypto_id, max_retries=3):
     """
     Fetch all-time high price for a specific cryptocurrency with retry logic
     """
-    url = f"https://api.coingecko.com/api/v3/coins/{crypto_id}"
+    url = http_client.coingecko_url(f"/coins/{crypto_id}")
     params = {
         "localization": "false",
         "tickers": "false",
@@ -234,13 +452,13 @@ def get_ath_price(crypto_id, max_retries=3):
 
     for attempt in range(max_retries):
         try:
-            response = requests.get(url, params=params, timeout=30)
+            response = http_client.get(url, params=params)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.Timeout:
             if attempt < max_retries - 1:
-                retry_wait = (attempt + 1) * 30
-                logger.warning(f"⚠️  Timeout fetching ATH for {crypto_id}, retrying in {retry_wait}s ({attempt + 1}/{max_retries})")
+                retry_wait = retry_policy.retry_delay(attempt)
+                logger.warning(f"⚠️  Timeout fetching ATH for {crypto_id}, retrying in {retry_wait:.1f}s ({attempt + 1}/{max_retries})")
                 time.sleep(retry_wait)
                 continue
             else:
@@ -248,9 +466,8 @@ def get_ath_price(crypto_id, max_retries=3):
                 return None
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 429:  # Rate limit
-                retry_wait = (attempt + 1) * 30  # 30s, 60s, 90s
-                logger.warning(f"⚠️  Rate limit hit for {crypto_id}, waiting {retry_wait}s before retry ({attempt + 1}/{max_retries})")
-                time.sleep(retry_wait)
+                # The shared limiter has already been drained; the retry waits for budget
+                logger.warning(f"⚠️  Rate limit hit for {crypto_id}, retrying when the rate budget allows ({attempt + 1}/{max_retries})")
                 continue
             else:
                 logger.error(f"❌ HTTP {e.response.status_code} error fetching ATH for {crypto_id}")
@@ -259,6 +476,9 @@ def get_ath_price(crypto_id, max_retries=3):
             logger.error(f"❌ Network connection error fetching ATH for {crypto_id}")
             logger.error(f"💡 Check your internet connection")
             return None
+        except circuit_breaker.CircuitOpenError as e:
+            logger.error(f"❌ Skipping ATH fetch for {crypto_id}: {e}")
+            return None
         except requests.exceptions.RequestException as e:
             logger.error(f"❌ Error fetching ATH for {crypto_id}: {str(e)}")
             return None
@@ -266,157 +486,747 @@ def get_ath_price(crypto_id, max_retries=3):
     logger.error(f"❌ Failed to fetch ATH for {crypto_id} after {max_retries} retries")
     return None
 
-def check_alerts(dry_run=False):
+def get_ath_from_coin_endpoint(crypto_id, currency=storage.DEFAULT_CURRENCY):
+    """
+    Fetch a coin's ATH from the per-coin /coins/{id} endpoint.
+    Used when the markets response has no 'ath' and 'ath_fallback_fetch'
+    is enabled in alert_config.json, and to seed the ATH of coins quoted
+    in another currency.
+
+    Returns:
+        ATH price in `currency`, or None if unavailable
+    """
+    ath_data = get_ath_price(crypto_id)
+    if not ath_data:
+        return None
+    try:
+        return ath_data['market_data']['ath'][currency]
+    except (KeyError, TypeError):
+        logger.error(f"❌ Unexpected ATH response format for {crypto_id}")
+        return None
+
+def get_ath_prices(crypto_ids, concurrency=None, currencies=None):
+    """
+    Fetch ATH prices for many coins concurrently via /coins/{id}
+
+    Thin wrapper running get_ath_from_coin_endpoint through the async
+    fetch engine.
+
+    Args:
+        currencies: Dict of coin ID to quote currency (USD for coins not in it)
+
+    Returns:
+        Dict mapping coin ID to ATH price (None if unavailable)
+    """
+    currencies = currencies or {}
+    return async_fetcher.fetch_all(
+        crypto_ids,
+        lambda crypto_id: get_ath_from_coin_endpoint(crypto_id, currencies.get(crypto_id, storage.DEFAULT_CURRENCY)),
+        concurrency=concurrency
+    )
+
+def fetch_simple_prices(coin_ids, currencies, use_cache=True):
+    """
+    Fetch prices of coins in several quote currencies via /simple/price
+
+    All IDs and currencies go into one request; the IDs are only split
+    if the URL would get too long.
+
+    Returns:
+        Dict of coin ID to its /simple/price entry (e.g. {"eur": 1.0,
+        "eur_market_cap": ..., "eur_24h_vol": ..., "eur_24h_change": ...}),
+        or None if nothing could be fetched
+    """
+    url = http_client.coingecko_url("/simple/price")
+    quotes = {}
+    fetched_any = False
+    for ids_chunk in chunk_coin_ids(coin_ids, max_ids=max(len(coin_ids), 1)):
+        params = {
+            "ids": ",".join(ids_chunk),
+            "vs_currencies": ",".join(currencies),
+            "include_market_cap": "true",
+            "include_24hr_vol": "true",
+            "include_24hr_change": "true"
+        }
+        try:
+            response = http_client.get(url, params=params, use_cache=use_cache)
+            response.raise_for_status()
+            quotes.update(response.json())
+            fetched_any = True
+        except requests.exceptions.HTTPError as e:
+            logger.error(f"❌ HTTP {e.response.status_code} error fetching {', '.join(currencies).upper()} prices")
+        except circuit_breaker.CircuitOpenError as e:
+            logger.error(f"❌ Skipping quote currency price fetch: {e}")
+        except requests.exceptions.RequestException as e:
+            logger.error(f"❌ Error fetching quote currency prices: {str(e)}")
+    return quotes if fetched_any else None
+
+def coin_currency(coin):
+    """Quote currency of a coin's alert levels (a CoinGecko vs_currency, USD by default)"""
+    return coin.get('quote_currency', storage.DEFAULT_CURRENCY)
+
+def quote_market_data(coins, current_data, dry_run=False, use_cache=True):
+    """
+    Re-quote the market entries of coins whose quote_currency is not USD
+
+    Prices, market cap, volume and 24h change of all such coins, in all
+    their currencies, come from one /simple/price request. ATHs per
+    currency are kept in the state database: seeded from /coins/{id} the
+    first time a coin with ATH thresholds is seen in a currency, then raised whenever a price
+    exceeds them. The 7d change is not available per currency and is
+    dropped.
+
+    Args:
+        coins: Coin config dicts
+        current_data: /coins/markets entries (USD)
+        dry_run: If True, new ATHs are used but not saved
+        use_cache: If False, bypass the response cache for the prices
+
+    Returns:
+        List of market entries; re-quoted ones carry "quote_currency".
+        Coins without a price in their currency are left out.
+    """
+    quoted = {coin['id']: coin_currency(coin) for coin in coins if coin_currency(coin) != storage.DEFAULT_CURRENCY}
+    present = [entry['id'] for entry in current_data if entry['id'] in quoted]
+    if not present:
+        return current_data
+
+    quotes = fetch_simple_prices(present, sorted({quoted[coin_id] for coin_id in present}), use_cache=use_cache) or {}
+    store = storage.get_store()
+    aths = store.quote_aths([(coin_id, quoted[coin_id]) for coin_id in present])
+    with_ath_rules = {coin['id'] for coin in coins if coin.get('ath_thresholds')}
+    unseeded = [coin_id for coin_id in present
+                if coin_id in with_ath_rules and (coin_id, quoted[coin_id]) not in aths]
+    raised = {}
+    if unseeded:
+        logger.info(f"Fetching quote currency ATH for {len(unseeded)} coin(s)")
+        for coin_id, ath in get_ath_prices(unseeded, currencies=quoted).items():
+            if ath is not None:
+                aths[(coin_id, quoted[coin_id])] = raised[(coin_id, quoted[coin_id])] = ath
+
+    result = []
+    for entry in current_data:
+        currency = quoted.get(entry['id'])
+        if currency is None:
+            result.append(entry)
+            continue
+        quote = quotes.get(entry['id']) or {}
+        price = quote.get(currency)
+        if price is None:
+            logger.warning(f"⚠️  No {currency.upper()} price for {entry['id']}, skipping it")
+            continue
+        ath = aths.get((entry['id'], currency))
+        if ath is not None and price > ath:
+            ath = raised[(entry['id'], currency)] = price
+        result.append({
+            **entry,
+            "quote_currency": currency,
+            "current_price": price,
+            "ath": ath,
+            "market_cap": quote.get(f"{currency}_market_cap"),
+            "total_volume": quote.get(f"{currency}_24h_vol"),
+            "price_change_percentage_24h": quote.get(f"{currency}_24h_change"),
+            "price_change_percentage_7d_in_currency": None
+        })
+
+    if raised and not dry_run:
+        try:
+            store.raise_quote_aths(raised)
+        except sqlite3.Error as e:
+            logger.error(f"❌ Failed to save quote currency ATHs to '{store.path}': {e}")
+    return result
+
+class AlertContext:
+    """
+    Configuration and state reused between checks
+
+    A one-shot run builds a fresh context; daemon mode keeps one for the
+    life of the process so config parsing, rule compilation and state
+    reads happen once rather than on every tick. Sent alerts are re-armed
+    as their cooldown expires (see rearm.RearmSchedule) and 52w stats are
+    reloaded when the updater has written new ones; newly sent and
+    re-armed alerts are applied in memory and only they are persisted.
+    """
+
+    def __init__(self):
+        self.coins_config = None
+        self.alert_config = None
+        self.rules = None
+        self.sent_alerts = None
+        self.sent_mask = None
+        self.rearm = None
+        self.triggers = None
+        self.crosses = None
+        self.last_prices = None
+        self.stats_52w = None
+        self.velocity = None
+        self.velocity_interval = None
+        # Daemon ticks can be closer together than the cached prices' TTL
+        self.use_cache = True
+
+    def start_velocity(self, interval_seconds):
+        """Begin sampling prices for velocity_alerts (daemon mode)"""
+        self.velocity_interval = interval_seconds
+        self.velocity = self._build_velocity(None)
+        short = [minutes for minutes in self.velocity.rule_minutes if minutes * 60 < interval_seconds]
+        if short:
+            logger.warning(f"⚠️  {len(short)} velocity alert(s) have a window shorter than the check interval "
+                           f"and can never trigger")
+        if len(self.velocity):
+            logger.info(f"Tracking {len(self.velocity)} velocity alert rule(s)")
+
+    def _build_velocity(self, previous):
+        rules_by_coin = [coin.get('velocity_alerts') or [] for coin in self.rules.coins]
+        capacity = velocity.required_capacity(rules_by_coin, self.velocity_interval)
+        return velocity.VelocityTracker(self.rules.coin_ids, rules_by_coin, capacity, previous)
+
+    def load_config(self):
+        """
+        Load and compile the configuration if not loaded yet
+
+        Returns:
+            True if a coins configuration is available
+        """
+        if self.coins_config is None:
+            coins_config = load_coins_config()
+            if not coins_config:
+                return False
+            self.coins_config = coins_config
+            self.alert_config = load_alert_config()
+            self.rules = alert_engine.compile_rules(coins_config, storage.get_store().alert_slots)
+            self.crosses = alert_engine.CrossIndex(self.rules.coin_ids, self.rules.coins)
+            self.sent_alerts = None
+            self.triggers = None
+            self.last_prices = None
+            self.stats_52w = None
+        return True
+
+    def reload_config(self):
+        """
+        Apply an edited configuration without a restart
+
+        Only coins whose entry changed are recompiled; sent alerts and 52w
+        stats are read just for coins that were added (or moved to another
+        quote currency) and dropped for coins that were removed. An invalid
+        new config is ignored and the current one kept.
+
+        Returns:
+            True if the new configuration was applied
+        """
+        coins_config = load_coins_config()
+        errors = validate_coins_config(coins_config) if coins_config else ["could not be loaded"]
+        if errors:
+            logger.error(f"❌ Not reloading {COINS_CONFIG_FILE}: {errors[0]}")
+            logger.warning(f"⚠️  Keeping the previous configuration")
+            return False
+
+        alert_config = load_alert_config()
+        errors = validate_alert_config(alert_config)
+        if errors:
+            logger.error(f"❌ Not reloading {ALERT_CONFIG_FILE}: {errors[0]}")
+            logger.warning(f"⚠️  Keeping the previous configuration")
+            return False
+
+        rules = alert_engine.compile_rules(coins_config, storage.get_store().alert_slots, previous=self.rules)
+        added, removed, changed = rules.changes
+
+        if self.sent_alerts is not None and alert_config == self.alert_config:
+            # Coins moved to another quote currency have their levels in
+            # other slots; their stored state is re-read like a new coin's
+            old_currency = {coin['id']: coin_currency(coin) for coin in self.rules.coins}
+            switched = [coin['id'] for coin in rules.coins
+                        if coin['id'] in old_currency and coin_currency(coin) != old_currency[coin['id']]]
+            reread = added + switched
+            kept = set(rules.coin_ids) - set(switched)
+            sent_bits = {coin_id: bits for coin_id, bits in self.sent_alerts['sent_bits'].items() if coin_id in kept}
+            schedule = self.rearm
+            schedule.drop_coins(kept)
+            if reread:
+                reread_alerts = load_sent_alerts(alert_config, reread)
+                sent_bits.update(reread_alerts['sent_bits'])
+                if reread_alerts.get('schedule') is not None:
+                    schedule.merge(reread_alerts['schedule'])
+            sent_alerts = {"date": self.sent_alerts['date'], "sent_bits": sent_bits}
+            sent_mask = rules.sent_mask(sent_bits)
+        else:
+            sent_alerts, sent_mask, schedule = None, None, None
+
+        stats_52w = self.stats_52w
+        if stats_52w is not None:
+            keys = stats_keys(rules.coins)
+            old_keys = set(stats_keys(self.rules.coins))
+            new_keys = [key for key in keys if key not in old_keys]
+            keys = set(keys)
+            coins = {key: entry for key, entry in stats_52w['coins'].items() if key in keys}
+            if new_keys:
+                coins.update(load_52w_stats(new_keys)['coins'])
+            stats_52w = {**stats_52w, "coins": coins}
+
+        last_prices = None
+        if self.last_prices is not None:
+            # Previous prices are per quote currency; a coin that switched
+            # currency starts from its stored price in the new one, if any
+            known = dict(zip(stats_keys(self.rules.coins), self.last_prices.tolist()))
+            keys = stats_keys(rules.coins)
+            known.update(storage.get_store().last_prices([key for key in keys if key not in known]))
+            last_prices = np.array([known.get(key, np.nan) for key in keys], dtype=np.float64)
+
+        # Swap everything at once; a check in progress keeps its references
+        self.coins_config, self.alert_config, self.rules = coins_config, alert_config, rules
+        self.sent_alerts, self.sent_mask, self.stats_52w = sent_alerts, sent_mask, stats_52w
+        self.rearm = schedule
+        self.crosses = alert_engine.CrossIndex(rules.coin_ids, rules.coins)
+        self.last_prices = last_prices
+        self.triggers = None
+        if self.velocity is not None:
+            self.velocity = self._build_velocity(self.velocity)
+        logger.info(f"✅ Configuration reloaded: {len(added)} added, {len(removed)} removed, "
+                    f"{len(changed)} changed, {len(rules.coin_ids) - len(added) - len(changed)} unchanged")
+        return True
+
+    @property
+    def coin_ids(self):
+        return self.rules.coin_ids
+
+    def load_state(self):
+        """Load sent alerts, 52w stats and previous prices, or refresh them when out of date"""
+        if self.last_prices is None and len(self.crosses):
+            keys = stats_keys(self.rules.coins)
+            known = storage.get_store().last_prices(keys)
+            self.last_prices = np.array([known.get(key, np.nan) for key in keys], dtype=np.float64)
+
+        now = datetime.now().timestamp()
+        if self.sent_alerts is None:
+            self.sent_alerts = load_sent_alerts(self.alert_config, self.coin_ids)
+            self.rearm = self.sent_alerts.get('schedule')
+            if self.rearm is None:
+                # Sent bits without rearm states count as fired now
+                self.rearm = rearm_schedule(self.alert_config)
+                self.rearm.load(rearm.fired_states(self.sent_alerts['sent_bits'], now))
+            self.sent_mask = self.rules.sent_mask(self.sent_alerts['sent_bits'])
+            self.triggers = None
+        else:
+            self.sent_alerts['date'] = str(date.today())
+            self.apply_rearmed(self.rearm.expire(now))
+
+        if self.stats_52w is None:
+            self.stats_52w = load_52w_stats(stats_keys(self.rules.coins))
+        elif storage.get_store().get_meta("52w_last_updated") != self.stats_52w.get('last_updated'):
+            logger.info("52-week stats were updated, reloading")
+            self.stats_52w = load_52w_stats(stats_keys(self.rules.coins))
+
+    def next_triggers(self):
+        """Per-coin next trigger prices for the current rules and sent state"""
+        if self.triggers is None:
+            self.triggers = alert_engine.NextTriggers(self.rules, self.sent_mask)
+        return self.triggers
+
+    def record_prices(self, prices, keep=(), persist=True):
+        """
+        Remember this check's prices as the previous ones for cross_alerts
+
+        Args:
+            prices: Price per coin (NaN where unknown; the old price is kept)
+            keep: Coin indices whose previous price must not advance (their
+                crossing alert was deferred)
+            persist: Also write the prices of coins with cross_alerts to the store
+        """
+        if self.last_prices is None:
+            return
+        updated = np.where(np.isnan(prices), self.last_prices, prices)
+        keep = np.asarray(list(keep), dtype=np.intp)
+        updated[keep] = self.last_prices[keep]
+        self.last_prices = updated
+        if persist:
+            coins = np.unique(self.crosses.rule_coin)
+            coins = coins[~np.isnan(updated[coins])]
+            keys = stats_keys(self.rules.coins)
+            storage.get_store().set_last_prices(
+                {keys[idx]: float(updated[idx]) for idx in coins.tolist()}, datetime.now().isoformat()
+            )
+
+    def apply_rearmed(self, keys):
+        """Clear the sent state of re-armed (coin_id, slot) alerts in memory"""
+        sent_bits = self.sent_alerts['sent_bits']
+        for coin_id, slot in keys:
+            if coin_id in sent_bits:
+                sent_bits[coin_id] &= ~(1 << slot)
+            coin_idx = self.rules.coin_index.get(coin_id)
+            rule_idx = self.rules.slot_rules[coin_idx].get(slot) if coin_idx is not None else None
+            if rule_idx is not None:
+                self.sent_mask[rule_idx] = False
+                if self.triggers is not None:
+                    self.triggers.invalidate([coin_idx])
+
+    def rearm_recovered(self, prices, aths):
+        """Re-arm cooling alerts whose coin recovered past the hysteresis band"""
+        keys, rule_indices = [], []
+        for coin_id, slot in self.rearm.cooling:
+            coin_idx = self.rules.coin_index.get(coin_id)
+            rule_idx = self.rules.slot_rules[coin_idx].get(slot) if coin_idx is not None else None
+            if rule_idx is not None:
+                keys.append((coin_id, slot))
+                rule_indices.append(rule_idx)
+        if not keys:
+            return
+        levels = alert_engine.level_prices(self.rules, rule_indices, aths)
+        coin_prices = np.asarray(prices, dtype=np.float64)[self.rules.rule_coin[rule_indices]]
+        with np.errstate(invalid="ignore"):
+            recovered = coin_prices > levels * (1 + self.rearm.hysteresis_percent / 100)
+        self.apply_rearmed(self.rearm.recover([key for key, ok in zip(keys, recovered) if ok]))
+
+    def record_sent(self, rule_indices):
+        """Apply newly sent rules in memory and persist just the changed entries"""
+        self.sent_mask[rule_indices] = True
+        if self.triggers is not None:
+            self.triggers.invalidate(self.rules.rule_coin[rule_indices])
+        new_bits = self.rules.sent_bits(rule_indices)
+        for coin_id, bits in new_bits.items():
+            self.sent_alerts['sent_bits'][coin_id] = self.sent_alerts['sent_bits'].get(coin_id, 0) | bits
+        self.rearm.fire([(self.rules.coin_ids[self.rules.rule_coin[rule_idx]], int(self.rules.rule_slot[rule_idx]))
+                         for rule_idx in rule_indices], datetime.now().timestamp())
+        save_sent_alerts({"date": self.sent_alerts['date'], "sent_bits": new_bits,
+                          "states": self.rearm.take_changes()}, self.alert_config)
+
+    def save_rearmed(self):
+        """Persist re-armed and cooling alerts not yet written"""
+        changes = self.rearm.take_changes()
+        if changes:
+            save_sent_alerts({"date": self.sent_alerts['date'], "sent_bits": {}, "states": changes},
+                             self.alert_config)
+
+def stats_keys(coins):
+    """52w stats keys of coin configs (per coin ID and quote currency)"""
+    return [storage.stats_key(coin['id'], coin_currency(coin)) for coin in coins]
+
+def format_price(value, currency=storage.DEFAULT_CURRENCY, spec=",.6f"):
+    """Price with its currency: '$1,234.500000' for USD, '1,234.500000 EUR' otherwise"""
+    if currency == storage.DEFAULT_CURRENCY:
+        return f"${value:{spec}}"
+    return f"{value:{spec}} {currency.upper()}"
+
+def build_market_data(crypto, stats_52w):
+    """Market context fields shared by every alert type"""
+    current_price = crypto['current_price']
+    currency = crypto.get('quote_currency', storage.DEFAULT_CURRENCY)
+    price_change_24h = crypto.get('price_change_percentage_24h')
+    price_change_7d = crypto.get('price_change_percentage_7d_in_currency')
+    coin_52w_stats = rolling_window.stats_as_of(stats_52w.get('coins', {}).get(storage.stats_key(crypto['id'], currency)))
+    high_52w = coin_52w_stats.get('high_52w') if coin_52w_stats else None
+    low_52w = coin_52w_stats.get('low_52w') if coin_52w_stats else None
+    pct_from_52w_high = ((current_price - high_52w) / high_52w) * 100 if high_52w and high_52w > 0 else None
+    pct_from_52w_low = ((current_price - low_52w) / low_52w) * 100 if low_52w and low_52w > 0 else None
+
+    return {
+        "quoteCurrency": currency,
+        "priceChange24h": round(price_change_24h, 2) if price_change_24h is not None else None,
+        "priceChange7d": round(price_change_7d, 2) if price_change_7d is not None else None,
+        "marketCapRank": crypto.get('market_cap_rank'),
+        "totalVolume": crypto.get('total_volume'),
+        "marketCap": crypto.get('market_cap'),
+        "high52w": high_52w,
+        "low52w": low_52w,
+        "pctFrom52wHigh": round(pct_from_52w_high, 2) if pct_from_52w_high is not None else None,
+        "pctFrom52wLow": round(pct_from_52w_low, 2) if pct_from_52w_low is not None else None
+    }
+
+def velocity_alerts(context, prices, current_data, positions, stats_52w):
+    """
+    Build velocity alerts from the daemon's recent price samples
+
+    One alert per coin, for the largest drop_percent rule triggered.
+
+    Returns:
+        List of (coin index, alert, triggered velocity rule indices) tuples
+    """
+    tracker = context.velocity
+    rule_indices, highs, drops = tracker.evaluate(prices)
+    by_coin = {}
+    for rule_idx, high, drop in zip(rule_indices, highs, drops):
+        by_coin.setdefault(int(tracker.rule_coin[rule_idx]), []).append((int(rule_idx), float(high), float(drop)))
+
+    results = []
+    for idx in sorted(by_coin, key=lambda idx: positions[idx]):
+        hits = by_coin[idx]
+        rule_idx, high, drop = max(hits, key=lambda hit: tracker.rule_percent[hit[0]])
+        crypto = current_data[positions[idx]]
+        coin_config = context.rules.coins[idx]
+        alert = {
+            "type": "velocity",
+            "crypto": f"{coin_config['name']} ({coin_config['symbol']})",
+            "currentPrice": crypto['current_price'],
+            "windowHigh": high,
+            "windowMinutes": tracker.rule_minutes[rule_idx],
+            "dropPercent": round(drop, 2),
+            "threshold": float(tracker.rule_percent[rule_idx])
+        }
+        alert.update(build_market_data(crypto, stats_52w))
+        logger.info(f"{alert['crypto']} - down {drop:.2f}% from {format_price(high, alert['quoteCurrency'], '.6f')} "
+                    f"within {alert['windowMinutes']} min")
+        results.append((idx, alert, [hit[0] for hit in hits]))
+    return results
+
+def cross_alerts(context, prices, current_data, positions, stats_52w):
+    """
+    Build alerts for cross_alerts levels passed since the previous check
+
+    One alert per coin, naming the furthest level crossed.
+
+    Returns:
+        List of (coin index, alert) tuples
+    """
+    crosses = context.crosses
+    by_coin = {}
+    for rule_idx in crosses.crossed(context.last_prices, prices).tolist():
+        by_coin.setdefault(int(crosses.rule_coin[rule_idx]), []).append(rule_idx)
+
+    results = []
+    for idx in sorted(by_coin, key=lambda idx: positions[idx]):
+        crossed = by_coin[idx]
+        crypto = current_data[positions[idx]]
+        coin_config = context.rules.coins[idx]
+        direction = alert_engine.DIRECTION_NAMES[crosses.rule_direction[crossed[0]]]
+        levels = [crosses.rule_raw[rule_idx] for rule_idx in crossed]
+        alert = {
+            "type": "cross",
+            "crypto": f"{coin_config['name']} ({coin_config['symbol']})",
+            "direction": direction,
+            "currentPrice": crypto['current_price'],
+            "previousPrice": float(context.last_prices[idx]),
+            "level": levels[-1] if direction == "up" else levels[0],
+            "levelsCrossed": levels
+        }
+        alert.update(build_market_data(crypto, stats_52w))
+        logger.info(f"{alert['crypto']} - crossed {direction} through {len(levels)} level(s) "
+                    f"from {format_price(alert['previousPrice'], alert['quoteCurrency'], '.6f')} "
+                    f"to {format_price(alert['currentPrice'], alert['quoteCurrency'], '.6f')}")
+        results.append((idx, alert))
+    return results
+
+def alert_priority(alert, priority, drop_percent=None):
+    """
+    Ranking value of an alert for max_alerts_per_run (higher is more important)
+
+    Args:
+        alert: Alert dict built by check_alerts
+        priority: "depth" (% below the price that triggered it),
+            "ath_drop" (% below ATH) or "market_cap_rank" (best rank first)
+        drop_percent: Coin's drop from ATH (%), NaN/None if unknown
+    """
+    if priority == "ath_drop":
+        if drop_percent is None or drop_percent != drop_percent:
+            return float('-inf')
+        return drop_percent
+    if priority == "market_cap_rank":
+        rank = alert.get('marketCapRank')
+        return -rank if rank is not None else float('-inf')
+
+    if alert['type'] == 'cross':
+        # How far past the furthest crossed level the price moved
+        if not alert['level'] or alert['level'] <= 0:
+            return float('-inf')
+        return abs(alert['currentPrice'] - alert['level']) / alert['level'] * 100
+    if alert['type'] == 'ath':
+        trigger_price = alert['athPrice'] * (1 - alert['threshold'] / 100)
+    elif alert['type'] == 'velocity':
+        trigger_price = alert['windowHigh'] * (1 - alert['threshold'] / 100)
+    else:
+        trigger_price = alert['targetPrice']
+    if not trigger_price or trigger_price <= 0:
+        return float('-inf')
+    return (trigger_price - alert['currentPrice']) / trigger_price * 100
+
+def check_alerts(dry_run=False, context=None):
     """
     Check for alerts, sending only the single most important alert per coin.
     (Lowest price target or highest ATH drop).
 
     Args:
         dry_run: If True, alerts are found but not saved to tracking
+        context: AlertContext to reuse between checks (a fresh one if None)
     """
-    # Load configurations
-    coins_config = load_coins_config()
-    alert_config = load_alert_config()
+    if context is None:
+        context = AlertContext()
 
-    if not coins_config:
+    # Load configurations, alert tracking and 52w stats for the configured coins
+    if not context.load_config():
         return []
-
-    # Load alert tracking and 52w stats
-    sent_alerts = load_sent_alerts(alert_config)
-    stats_52w = load_52w_stats()
-
-    # Get coin IDs for API call
-    coin_ids = [coin['id'] for coin in coins_config['coins']]
+    context.load_state()
+    alert_config = context.alert_config
+    rules = context.rules
+    stats_52w = context.stats_52w
+    coin_ids = context.coin_ids
 
     # Get current prices
-    current_data = get_current_prices(coin_ids)
+    current_data = get_current_prices(coin_ids, use_cache=context.use_cache)
     if not current_data:
         return []
-
-    # Create lookup for coin configs
-    coin_lookup = {coin['id']: coin for coin in coins_config['coins']}
-
-    alerts = []
-    new_sent_alerts = sent_alerts['sent_alerts'].copy()
-
-    for crypto in current_data:
+    current_data = quote_market_data(rules.coins, current_data, dry_run=dry_run, use_cache=context.use_cache)
+
+    # Opt-in fallback: fetch ATH per coin (concurrently) where markets data lacks it
+    fallback_aths = {}
+    if alert_config.get('ath_fallback_fetch', False):
+        missing_ath_ids = [
+            crypto['id'] for crypto in current_data
+            if crypto.get('ath') is None and crypto['id'] in rules.coin_index
+            and rules.has_ath_rules[rules.coin_index[crypto['id']]]
+        ]
+        if missing_ath_ids:
+            fallback_aths = get_ath_prices(missing_ath_ids, currencies={
+                crypto['id']: crypto['quote_currency'] for crypto in current_data if 'quote_currency' in crypto
+            })
+
+    # One comparison per coin against its next trigger price; only coins at
+    # or below it have their thresholds evaluated
+    prices, aths, positions = alert_engine.snapshot_arrays(rules, current_data, fallback_aths)
+    context.rearm_recovered(prices, aths)
+    candidates = context.next_triggers().candidates(prices, aths)
+    evaluation = alert_engine.evaluate(rules, prices, aths, context.sent_mask, coins=candidates)
+    logger.info(f"Checked {int((positions >= 0).sum())} coins against their next trigger price, "
+                f"{len(candidates)} at or below it")
+
+    for idx in np.flatnonzero(rules.has_ath_rules & (positions >= 0) & np.isnan(aths)):
+        logger.warning(f"⚠️  No ATH data for {rules.coin_ids[idx]} in markets response, skipping ATH check")
+
+    # Keep the max_alerts_per_run most important alerts; the rest are deferred
+    max_alerts = alert_config.get('max_alerts_per_run')
+    priority = alert_config.get('alert_priority', DEFAULT_ALERT_PRIORITY)
+    if priority not in ALERT_PRIORITIES:
+        logger.warning(f"⚠️  Unknown alert_priority '{priority}', using '{DEFAULT_ALERT_PRIORITY}'")
+        priority = DEFAULT_ALERT_PRIORITY
+    selected = alert_engine.TopK(max_alerts if isinstance(max_alerts, int) and max_alerts >= 0 else None)
+
+    # Only coins with a triggered rule need per-coin work, in snapshot order
+    alerting = evaluation.alerting_coins()
+    alerting = alerting[np.argsort(positions[alerting], kind="stable")]
+
+    for idx in alerting:
+        crypto = current_data[positions[idx]]
         crypto_id = crypto['id']
         current_price = crypto['current_price']
-        coin_config = coin_lookup.get(crypto_id)
-
-        if not coin_config:
-            continue
+        currency = crypto.get('quote_currency', storage.DEFAULT_CURRENCY)
+        coin_config = rules.coins[idx]
 
         crypto_name = coin_config['name']
         crypto_symbol = coin_config['symbol']
-        
-        logger.info(f"{crypto_name} ({crypto_symbol}) - Current: ${current_price:.6f}")
 
-        # --- Logic to find the single best alert for the coin ---
+        logger.info(f"{crypto_name} ({crypto_symbol}) - Current: {format_price(current_price, currency, '.6f')}")
+
+        # --- Build the single best alert for the coin ---
         potential_alerts = []
-        triggered_ath_keys = []
-        triggered_price_keys = []
 
         # Get market data once
-        price_change_24h = crypto.get('price_change_percentage_24h')
-        price_change_7d = crypto.get('price_change_percentage_7d_in_currency')
-        market_cap_rank = crypto.get('market_cap_rank')
-        total_volume = crypto.get('total_volume')
-        market_cap = crypto.get('market_cap')
-        coin_52w_stats = stats_52w.get('coins', {}).get(crypto_id)
-        high_52w = coin_52w_stats.get('high_52w') if coin_52w_stats else None
-        low_52w = coin_52w_stats.get('low_52w') if coin_52w_stats else None
-        pct_from_52w_high = ((current_price - high_52w) / high_52w) * 100 if high_52w and high_52w > 0 else None
-        pct_from_52w_low = ((current_price - low_52w) / low_52w) * 100 if low_52w and low_52w > 0 else None
-
-        market_data = {
-            "priceChange24h": round(price_change_24h, 2) if price_change_24h is not None else None,
-            "priceChange7d": round(price_change_7d, 2) if price_change_7d is not None else None,
-            "marketCapRank": market_cap_rank,
-            "totalVolume": total_volume,
-            "marketCap": market_cap,
-            "high52w": high_52w,
-            "low52w": low_52w,
-            "pctFrom52wHigh": round(pct_from_52w_high, 2) if pct_from_52w_high is not None else None,
-            "pctFrom52wLow": round(pct_from_52w_low, 2) if pct_from_52w_low is not None else None
-        }
-
-        # Check ATH alerts
-        if coin_config['ath_thresholds']:
-            ath_data = get_ath_price(crypto_id)
-            if ath_data:
-                ath_price = ath_data['market_data']['ath']['usd']
-                drop_percent = ((ath_price - current_price) / ath_price) * 100
-                logger.info(f"  ATH: ${ath_price:.6f}, Drop: {drop_percent:.2f}%")
-
-                triggered_thresholds = [
-                    t for t in coin_config['ath_thresholds']
-                    if drop_percent >= t and f"{crypto_id}_ath_{t}" not in sent_alerts['sent_alerts']
-                ]
-
-                if triggered_thresholds:
-                    best_threshold = max(triggered_thresholds)
-                    effective_price = ath_price * (1 - best_threshold / 100)
-                    alert = {
-                        "type": "ath",
-                        "crypto": f"{crypto_name} ({crypto_symbol})",
-                        "currentPrice": current_price,
-                        "athPrice": ath_price,
-                        "dropPercent": round(drop_percent, 2),
-                        "threshold": best_threshold,
-                        "score": effective_price  # Score for comparison
-                    }
-                    alert.update(market_data)
-                    potential_alerts.append(alert)
-                    triggered_ath_keys = [f"{crypto_id}_ath_{t}" for t in triggered_thresholds]
-            time.sleep(3.0)
-
-        # Check price alerts
-        if coin_config['price_alerts']:
-            triggered_targets = [
-                p for p in coin_config['price_alerts']
-                if current_price <= p and f"{crypto_id}_price_{p}" not in sent_alerts['sent_alerts']
-            ]
-
-            if triggered_targets:
-                best_target = min(triggered_targets)
-                price_diff = current_price - best_target
-                price_diff_percent = (price_diff / best_target) * 100 if best_target > 0 else 0
-                alert = {
-                    "type": "price",
-                    "crypto": f"{crypto_name} ({crypto_symbol})",
-                    "currentPrice": current_price,
-                    "targetPrice": best_target,
-                    "priceDiff": price_diff,
-                    "priceDiffPercent": round(price_diff_percent, 2),
-                    "score": best_target  # Score for comparison
-                }
-                alert.update(market_data)
-                potential_alerts.append(alert)
-                triggered_price_keys = [f"{crypto_id}_price_{p}" for p in triggered_targets]
-        
-        # Select the best alert from potentials
-        if potential_alerts:
-            # Sort by score (lowest price target is best)
-            potential_alerts.sort(key=lambda x: x['score'])
-            best_alert = potential_alerts[0]
-            del best_alert['score']  # Clean up score before sending
-
-            alerts.append(best_alert)
-
-            # Mark all triggered alerts for this coin as sent
-            for key in triggered_ath_keys:
-                new_sent_alerts[key] = True
-            for key in triggered_price_keys:
-                new_sent_alerts[key] = True
+        market_data = build_market_data(crypto, stats_52w)
+
+        # ATH alert: highest triggered drop threshold
+        best_ath_rule = evaluation.best_ath[idx]
+        if best_ath_rule != alert_engine.NO_RULE:
+            ath_price = float(aths[idx])
+            drop_percent = float(evaluation.drops[idx])
+            logger.info(f"  ATH: {format_price(ath_price, currency, '.6f')}, Drop: {drop_percent:.2f}%")
+            best_threshold = rules.rule_raw[best_ath_rule]
+            effective_price = ath_price * (1 - best_threshold / 100)
+            alert = {
+                "type": "ath",
+                "crypto": f"{crypto_name} ({crypto_symbol})",
+                "currentPrice": current_price,
+                "athPrice": ath_price,
+                "dropPercent": round(drop_percent, 2),
+                "threshold": best_threshold,
+                "score": effective_price  # Score for comparison
+            }
+            alert.update(market_data)
+            potential_alerts.append(alert)
+
+        # Price alert: lowest triggered target
+        best_price_rule = evaluation.best_price[idx]
+        if best_price_rule != alert_engine.NO_RULE:
+            best_target = rules.rule_raw[best_price_rule]
+            price_diff = current_price - best_target
+            price_diff_percent = (price_diff / best_target) * 100 if best_target > 0 else 0
+            alert = {
+                "type": "price",
+                "crypto": f"{crypto_name} ({crypto_symbol})",
+                "currentPrice": current_price,
+                "targetPrice": best_target,
+                "priceDiff": price_diff,
+                "priceDiffPercent": round(price_diff_percent, 2),
+                "score": best_target  # Score for comparison
+            }
+            alert.update(market_data)
+            potential_alerts.append(alert)
+
+        # Select the best alert from potentials (lowest price target is best)
+        potential_alerts.sort(key=lambda x: x['score'])
+        best_alert = potential_alerts[0]
+        del best_alert['score']  # Clean up score before sending
+
+        selected.push(alert_priority(best_alert, priority, float(evaluation.drops[idx])), (idx, best_alert, None))
+
+    # Velocity alerts (daemon mode): compare with the recent window highs
+    if context.velocity is not None:
+        context.velocity.update(time.time(), prices)
+        for idx, alert, velocity_rules in velocity_alerts(context, prices, current_data, positions, stats_52w):
+            selected.push(alert_priority(alert, priority, float(evaluation.drops[idx])), (None, alert, velocity_rules))
+
+    # Level crosses between the previous check's prices and these
+    cross_coins = []
+    if context.last_prices is not None:
+        for idx, alert in cross_alerts(context, prices, current_data, positions, stats_52w):
+            cross_coins.append(idx)
+            selected.push(alert_priority(alert, priority, float(evaluation.drops[idx])), (idx, alert, None))
+
+    if selected.deferred:
+        logger.info(f"Deferred {selected.deferred} alert(s) beyond max_alerts_per_run={max_alerts} "
+                    f"(by {priority}); they stay unsent for the next run")
+    alerts = [alert for _, alert, _ in selected.items()]
+
+    # Mark the selected coins' triggered alerts as sent; deferred coins stay unmarked
+    triggered = [rule_idx for idx, alert, _ in selected.items() if alert['type'] in ('ath', 'price')
+                 for rule_idx in evaluation.triggered_rules(idx)]
+    fired_velocity = [rule_idx for _, _, velocity_rules in selected.items() if velocity_rules
+                      for rule_idx in velocity_rules]
 
     # Save updated alert tracking (skip in dry run)
-    if not dry_run and new_sent_alerts != sent_alerts['sent_alerts']:
-        sent_alerts['sent_alerts'] = new_sent_alerts
-        save_sent_alerts(sent_alerts, alert_config)
+    if not dry_run and triggered:
+        context.record_sent(triggered)
+    if not dry_run:
+        context.save_rearmed()
+    if not dry_run and fired_velocity:
+        context.velocity.mark_fired(fired_velocity)
+
+    # Deferred crossings keep their previous price so the next run sees them again
+    sent_crosses = {idx for idx, alert, _ in selected.items() if alert['type'] == 'cross'}
+    context.record_prices(prices, keep=[idx for idx in cross_coins if idx not in sent_crosses], persist=not dry_run)
 
     return alerts
 
+def format_alert_metrics(alert):
+    """
+    Market metrics and 52w range lines of an alert
+
+    Returns:
+        Tuple of (metrics text, range text); either may be empty
+    """
+    metrics = []
+    if alert.get('priceChange24h') is not None:
+        emoji = "📈" if alert['priceChange24h'] > 0 else "📉"
+        metrics.append(f"24h: {emoji} {alert['priceChange24h']:+.2f}%")
+    if alert.get('priceChange7d') is not None:
+        emoji = "📈" if alert['priceChange7d'] > 0 else "📉"
+        metrics.append(f"7d: {emoji} {alert['priceChange7d']:+.2f}%")
+    if alert.get('marketCapRank'):
+        metrics.append(f"Rank: #{alert['marketCapRank']}")
+
+    # 52w range info
+    range_info = []
+    if alert.get('pctFrom52wHigh') is not None:
+        range_info.append(f"From 52w high: {alert['pctFrom52wHigh']:+.1f}%")
+    if alert.get('pctFrom52wLow') is not None:
+        range_info.append(f"From 52w low: {alert['pctFrom52wLow']:+.1f}%")
+
+    return " • ".join(metrics), " • ".join(range_info)
+
 def send_discord_alert(alerts, dry_run=False):
     """
     Send alerts to Discord using webhook with sections for different alert types
@@ -437,38 +1247,37 @@ def send_discord_alert(alerts, dry_run=False):
     # Separate alerts by type
     ath_alerts = [alert for alert in alerts if alert['type'] == 'ath']
     price_alerts = [alert for alert in alerts if alert['type'] == 'price']
+    fast_alerts = [alert for alert in alerts if alert['type'] == 'velocity']
+    cross_alerts = [alert for alert in alerts if alert['type'] == 'cross']
 
     # Build description with sections
     description_parts = []
 
+    if fast_alerts:
+        description_parts.append("## ⚡ Velocity Alerts")
+        for alert in fast_alerts:
+            metrics_text, range_text = format_alert_metrics(alert)
+            currency = alert.get('quoteCurrency', storage.DEFAULT_CURRENCY)
+            description_parts.append(
+                f"**{alert['crypto']}** fell **{alert['dropPercent']}%** within {alert['windowMinutes']} min\n"
+                f"├ Current: {format_price(alert['currentPrice'], currency)}\n"
+                f"├ Window high: {format_price(alert['windowHigh'], currency)}\n"
+                f"├ Threshold: {alert['threshold']:g}%\n"
+                + (f"├ {metrics_text}\n" if metrics_text else "")
+                + (f"└ {range_text}\n" if range_text else "└\n")
+            )
+
     if ath_alerts:
+        if description_parts:
+            description_parts.append("")  # Empty line separator
         description_parts.append("## 🚨 ATH Drop Alerts")
         for alert in ath_alerts:
-            # Build market metrics section
-            metrics = []
-            if alert.get('priceChange24h') is not None:
-                emoji = "📈" if alert['priceChange24h'] > 0 else "📉"
-                metrics.append(f"24h: {emoji} {alert['priceChange24h']:+.2f}%")
-            if alert.get('priceChange7d') is not None:
-                emoji = "📈" if alert['priceChange7d'] > 0 else "📉"
-                metrics.append(f"7d: {emoji} {alert['priceChange7d']:+.2f}%")
-            if alert.get('marketCapRank'):
-                metrics.append(f"Rank: #{alert['marketCapRank']}")
-
-            # 52w range info
-            range_info = []
-            if alert.get('pctFrom52wHigh') is not None:
-                range_info.append(f"From 52w high: {alert['pctFrom52wHigh']:+.1f}%")
-            if alert.get('pctFrom52wLow') is not None:
-                range_info.append(f"From 52w low: {alert['pctFrom52wLow']:+.1f}%")
-
-            metrics_text = " • ".join(metrics) if metrics else ""
-            range_text = " • ".join(range_info) if range_info else ""
-
+            metrics_text, range_text = format_alert_metrics(alert)
+            currency = alert.get('quoteCurrency', storage.DEFAULT_CURRENCY)
             description_parts.append(
                 f"**{alert['crypto']}** dropped **{alert['dropPercent']}%** from ATH\n"
-                f"├ Current: ${alert['currentPrice']:,.6f}\n"
-                f"├ ATH: ${alert['athPrice']:,.6f}\n"
+                f"├ Current: {format_price(alert['currentPrice'], currency)}\n"
+                f"├ ATH: {format_price(alert['athPrice'], currency)}\n"
                 f"├ Threshold: {alert['threshold']}%\n"
                 + (f"├ {metrics_text}\n" if metrics_text else "")
                 + (f"└ {range_text}\n" if range_text else "└\n")
@@ -479,40 +1288,39 @@ def send_discord_alert(alerts, dry_run=False):
             description_parts.append("")  # Empty line separator
         description_parts.append("## 💰 Price Alerts")
         for alert in price_alerts:
-            # Build market metrics section
-            metrics = []
-            if alert.get('priceChange24h') is not None:
-                emoji = "📈" if alert['priceChange24h'] > 0 else "📉"
-                metrics.append(f"24h: {emoji} {alert['priceChange24h']:+.2f}%")
-            if alert.get('priceChange7d') is not None:
-                emoji = "📈" if alert['priceChange7d'] > 0 else "📉"
-                metrics.append(f"7d: {emoji} {alert['priceChange7d']:+.2f}%")
-            if alert.get('marketCapRank'):
-                metrics.append(f"Rank: #{alert['marketCapRank']}")
-
-            # 52w range info
-            range_info = []
-            if alert.get('pctFrom52wHigh') is not None:
-                range_info.append(f"From 52w high: {alert['pctFrom52wHigh']:+.1f}%")
-            if alert.get('pctFrom52wLow') is not None:
-                range_info.append(f"From 52w low: {alert['pctFrom52wLow']:+.1f}%")
-
-            metrics_text = " • ".join(metrics) if metrics else ""
-            range_text = " • ".join(range_info) if range_info else ""
-
+            metrics_text, range_text = format_alert_metrics(alert)
+            currency = alert.get('quoteCurrency', storage.DEFAULT_CURRENCY)
             description_parts.append(
                 f"**{alert['crypto']}** fell below target price\n"
-                f"├ Current: ${alert['currentPrice']:,.6f}\n"
-                f"├ Target: ${alert['targetPrice']:,.6f}\n"
-                f"├ Difference: ${alert['priceDiff']:,.6f} ({alert['priceDiffPercent']:+.2f}%)\n"
+                f"├ Current: {format_price(alert['currentPrice'], currency)}\n"
+                f"├ Target: {format_price(alert['targetPrice'], currency)}\n"
+                f"├ Difference: {format_price(alert['priceDiff'], currency)} ({alert['priceDiffPercent']:+.2f}%)\n"
+                + (f"├ {metrics_text}\n" if metrics_text else "")
+                + (f"└ {range_text}\n" if range_text else "└\n")
+            )
+
+    if cross_alerts:
+        if description_parts:
+            description_parts.append("")  # Empty line separator
+        description_parts.append("## 📈 Level Crosses")
+        for alert in cross_alerts:
+            metrics_text, range_text = format_alert_metrics(alert)
+            currency = alert.get('quoteCurrency', storage.DEFAULT_CURRENCY)
+            levels_text = ", ".join(format_price(level, currency, ",") for level in alert['levelsCrossed'])
+            description_parts.append(
+                f"**{alert['crypto']}** crossed {'above' if alert['direction'] == 'up' else 'below'} "
+                f"{format_price(alert['level'], currency, ',')}\n"
+                f"├ Current: {format_price(alert['currentPrice'], currency)}\n"
+                f"├ Previous check: {format_price(alert['previousPrice'], currency)}\n"
+                f"├ Levels crossed: {levels_text}\n"
                 + (f"├ {metrics_text}\n" if metrics_text else "")
                 + (f"└ {range_text}\n" if range_text else "└\n")
             )
 
     # Choose color based on alert types
-    color = 16711680  # Red for ATH alerts
-    if price_alerts and not ath_alerts:
-        color = 16753920  # Orange for price alerts
+    color = 16711680  # Red for ATH and velocity alerts
+    if not ath_alerts and not fast_alerts:
+        color = 16753920  # Orange for price and cross alerts
 
     embed = {
         "title": f"📢 Crypto Alerts ({len(alerts)} total)",
@@ -532,9 +1340,11 @@ def send_discord_alert(alerts, dry_run=False):
     }
 
     try:
-        response = requests.post(DISCORD_WEBHOOK_URL, json=payload, headers=headers, timeout=10)
+        response = http_client.post(DISCORD_WEBHOOK_URL, json=payload, headers=headers, timeout=(5, 10))
         response.raise_for_status()
-        logger.info(f"✅ Successfully sent {len(alerts)} alerts to Discord ({len(ath_alerts)} ATH, {len(price_alerts)} price)")
+        logger.info(f"✅ Successfully sent {len(alerts)} alerts to Discord ({len(ath_alerts)} ATH, {len(price_alerts)} price"
+                    + (f", {len(fast_alerts)} velocity" if fast_alerts else "")
+                    + (f", {len(cross_alerts)} cross)" if cross_alerts else ")"))
     except requests.exceptions.Timeout:
         logger.error(f"❌ Timeout sending alerts to Discord webhook")
         logger.error(f"💡 Discord may be slow to respond, alerts not delivered")
@@ -554,15 +1364,116 @@ def send_discord_alert(alerts, dry_run=False):
         logger.error(f"❌ Error sending alerts to Discord: {str(e)}")
 
 
+def run_check(dry_run=False, context=None):
+    """
+    Run one alert check and send what it finds
+
+    Returns:
+        List of alerts found
+    """
+    alerts = check_alerts(dry_run=dry_run, context=context)
+
+    if alerts:
+        ath_count = len([a for a in alerts if a['type'] == 'ath'])
+        price_count = len([a for a in alerts if a['type'] == 'price'])
+        velocity_count = len([a for a in alerts if a['type'] == 'velocity'])
+        cross_count = len([a for a in alerts if a['type'] == 'cross'])
+        counts = (f"{ath_count} ATH, {price_count} price"
+                  + (f", {velocity_count} velocity" if velocity_count else "")
+                  + (f", {cross_count} cross" if cross_count else ""))
+        logger.info(f"Found {len(alerts)} alerts ({counts}){' [DRY RUN]' if dry_run else '. Sending to Discord...'}")
+        send_discord_alert(alerts, dry_run=dry_run)
+    else:
+        logger.info(f"No alerts triggered at this time{' [DRY RUN]' if dry_run else '.'}")
+    return alerts
+
+def next_tick_delay(started_at, interval, now):
+    """
+    Seconds until the next tick of a fixed schedule
+
+    Ticks fall at started_at + k * interval, so the time a check takes
+    does not shift later ticks; ticks missed by a long check are skipped.
+    """
+    elapsed_ticks = int((now - started_at) // interval) + 1
+    return started_at + elapsed_ticks * interval - now
+
+def check_interval_seconds(alert_config):
+    """Seconds between daemon ticks from check_interval_minutes"""
+    interval_minutes = alert_config.get('check_interval_minutes', DEFAULT_CHECK_INTERVAL_MINUTES)
+    if not isinstance(interval_minutes, (int, float)) or interval_minutes <= 0:
+        logger.warning(f"⚠️  Invalid check_interval_minutes {interval_minutes!r}, using {DEFAULT_CHECK_INTERVAL_MINUTES}")
+        interval_minutes = DEFAULT_CHECK_INTERVAL_MINUTES
+    return interval_minutes * 60
+
+def run_daemon(dry_run=False, stop_event=None, max_ticks=None):
+    """
+    Check for alerts every check_interval_minutes until stopped
+
+    Config, compiled rules, sent-alert state, 52w stats and HTTP
+    connections are kept in memory between ticks. Edits to the config
+    files are picked up before the next tick.
+
+    Args:
+        dry_run: If True, alerts are found but not sent or saved
+        stop_event: threading.Event that ends the loop when set
+        max_ticks: Stop after this many checks (None = run forever)
+    """
+    stop_event = stop_event or threading.Event()
+    context = AlertContext()
+    context.use_cache = False
+    if not context.load_config():
+        logger.error("❌ Cannot start daemon without a coins configuration")
+        return
+
+    watcher = config_watch.FileWatcher([COINS_CONFIG_FILE, ALERT_CONFIG_FILE])
+    interval = check_interval_seconds(context.alert_config)
+    context.start_velocity(interval)
+    logger.info(f"Daemon started: checking {len(context.coin_ids)} coins every {interval / 60:g} minute(s), "
+                f"watching config files ({watcher.mode})")
+
+    started_at = time.monotonic()
+    ticks = 0
+    while not stop_event.is_set():
+        tick_start = time.monotonic()
+
+        # Config edits are applied between checks, never during one
+        if watcher.changed():
+            if context.reload_config():
+                new_interval = check_interval_seconds(context.alert_config)
+                if new_interval != interval:
+                    interval, started_at = new_interval, tick_start
+                    context.velocity_interval = interval
+                    context.velocity = context._build_velocity(context.velocity)
+                    logger.info(f"Check interval changed to {interval / 60:g} minute(s)")
+            else:
+                watcher.forget(COINS_CONFIG_FILE)
+
+        try:
+            run_check(dry_run=dry_run, context=context)
+        except Exception as e:
+            logger.error(f"❌ Alert check failed, will retry on the next tick")
+            logger.error(f"💡 Error details: {str(e)}")
+        logger.info(f"Check took {(time.monotonic() - tick_start) * 1000:.0f} ms")
+
+        ticks += 1
+        if max_ticks is not None and ticks >= max_ticks:
+            break
+        stop_event.wait(next_tick_delay(started_at, interval, time.monotonic()))
+
+    watcher.close()
+    http_client.close_session()
+    logger.info("Daemon stopped")
+
 def main():
     """
-    Main function to run the alert check once
+    Main function to run the alert check once (or repeatedly with --daemon)
     """
     import sys
 
     # Check for command flags
     dry_run = '--dry-run' in sys.argv
     validate_only = '--validate' in sys.argv
+    daemon = '--daemon' in sys.argv
 
     # Handle --validate flag
     if validate_only:
@@ -619,17 +1530,19 @@ def main():
         logger.error("💡 Get webhook URL from Discord: Server Settings → Integrations → Webhooks")
         return
 
+    if daemon:
+        import signal
+        stop_event = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+        try:
+            run_daemon(dry_run=dry_run, stop_event=stop_event)
+        except KeyboardInterrupt:
+            logger.info("\n⚠️  Daemon interrupted by user")
+        return
+
     try:
         # Check for alerts (both ATH and price)
-        alerts = check_alerts(dry_run=dry_run)
-
-        if alerts:
-            ath_count = len([a for a in alerts if a['type'] == 'ath'])
-            price_count = len([a for a in alerts if a['type'] == 'price'])
-            logger.info(f"Found {len(alerts)} alerts ({ath_count} ATH, {price_count} price){' [DRY RUN]' if dry_run else '. Sending to Discord...'}")
-            send_discord_alert(alerts, dry_run=dry_run)
-        else:
-            logger.info(f"No alerts triggered at this time{' [DRY RUN]' if dry_run else '.'}")
+        run_check(dry_run=dry_run)
 
     except KeyboardInterrupt:
         logger.info("\n⚠️  Alert check interrupted by user")
@@ -0,0 +1,243 @@
+"""
+Array-backed per-coin price history on disk
+
+Each series of a coin is stored as two append-only column files of
+packed little-endian values:
+
+    <root>/<series>/<coin_id>.ts   int64 timestamps (ms since epoch)
+    <root>/<series>/<coin_id>.px   float64 prices
+
+That is 16 bytes per point instead of ~100 for a [timestamp, price] list
+in Python. Readers map the files with mmap and get memoryviews over the
+shared pages, so nothing is copied or decoded; numpy users can wrap the
+same buffers with numpy.frombuffer or open the files with numpy.memmap
+(dtype '<i8' / '<f8').
+
+Writes are sized by the change: new days are appended, a refreshed day
+is overwritten in place, and the files are only rewritten to trim days
+once more than COMPACT_SLACK_DAYS have fallen out of the window.
+"""
+
+import array
+import bisect
+import mmap
+import os
+import re
+import sys
+
+DEFAULT_ROOT = "price_history"
+DAILY = "daily"
+DAY_MS = 86400 * 1000
+POINT_BYTES = 8
+COMPACT_SLACK_DAYS = 30  # trim the files once this many days are past the window
+
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def _pack(typecode, values):
+    """Encode values as little-endian 8-byte items"""
+    packed = array.array(typecode, values)
+    if not _LITTLE_ENDIAN:
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _write_at(path, data, flags, offset=None):
+    """Write bytes to path with os-level I/O (append or positional)"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | flags, 0o644)
+    try:
+        if offset is None:
+            os.write(fd, data)
+        else:
+            os.pwrite(fd, data, offset)
+    finally:
+        os.close(fd)
+
+
+class Series:
+    """
+    Read-only view of one stored series
+
+    timestamps and prices are sequences (memoryviews over the mapped file
+    on little-endian hosts) that support len(), indexing and bisect.
+    Use as a context manager, or call close(), to release the mapping.
+    """
+
+    def __init__(self, ts_path, px_path):
+        self._maps = []
+        self._views = []
+        ts_buffer = self._map(ts_path)
+        px_buffer = self._map(px_path)
+        # A writer may have appended to one column before the other
+        count = min(len(ts_buffer), len(px_buffer)) // POINT_BYTES
+        self.timestamps = self._column(ts_buffer, "q", count)
+        self.prices = self._column(px_buffer, "d", count)
+
+    def _map(self, path):
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            return b""
+        try:
+            if os.fstat(fd).st_size == 0:
+                return b""
+            mapped = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        self._maps.append(mapped)
+        return mapped
+
+    def _column(self, buffer, typecode, count):
+        if not _LITTLE_ENDIAN:
+            column = array.array(typecode, bytes(buffer[:count * POINT_BYTES]))
+            column.byteswap()
+            return column
+        view = memoryview(buffer)[:count * POINT_BYTES].cast(typecode)
+        self._views.append(view)
+        return view
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __iter__(self):
+        """Yield (timestamp_ms, price) tuples"""
+        return zip(self.timestamps, self.prices)
+
+    def since(self, timestamp_ms):
+        """Index of the first point at or after timestamp_ms"""
+        return bisect.bisect_left(self.timestamps, timestamp_ms)
+
+    def points(self, start=0):
+        """Yield (timestamp_ms, price) tuples from index `start`"""
+        for index in range(start, len(self.timestamps)):
+            yield self.timestamps[index], self.prices[index]
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        for mapped in self._maps:
+            mapped.close()
+        self._maps = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class HistoryStore:
+    """Directory of per-coin column files, one subdirectory per series"""
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+
+    def _paths(self, coin_id, series):
+        if not _SAFE_NAME.match(coin_id) or not _SAFE_NAME.match(series):
+            raise ValueError(f"Invalid history name: {series}/{coin_id}")
+        base = os.path.join(self.root, series, coin_id)
+        return f"{base}.ts", f"{base}.px"
+
+    def read(self, coin_id, series=DAILY):
+        """Open a series for reading (empty if it does not exist)"""
+        return Series(*self._paths(coin_id, series))
+
+    def exists(self, coin_id, series=DAILY):
+        ts_path, _ = self._paths(coin_id, series)
+        return os.path.exists(ts_path) and os.path.getsize(ts_path) > 0
+
+    def write(self, coin_id, points, series=DAILY):
+        """Replace a series with time-ordered (timestamp_ms, price) points"""
+        ts_path, px_path = self._paths(coin_id, series)
+        os.makedirs(os.path.dirname(ts_path), exist_ok=True)
+        points = list(points)
+        for path, typecode, values in ((px_path, "d", [p[1] for p in points]),
+                                       (ts_path, "q", [p[0] for p in points])):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            _write_at(tmp_path, _pack(typecode, values), os.O_TRUNC)
+            os.replace(tmp_path, path)
+
+    def append(self, coin_id, points, series=DAILY):
+        """Append points newer than the stored ones"""
+        points = list(points)
+        if not points:
+            return
+        ts_path, px_path = self._paths(coin_id, series)
+        os.makedirs(os.path.dirname(ts_path), exist_ok=True)
+        # Prices first: readers only see points whose timestamp is written
+        _write_at(px_path, _pack("d", [p[1] for p in points]), os.O_APPEND)
+        _write_at(ts_path, _pack("q", [p[0] for p in points]), os.O_APPEND)
+
+    def _overwrite(self, coin_id, index, point, series):
+        ts_path, px_path = self._paths(coin_id, series)
+        for path, typecode, value in ((px_path, "d", point[1]), (ts_path, "q", point[0])):
+            _write_at(path, _pack(typecode, [value]), 0, offset=index * POINT_BYTES)
+
+    def merge_daily(self, coin_id, points, window_days, series=DAILY):
+        """
+        Merge fetched points into a daily series
+
+        Points are keyed by UTC day: days after the newest stored one are
+        appended, a stored day is overwritten in place. Days older than
+        window_days before the newest day are trimmed, in one rewrite
+        once COMPACT_SLACK_DAYS of them have accumulated.
+
+        Returns:
+            Number of points stored afterwards
+        """
+        points = sorted((int(ts), float(price)) for ts, price in points)
+        new_points = []
+        with self.read(coin_id, series) as stored:
+            count = len(stored)
+            last_day = stored.timestamps[-1] // DAY_MS if count else None
+            for ts, price in points:
+                day = ts // DAY_MS
+                if last_day is not None and day <= last_day:
+                    index = stored.since(day * DAY_MS)
+                    if index < count and stored.timestamps[index] // DAY_MS == day:
+                        self._overwrite(coin_id, index, (ts, price), series)
+                    # days missing from the middle of the stored series are ignored
+                elif new_points and day == new_points[-1][0] // DAY_MS:
+                    new_points[-1] = (ts, price)
+                else:
+                    new_points.append((ts, price))
+
+            newest_day = new_points[-1][0] // DAY_MS if new_points else last_day
+            if newest_day is None:
+                return 0
+
+        self.append(coin_id, new_points, series)
+        with self.read(coin_id, series) as stored:
+            total = len(stored)
+            expired = stored.since((newest_day - window_days) * DAY_MS)
+            kept = list(stored.points(expired)) if expired > COMPACT_SLACK_DAYS else None
+        if kept is not None:
+            self.write(coin_id, kept, series)
+            total = len(kept)
+        return total
+
+    def window(self, coin_id, window_days, series=DAILY):
+        """
+        Yield the (timestamp_ms, price) points of the trailing window
+
+        Points more than window_days before the newest one are skipped.
+        """
+        with self.read(coin_id, series) as stored:
+            if not len(stored):
+                return
+            cutoff = (stored.timestamps[-1] // DAY_MS - window_days) * DAY_MS
+            yield from stored.points(stored.since(cutoff))
+
+    def delete(self, coin_id, series=DAILY):
+        for path in self._paths(coin_id, series):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def get_store():
+    """Return the history store configured from the environment"""
+    return HistoryStore(os.getenv("COINWATCH_HISTORY_DIR", DEFAULT_ROOT))
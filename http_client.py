@@ -0,0 +1,203 @@
+"""
+Shared HTTP client for CoinWatch
+
+All CoinGecko and Discord requests go through one keep-alive
+requests.Session so connections (and TLS sessions) are reused between
+calls instead of being re-established for every request.
+"""
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import circuit_breaker
+import rate_limiter
+import response_cache
+import retry_policy
+
+# CoinGecko API base URL (override with COINGECKO_API_URL, e.g. to point at mock_server.py)
+DEFAULT_COINGECKO_API_BASE = "https://api.coingecko.com/api/v3"
+
+# Connection pool size per host (override with COINWATCH_HTTP_POOL_SIZE)
+DEFAULT_POOL_SIZE = 10
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (5, 30)
+
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": "CoinWatch/1.0",
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def coingecko_url(path):
+    """Build a CoinGecko API URL for `path` (e.g. '/coins/markets')"""
+    base = os.getenv("COINGECKO_API_URL", DEFAULT_COINGECKO_API_BASE).rstrip("/")
+    return f"{base}/{path.lstrip('/')}"
+
+
+def get_pool_size():
+    """Return the configured connection pool size"""
+    try:
+        return max(1, int(os.getenv("COINWATCH_HTTP_POOL_SIZE", DEFAULT_POOL_SIZE)))
+    except ValueError:
+        return DEFAULT_POOL_SIZE
+
+
+def create_session(pool_size=None):
+    """
+    Create a requests.Session with a keep-alive connection pool
+
+    Args:
+        pool_size: Max connections kept per host (defaults to get_pool_size())
+    """
+    pool_size = pool_size or get_pool_size()
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+def get_session():
+    """Return the process-wide shared session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def close_session():
+    """Close the shared session and release pooled connections"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get(url, params=None, timeout=DEFAULT_TIMEOUT, rate_limited=True, use_cache=True, **kwargs):
+    """
+    GET through the shared session with default split timeouts
+
+    Fresh cached responses are returned without touching the network or the
+    rate budget. Stale entries are revalidated with ETag/Last-Modified when
+    available, and a 304 answer is served from the cache. Cached responses
+    support iter_content() as well as json(), so streaming callers work
+    unchanged on a hit.
+
+    CoinGecko requests (rate_limited=True) fail fast with
+    circuit_breaker.CircuitOpenError while the shared circuit is open;
+    5xx responses, timeouts and connection errors count towards opening it;
+    429 responses neither open nor close it.
+
+    When rate_limited is set, the request waits for budget from the shared
+    token bucket first and the outcome is fed to retry_policy: a 429 drains
+    the bucket for the server's Retry-After (so every process backs off
+    together) and lowers the shared rate, successes raise it again.
+    """
+    ttl = response_cache.ttl_for(url) if use_cache and response_cache.is_enabled() else None
+    cache = key = entry = None
+    if ttl:
+        cache = response_cache.get_cache()
+        key = response_cache.cache_key(url, params)
+        entry = cache.lookup(key)
+        if entry and cache.is_fresh(entry):
+            cached = _cached_response(cache, key, url, entry, kwargs.get("stream"))
+            if cached is not None:
+                return cached
+        if entry:
+            conditional = {}
+            if entry.get("etag"):
+                conditional["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                conditional["If-Modified-Since"] = entry["last_modified"]
+            if conditional:
+                kwargs["headers"] = {**conditional, **kwargs.get("headers", {})}
+
+    if rate_limited:
+        breaker = circuit_breaker.get_breaker()
+        breaker.before_request()
+        rate_limiter.acquire()
+        try:
+            response = get_session().get(url, params=params, timeout=timeout, **kwargs)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+            breaker.record_failure()
+            raise
+        if response.status_code >= 500:
+            breaker.record_failure()
+        elif response.status_code != 429:
+            # A throttled request says nothing about upstream health; leave
+            # the breaker (and a half-open probe) as is and let retry_policy back off
+            breaker.record_success()
+        retry_policy.record_response(response)
+    else:
+        response = get_session().get(url, params=params, timeout=timeout, **kwargs)
+
+    if ttl and response.status_code == 304 and entry:
+        cached = _cached_response(cache, key, url, cache.refresh(key, ttl) or entry, kwargs.get("stream"))
+        if cached is not None:
+            return cached
+    elif ttl and response.status_code == 200:
+        headers = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_type": response.headers.get("Content-Type")
+        }
+        if kwargs.get("stream"):
+            # Tee chunks into the cache file as the caller reads them
+            # (iter_content, and content/json() which read through it).
+            # Callers that stop early (e.g. after the "prices" array) have
+            # the rest drained into the file on close(), which completes the
+            # entry and leaves the connection reusable.
+            iter_content = response.iter_content
+            close = response.close
+            teeing = []
+
+            def caching_iter_content(chunk_size=1, decode_unicode=False):
+                chunks = iter_content(chunk_size=chunk_size, decode_unicode=decode_unicode)
+                if decode_unicode:
+                    return chunks
+                teeing.append(cache.store_stream(key, url, chunks, ttl, **headers))
+                return teeing[-1]
+
+            def draining_close():
+                try:
+                    for chunks in teeing:
+                        for _ in chunks:
+                            pass
+                except (requests.exceptions.RequestException, OSError):
+                    pass  # the partial entry is discarded
+                finally:
+                    teeing.clear()
+                    close()
+
+            response.iter_content = caching_iter_content
+            response.close = draining_close
+        else:
+            cache.store(key, url, response.content, ttl, **headers)
+
+    return response
+
+
+def _cached_response(cache, key, url, entry, stream):
+    """Response replaying a cache entry (from its body file when streaming), or None if it is gone"""
+    if stream:
+        raw = cache.open_body(key)
+        return response_cache.build_response(url, None, entry, raw=raw) if raw is not None else None
+    body = cache.read_body(key)
+    return response_cache.build_response(url, body, entry) if body is not None else None
+
+
+def post(url, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """POST through the shared session with default split timeouts"""
+    return get_session().post(url, timeout=timeout, **kwargs)
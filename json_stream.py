@@ -0,0 +1,77 @@
+"""
+Incremental parsing of numeric pair arrays in JSON responses
+
+CoinGecko's /coins/{id}/market_chart answers with three parallel arrays
+(prices, market_caps, total_volumes) of [timestamp, value] pairs. Loading
+the whole document with response.json() builds thousands of Python lists
+per coin just to read one of them. iter_pairs() instead scans the raw
+byte chunks, yields the pairs of one array as they arrive and stops as
+soon as that array is closed, so only a few kilobytes are held at once.
+"""
+
+import codecs
+import re
+
+NUMBER = r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?"
+PAIR_RE = re.compile(r"\s*\[\s*(%s)\s*,\s*(%s|null)\s*\]\s*([,\]])" % (NUMBER, NUMBER))
+END_RE = re.compile(r"\s*\]")
+MAX_PENDING = 4096  # chars; a single pair never gets close to this
+
+
+def _key_pattern(key):
+    return re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+
+
+def iter_pairs(chunks, key):
+    """
+    Yield (first, second) floats from the array stored under `key`
+
+    The first occurrence of `key` is used, which is the top-level one for
+    market_chart responses. Pairs whose second value is null are skipped.
+    A document without `key` yields nothing.
+
+    Args:
+        chunks: Iterable of bytes (e.g. response.iter_content())
+        key: Name of the array of [number, number] pairs
+
+    Raises:
+        ValueError: if the array is malformed or the stream ends inside it
+    """
+    key_re = _key_pattern(key)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    in_array = False
+
+    for chunk in chunks:
+        buf = buf[pos:] + decoder.decode(chunk)
+        pos = 0
+
+        if not in_array:
+            match = key_re.search(buf)
+            if not match:
+                # Keep a tail in case the key is split across chunks
+                buf = buf[-(len(key) + 64):]
+                continue
+            in_array = True
+            pos = match.end()
+            if END_RE.match(buf, pos):
+                return
+
+        while True:
+            match = PAIR_RE.match(buf, pos)
+            if not match:
+                if len(buf) - pos > MAX_PENDING:
+                    raise ValueError(f"Malformed '{key}' array in JSON stream")
+                break
+            pos = match.end()
+            if match.group(2) != "null":
+                yield float(match.group(1)), float(match.group(2))
+            if match.group(3) == "]":
+                return
+
+        if in_array and END_RE.match(buf, pos):
+            return
+
+    if in_array:
+        raise ValueError(f"JSON stream ended inside '{key}' array")
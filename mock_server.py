@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Local CoinGecko / Discord stand-in for benchmarks and load tests
+
+Serves synthetic, deterministic data for any number of coins so
+check_alerts, update_all_52w_stats and send_discord_alert can be run
+without network access:
+
+  GET  /coins/markets
+  GET  /coins/{id}
+  GET  /coins/{id}/market_chart
+  GET  /simple/price
+  GET  /search
+  POST /api/webhooks/{id}/{token}   (Discord webhook, answers 204)
+  GET  /__stats                      (request counters)
+
+Paths may be prefixed with /api/v3 like the real API. Non-USD prices
+are the USD ones at the fixed rates in FX_RATES. Latency, 429 rate
+and 5xx rate are configurable; 429 responses carry a Retry-After header.
+
+Usage:
+  python mock_server.py --coins 1000 --latency-ms 80 --rate-429 0.02
+  COINGECKO_API_URL=http://127.0.0.1:8765/api/v3 \\
+  DISCORD_WEBHOOK_URL=http://127.0.0.1:8765/api/webhooks/1/test \\
+  python crypto_alert.py
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DAY_MS = 86400 * 1000
+SERIES_ANCHOR_MS = 1704067200000  # 2024-01-01 UTC
+DEFAULT_PORT = 8765
+FX_RATES = {"usd": 1.0, "eur": 0.92, "gbp": 0.79, "jpy": 150.0, "btc": 0.000016}
+
+
+class MockConfig:
+    """Behaviour knobs for the mock server"""
+
+    def __init__(self, coins=100, latency_ms=0.0, latency_jitter_ms=0.0, latency_dist="uniform",
+                 rate_429=0.0, rate_5xx=0.0, retry_after=1, seed=42):
+        self.coins = coins
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.latency_dist = latency_dist
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.retry_after = retry_after
+        self.seed = seed
+
+
+def coin_universe(count):
+    """Synthetic coin IDs served when no ids are requested"""
+    return [f"coin-{idx:05d}" for idx in range(1, count + 1)]
+
+
+def _coin_rng(coin_id, seed, salt=""):
+    return random.Random(zlib.crc32(f"{seed}:{coin_id}:{salt}".encode()))
+
+
+@lru_cache(maxsize=8192)
+def _full_series(coin_id, seed, today_ms):
+    """Daily random walk from SERIES_ANCHOR_MS up to today (cached per day)"""
+    rng = _coin_rng(coin_id, seed)
+    price = 10 ** rng.uniform(-2, 4.5)
+    series = []
+    ts = SERIES_ANCHOR_MS
+    while ts <= today_ms:
+        price = max(price * (1 + (rng.random() - 0.5) * 0.1), 1e-8)
+        series.append((ts, round(price, 8)))
+        ts += DAY_MS
+    return tuple(series)
+
+
+def price_series(coin_id, days, seed, now_ms=None):
+    """
+    Deterministic daily [timestamp_ms, price] random walk ending today
+
+    The walk is anchored at a fixed date, so the same coin always has the
+    same history and incremental fetches line up with full ones.
+    """
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    today_ms = now_ms - now_ms % DAY_MS
+    series = _full_series(coin_id, seed, today_ms)
+    return [list(point) for point in series[-(days + 1):]]
+
+
+def coin_snapshot(coin_id, seed):
+    """Market entry for one coin, consistent with its price series"""
+    now_ms = int(time.time() * 1000)
+    return dict(_cached_snapshot(coin_id, seed, now_ms - now_ms % DAY_MS))
+
+
+@lru_cache(maxsize=8192)
+def _cached_snapshot(coin_id, seed, today_ms):
+    series = price_series(coin_id, 365, seed, now_ms=today_ms)
+    rng = _coin_rng(coin_id, seed, "meta")
+    current = series[-1][1]
+    high = max(point[1] for point in series)
+    low = min(point[1] for point in series)
+    ath = high * rng.uniform(1.0, 3.0)
+    atl = low * rng.uniform(0.1, 1.0)
+    return {
+        "id": coin_id,
+        "symbol": coin_id.replace("-", "")[:5],
+        "name": coin_id.replace("-", " ").title(),
+        "current_price": current,
+        "market_cap": round(current * rng.uniform(1e6, 1e9)),
+        "market_cap_rank": zlib.crc32(coin_id.encode()) % 5000 + 1,
+        "total_volume": round(current * rng.uniform(1e4, 1e7)),
+        "price_change_percentage_24h": round((current / series[-2][1] - 1) * 100, 4),
+        "price_change_percentage_7d_in_currency": round((current / series[-8][1] - 1) * 100, 4),
+        "ath": ath,
+        "ath_change_percentage": round((current / ath - 1) * 100, 4),
+        "ath_date": "2021-11-10T14:24:11.849Z",
+        "atl": atl,
+        "atl_change_percentage": round((current / atl - 1) * 100, 4),
+        "atl_date": "2015-10-20T00:00:00.000Z",
+    }
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Request handler; server-wide config and counters live on self.server"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output clean
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _simulate(self):
+        """Apply latency and injected failures; True if a failure was sent"""
+        config = self.server.config
+        delay = config.latency_ms
+        if config.latency_jitter_ms:
+            if config.latency_dist == "lognormal":
+                delay += random.lognormvariate(0, 1) * config.latency_jitter_ms
+            else:
+                delay += random.uniform(0, config.latency_jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+        roll = random.random()
+        if roll < config.rate_429:
+            self.server.count("429")
+            self._send_json(429, {"status": {"error_code": 429, "error_message": "rate limited"}},
+                            {"Retry-After": str(config.retry_after)})
+            return True
+        if roll < config.rate_429 + config.rate_5xx:
+            self.server.count("5xx")
+            self._send_json(503, {"error": "service unavailable"})
+            return True
+        return False
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        path = re.sub(r"^/api/v3", "", parsed.path).rstrip("/")
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        self.server.count("requests")
+
+        if path == "/__stats":
+            return self._send_json(200, self.server.stats())
+
+        if self._simulate():
+            return
+
+        seed = self.server.config.seed
+        if path == "/coins/markets":
+            self.server.count("markets")
+            ids = [i for i in query.get("ids", "").split(",") if i] or coin_universe(self.server.config.coins)
+            per_page = int(query.get("per_page", 100))
+            page = int(query.get("page", 1))
+            selected = ids[(page - 1) * per_page:page * per_page]
+            return self._send_json(200, [coin_snapshot(coin_id, seed) for coin_id in selected])
+
+        match = re.match(r"^/coins/([^/]+)/market_chart$", path)
+        if match:
+            self.server.count("market_chart")
+            days = int(float(query.get("days", 365))) if query.get("days") != "max" else 730
+            rate = FX_RATES.get(query.get("vs_currency", "usd"), 1.0)
+            prices = [[ts, price * rate] for ts, price in price_series(match.group(1), days, seed)]
+            return self._send_json(200, {
+                "prices": prices,
+                "market_caps": [[ts, price * 1e6] for ts, price in prices],
+                "total_volumes": [[ts, price * 1e4] for ts, price in prices],
+            })
+
+        match = re.match(r"^/coins/([^/]+)$", path)
+        if match:
+            self.server.count("coin")
+            snapshot = coin_snapshot(match.group(1), seed)
+            return self._send_json(200, {
+                "id": snapshot["id"],
+                "symbol": snapshot["symbol"],
+                "name": snapshot["name"],
+                "market_data": {
+                    "current_price": {cur: snapshot["current_price"] * rate for cur, rate in FX_RATES.items()},
+                    "ath": {cur: snapshot["ath"] * rate for cur, rate in FX_RATES.items()},
+                    "atl": {cur: snapshot["atl"] * rate for cur, rate in FX_RATES.items()},
+                },
+            })
+
+        if path == "/simple/price":
+            self.server.count("simple_price")
+            currencies = [cur for cur in query.get("vs_currencies", "").split(",") if cur in FX_RATES]
+            quotes = {}
+            for coin_id in [i for i in query.get("ids", "").split(",") if i]:
+                snapshot = coin_snapshot(coin_id, seed)
+                quote = {}
+                for cur in currencies:
+                    rate = FX_RATES[cur]
+                    quote[cur] = snapshot["current_price"] * rate
+                    if query.get("include_market_cap") == "true":
+                        quote[f"{cur}_market_cap"] = snapshot["market_cap"] * rate
+                    if query.get("include_24hr_vol") == "true":
+                        quote[f"{cur}_24h_vol"] = snapshot["total_volume"] * rate
+                    if query.get("include_24hr_change") == "true":
+                        quote[f"{cur}_24h_change"] = snapshot["price_change_percentage_24h"]
+                quotes[coin_id] = quote
+            return self._send_json(200, quotes)
+
+        if path == "/search":
+            self.server.count("search")
+            needle = query.get("query", "").lower()
+            matches = [coin_id for coin_id in coin_universe(self.server.config.coins) if needle in coin_id][:25]
+            return self._send_json(200, {"coins": [
+                {"id": coin_id, "name": coin_id.title(), "symbol": coin_id[:5],
+                 "market_cap_rank": zlib.crc32(coin_id.encode()) % 5000 + 1}
+                for coin_id in matches
+            ]})
+
+        self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.server.count("requests")
+
+        if not re.match(r"^/api/webhooks/[^/]+/[^/]+$", parsed.path):
+            return self._send_json(404, {"error": "not found"})
+        if self._simulate():
+            return
+        self.server.count("discord")
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class MockServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the mock config and request counters"""
+
+    daemon_threads = True
+
+    def __init__(self, config=None, host="127.0.0.1", port=DEFAULT_PORT):
+        self.config = config or MockConfig()
+        self._counts = Counter()
+        self._counts_lock = threading.Lock()
+        self._thread = None
+        super().__init__((host, port), MockHandler)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self):
+        """Value for COINGECKO_API_URL"""
+        return f"{self.base_url}/api/v3"
+
+    @property
+    def webhook_url(self):
+        """Value for DISCORD_WEBHOOK_URL"""
+        return f"{self.base_url}/api/webhooks/0/mock"
+
+    def count(self, name):
+        with self._counts_lock:
+            self._counts[name] += 1
+
+    def stats(self):
+        with self._counts_lock:
+            return dict(self._counts)
+
+    def start_in_thread(self):
+        """Serve on a background thread (for tests and benchmarks)"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    """Entry point for the mock server"""
+    parser = argparse.ArgumentParser(description="Local CoinGecko/Discord stand-in for CoinWatch")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--coins", type=int, default=100, help="size of the synthetic coin universe")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="base latency per request")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0, help="extra random latency")
+    parser.add_argument("--latency-dist", choices=["uniform", "lognormal"], default="uniform")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on 429")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        coins=args.coins,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        latency_dist=args.latency_dist,
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+    server = MockServer(config, host=args.host, port=args.port)
+    print(f"🧪 Mock CoinGecko/Discord server on {server.base_url}")
+    print(f"   COINGECKO_API_URL={server.api_url}")
+    print(f"   DISCORD_WEBHOOK_URL={server.webhook_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⚠️  Mock server stopped")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Cross-process token-bucket rate limiter for the CoinGecko API
+
+The bucket state lives in a small JSON file guarded by an exclusive
+flock, so crypto_alert.py, update_52w_stats.py and the coinwatch CLI
+share one calls-per-minute budget even when cron runs overlap.
+
+Callers reserve a token and sleep only for the deficit, so requests
+go out immediately while budget is available and are spaced exactly
+at the configured rate once it is exhausted.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import state_file
+
+DEFAULT_STATE_FILE = "rate_limit_state.json"
+DEFAULT_CALLS_PER_MINUTE = 20  # CoinGecko free tier is roughly 5-30/min
+DEFAULT_BURST = 3
+
+logger = logging.getLogger(__name__)
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Token bucket whose state is shared between processes through a file
+
+    Tokens refill continuously at the current rate up to burst. The token
+    count may go negative: each negative token is a reservation that its
+    caller waits out outside the lock.
+
+    calls_per_minute is the ceiling. The current rate is part of the shared
+    state so adaptive adjustments (see retry_policy.py) apply to every
+    process at once.
+    """
+
+    def __init__(self, state_file=DEFAULT_STATE_FILE, calls_per_minute=DEFAULT_CALLS_PER_MINUTE,
+                 burst=DEFAULT_BURST, clock=time.time, sleep=time.sleep):
+        if float(calls_per_minute) <= 0 or float(burst) <= 0:
+            raise ValueError(f"calls_per_minute and burst must be positive, got {calls_per_minute} and {burst}")
+        self.state_file = state_file
+        self.calls_per_minute = float(calls_per_minute)
+        self.burst = float(burst)
+        self.clock = clock
+        self.sleep = sleep
+        self._thread_lock = threading.Lock()
+
+    def _current_rate(self, state):
+        """Tokens added per second for the given state"""
+        calls_per_minute = min(self.calls_per_minute, state.get("calls_per_minute", self.calls_per_minute))
+        return calls_per_minute / 60.0
+
+    @property
+    def rate(self):
+        """Current tokens added per second"""
+        with self._locked_state() as state:
+            return self._current_rate(state)
+
+    @contextmanager
+    def _locked_state(self):
+        """Yield the refilled bucket state under an exclusive lock and write it back"""
+        with self._thread_lock, state_file.locked_json(self.state_file) as state:
+            now = self.clock()
+            tokens = state.get("tokens", self.burst)
+            updated = state.get("updated", now)
+            elapsed = max(0.0, now - updated)
+            state["tokens"] = min(self.burst, tokens + elapsed * self._current_rate(state))
+            state["updated"] = now
+            yield state
+
+    def reserve(self, tokens=1):
+        """
+        Take tokens from the bucket
+
+        Returns:
+            Seconds the caller must wait before sending its request
+        """
+        with self._locked_state() as state:
+            state["tokens"] -= tokens
+            deficit = -state["tokens"]
+            rate = self._current_rate(state)
+        return max(0.0, deficit / rate)
+
+    def acquire(self, tokens=1):
+        """
+        Block until the budget allows another request
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+    def backoff(self, seconds):
+        """
+        Drain the shared budget so no process sends for at least `seconds`
+
+        Used after a 429 so every process backs off together instead of
+        each one retrying on its own schedule.
+        """
+        with self._locked_state() as state:
+            state["tokens"] = min(state["tokens"], -seconds * self._current_rate(state))
+
+    def increase_rate(self, step):
+        """
+        Additive increase: add `step` calls/minute per minute's worth of calls
+
+        Called once per successful request, so each call adds
+        step / current calls_per_minute, capped at the configured ceiling.
+        """
+        with self._locked_state() as state:
+            current = self._current_rate(state) * 60.0
+            state["calls_per_minute"] = min(self.calls_per_minute, current + step / max(current, 1.0))
+            return state["calls_per_minute"]
+
+    def decrease_rate(self, factor, min_calls_per_minute, hold_seconds=0):
+        """
+        Multiplicative decrease of the shared rate
+
+        Decreases within hold_seconds of the previous one are ignored, so a
+        burst of 429s from requests already in flight counts as one signal.
+        """
+        with self._locked_state() as state:
+            current = self._current_rate(state) * 60.0
+            now = self.clock()
+            if now - state.get("decreased_at", 0) >= hold_seconds:
+                state["calls_per_minute"] = max(min_calls_per_minute, current * factor)
+                state["decreased_at"] = now
+            return state.get("calls_per_minute", current)
+
+
+def _env_float(name, default):
+    """Read a positive float from the environment, falling back to default"""
+    try:
+        value = float(os.getenv(name, default))
+    except ValueError:
+        return default
+    if not value > 0:
+        logger.warning(f"⚠️  {name}={value:g} must be positive, using {default}")
+        return default
+    return value
+
+
+def get_limiter():
+    """Return the process-wide limiter configured from the environment"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = TokenBucket(
+                    state_file=os.getenv("COINWATCH_RATE_LIMIT_FILE", DEFAULT_STATE_FILE),
+                    calls_per_minute=_env_float("COINGECKO_CALLS_PER_MINUTE", DEFAULT_CALLS_PER_MINUTE),
+                    burst=_env_float("COINGECKO_BURST", DEFAULT_BURST)
+                )
+    return _limiter
+
+
+def reset_limiter():
+    """Forget the process-wide limiter so the next call re-reads configuration"""
+    global _limiter
+    with _limiter_lock:
+        _limiter = None
+
+
+def acquire(tokens=1):
+    """Wait for budget on the process-wide limiter"""
+    return get_limiter().acquire(tokens)
+
+
+def backoff(seconds):
+    """Apply a shared backoff on the process-wide limiter"""
+    get_limiter().backoff(seconds)
@@ -0,0 +1,154 @@
+"""
+Per-alert rearm state machine
+
+Every alert level (a coin's sent-bitmask slot) is in one of three states:
+
+- ARMED: may fire (the default; armed alerts are not stored)
+- FIRED: sent at fired_at; silent until its cooldown expires
+- COOLING: cooldown expired, but the price has not yet recovered out of
+  the hysteresis band above the level, so the alert stays silent
+
+When a FIRED alert's cooldown expires it becomes ARMED, or COOLING when a
+hysteresis band is configured; COOLING alerts are re-armed once the price
+recovers. Expiry times sit in a min-heap, so a check pops only the alerts
+that are due instead of scanning them all, and only entries whose state
+changed are handed back for persisting.
+"""
+
+import heapq
+from datetime import datetime, timedelta
+
+ARMED = 0
+FIRED = 1
+COOLING = 2
+STATE_NAMES = {ARMED: "armed", FIRED: "fired", COOLING: "cooling"}
+
+
+def next_midnight(timestamp):
+    """Local midnight after `timestamp` (the daily-reset rearm time)"""
+    day = datetime.fromtimestamp(timestamp).date() + timedelta(days=1)
+    return datetime(day.year, day.month, day.day).timestamp()
+
+
+class RearmSchedule:
+    """
+    States of the alerts that are not armed, keyed by (coin_id, slot)
+
+    Args:
+        rearm_at: Callable mapping a fired_at timestamp to the time its
+            cooldown expires, or None if it never does
+        hysteresis_percent: Band above the level (in % of the level price)
+            the price must recover past before a cooled-down alert re-arms;
+            0 re-arms as soon as the cooldown expires
+    """
+
+    def __init__(self, rearm_at, hysteresis_percent=0.0):
+        self.rearm_at = rearm_at
+        self.hysteresis_percent = hysteresis_percent
+        self.entries = {}
+        self.cooling = set()
+        self.changes = {}
+        self._heap = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _set(self, key, state, fired_at):
+        if state == ARMED:
+            self.entries.pop(key, None)
+            self.cooling.discard(key)
+            self.changes[key] = None
+            return
+        self.entries[key] = (state, fired_at)
+        self.changes[key] = (state, fired_at)
+        if state == COOLING:
+            self.cooling.add(key)
+        else:
+            self.cooling.discard(key)
+            expires = self.rearm_at(fired_at)
+            if expires is not None:
+                heapq.heappush(self._heap, (expires, fired_at, key))
+
+    def load(self, states):
+        """
+        Add stored states without marking them changed
+
+        Args:
+            states: Dict of coin ID to {slot: (state, fired_at)}
+        """
+        for coin_id, slots in states.items():
+            for slot, (state, fired_at) in slots.items():
+                key = (coin_id, slot)
+                self.entries[key] = (state, fired_at)
+                if state == COOLING:
+                    self.cooling.add(key)
+                    continue
+                expires = self.rearm_at(fired_at)
+                if expires is not None:
+                    self._heap.append((expires, fired_at, key))
+        heapq.heapify(self._heap)
+
+    def merge(self, other):
+        """Take over the entries (and pending changes) of another schedule"""
+        states = {}
+        for (coin_id, slot), entry in other.entries.items():
+            states.setdefault(coin_id, {})[slot] = entry
+        self.load(states)
+        self.changes.update(other.changes)
+
+    def drop_coins(self, coin_ids):
+        """Forget entries of coins not in coin_ids (e.g. removed from the config)"""
+        keep = set(coin_ids)
+        for key in [key for key in self.entries if key[0] not in keep]:
+            del self.entries[key]
+            self.cooling.discard(key)
+        # Stale heap entries are skipped when popped
+
+    def fire(self, keys, now):
+        """Record alerts sent at `now`"""
+        for key in keys:
+            self._set(key, FIRED, now)
+
+    def expire(self, now):
+        """
+        Advance FIRED alerts whose cooldown expired by `now`
+
+        Returns:
+            Keys re-armed (without hysteresis; otherwise they start COOLING)
+        """
+        rearmed = []
+        while self._heap and self._heap[0][0] <= now:
+            _, fired_at, key = heapq.heappop(self._heap)
+            if self.entries.get(key) != (FIRED, fired_at):
+                continue  # fired again or dropped since it was pushed
+            if self.hysteresis_percent > 0:
+                self._set(key, COOLING, fired_at)
+            else:
+                self._set(key, ARMED, fired_at)
+                rearmed.append(key)
+        return rearmed
+
+    def recover(self, keys):
+        """Re-arm COOLING alerts whose price left the hysteresis band"""
+        rearmed = [key for key in keys if key in self.cooling]
+        for key in rearmed:
+            self._set(key, ARMED, None)
+        return rearmed
+
+    def sent_bits(self):
+        """Dict of coin ID to the bitmask of alerts that are not armed"""
+        bits = {}
+        for coin_id, slot in self.entries:
+            bits[coin_id] = bits.get(coin_id, 0) | (1 << slot)
+        return bits
+
+    def take_changes(self):
+        """Entries changed since the last call: key -> (state, fired_at), or None if re-armed"""
+        changes, self.changes = self.changes, {}
+        return changes
+
+
+def fired_states(bits, fired_at):
+    """Dict of coin ID to {slot: (FIRED, fired_at)} for every bit set in a coin-to-bitmask dict"""
+    return {coin_id: {slot: (FIRED, fired_at) for slot in range(mask.bit_length()) if mask >> slot & 1}
+            for coin_id, mask in bits.items() if mask}
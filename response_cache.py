@@ -0,0 +1,338 @@
+"""
+On-disk HTTP response cache for CoinGecko GET requests
+
+Responses are keyed by URL + sorted query params and kept as one body
+file plus one small metadata file per entry, so concurrent processes
+(cron runs, ./coinwatch test, ./coinwatch validate) can share them
+without a global index file to fight over.
+
+Each process loads the metadata once into an in-memory LRU index, so a
+lookup is a dict access. Expired entries are revalidated with
+If-None-Match / If-Modified-Since when the server sent an ETag or
+Last-Modified header, and the cache is trimmed by entry count and total
+size, least recently used first. Streamed responses are written to their
+body file chunk by chunk as the caller reads them and replayed from the
+file, so their bodies are never held in memory.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode, urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_CACHE_DIR = ".coinwatch_cache"
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024  # 100 MB
+MEMORY_BODY_ENTRIES = 256  # non-streamed bodies also kept in memory for repeat hits
+
+# Time-to-live in seconds per endpoint, first match wins.
+# Endpoints without a TTL are never cached.
+ENDPOINT_TTLS = [
+    (re.compile(r"/coins/markets$"), 60),
+    (re.compile(r"/simple/price$"), 30),
+    (re.compile(r"/coins/[^/]+/market_chart$"), 12 * 3600),  # daily series barely move intra-day
+    (re.compile(r"/coins/[^/]+$"), 3600),
+    (re.compile(r"/search$"), 24 * 3600),
+]
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def ttl_for(url):
+    """Return the TTL in seconds for a URL, or None if it should not be cached"""
+    path = urlparse(url).path.rstrip("/")
+    for pattern, ttl in ENDPOINT_TTLS:
+        if pattern.search(path):
+            return ttl
+    return None
+
+
+def cache_key(url, params=None):
+    """Stable key for a URL and its query params"""
+    query = urlencode(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+    return hashlib.sha256(f"{url}?{query}".encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    LRU response cache backed by a directory of body/metadata files
+
+    Metadata per entry: url, stored_at, expires_at, etag, last_modified,
+    content_type and size.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES, clock=time.time):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._index = None
+        self._bodies = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.cache_dir, f"{key}.{suffix}")
+
+    def _load_index(self):
+        """Scan metadata files once, ordered least recently used first"""
+        index = []
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".meta"):
+                    continue
+                key = name[:-5]
+                try:
+                    with open(self._path(key, "meta"), "r") as f:
+                        meta = json.load(f)
+                    last_used = os.path.getmtime(self._path(key, "body"))
+                except (OSError, ValueError):
+                    continue
+                index.append((last_used, key, meta))
+
+        index.sort(key=lambda entry: entry[0])
+        self._index = OrderedDict((key, meta) for _, key, meta in index)
+        self._total_bytes = sum(meta.get("size", 0) for meta in self._index.values())
+
+    def _ensure_index(self):
+        if self._index is None:
+            self._load_index()
+
+    def lookup(self, key):
+        """
+        Return the metadata for a cached entry (fresh or stale), or None
+
+        Marks the entry as most recently used.
+        """
+        with self._lock:
+            self._ensure_index()
+            meta = self._index.get(key)
+            if meta is None:
+                return None
+            self._index.move_to_end(key)
+            try:
+                os.utime(self._path(key, "body"))
+            except OSError:
+                self._forget(key)
+                return None
+            return meta
+
+    def is_fresh(self, meta):
+        """True if the entry has not expired yet"""
+        return meta.get("expires_at", 0) > self.clock()
+
+    def read_body(self, key):
+        """Return the cached body bytes, or None if the entry is gone"""
+        with self._lock:
+            if key in self._bodies:
+                self._bodies.move_to_end(key)
+                return self._bodies[key]
+            try:
+                with open(self._path(key, "body"), "rb") as f:
+                    body = f.read()
+            except OSError:
+                self._forget(key)
+                return None
+            self._remember_body(key, body)
+            return body
+
+    def open_body(self, key):
+        """Open the cached body file for streaming, or None if the entry is gone"""
+        with self._lock:
+            try:
+                return open(self._path(key, "body"), "rb")
+            except OSError:
+                self._forget(key)
+                return None
+
+    def _remember_body(self, key, body):
+        self._bodies[key] = body
+        self._bodies.move_to_end(key)
+        while len(self._bodies) > MEMORY_BODY_ENTRIES:
+            self._bodies.popitem(last=False)
+
+    def _write_atomic(self, path, data):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _commit(self, key, meta):
+        """Write an entry's metadata once its body file is in place; caller holds the lock"""
+        self._write_atomic(self._path(key, "meta"), json.dumps(meta).encode())
+        old = self._index.pop(key, None)
+        if old:
+            self._total_bytes -= old.get("size", 0)
+        self._index[key] = meta
+        self._total_bytes += meta["size"]
+
+    def _meta(self, url, size, ttl, etag, last_modified, content_type):
+        now = self.clock()
+        return {
+            "url": url,
+            "stored_at": now,
+            "expires_at": now + ttl,
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_type": content_type or "application/json",
+            "size": size
+        }
+
+    def store(self, key, url, body, ttl, etag=None, last_modified=None, content_type=None):
+        """Store a response body and evict old entries if over budget"""
+        meta = self._meta(url, len(body), ttl, etag, last_modified, content_type)
+        with self._lock:
+            self._ensure_index()
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                self._write_atomic(self._path(key, "body"), body)
+                self._commit(key, meta)
+            except OSError:
+                return None
+            self._remember_body(key, body)
+            self._evict()
+        return meta
+
+    def store_stream(self, key, url, chunks, ttl, etag=None, last_modified=None, content_type=None):
+        """
+        Yield body chunks while writing them to the cache
+
+        The entry is added once the chunks are exhausted; a stream that is
+        abandoned or fails midway leaves no entry. The body is not kept in
+        memory.
+        """
+        body_path = self._path(key, "body")
+        tmp_path = f"{body_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            f = open(tmp_path, "wb")
+        except OSError:
+            yield from chunks
+            return
+
+        size = 0
+        complete = False
+        try:
+            with f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    size += len(chunk)
+                    yield chunk
+            complete = True
+        finally:
+            stored = False
+            if complete:
+                meta = self._meta(url, size, ttl, etag, last_modified, content_type)
+                with self._lock:
+                    self._ensure_index()
+                    try:
+                        os.replace(tmp_path, body_path)
+                        self._bodies.pop(key, None)
+                        self._commit(key, meta)
+                        stored = True
+                    except OSError:
+                        pass
+                    self._evict()
+            if not stored:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def refresh(self, key, ttl):
+        """Extend a revalidated (304 Not Modified) entry by another TTL"""
+        with self._lock:
+            meta = self.lookup(key)
+            if meta is None:
+                return None
+            meta["expires_at"] = self.clock() + ttl
+            try:
+                self._write_atomic(self._path(key, "meta"), json.dumps(meta).encode())
+            except OSError:
+                pass
+            return meta
+
+    def _forget(self, key):
+        meta = self._index.pop(key, None) if self._index is not None else None
+        if meta:
+            self._total_bytes -= meta.get("size", 0)
+        self._bodies.pop(key, None)
+        for suffix in ("body", "meta"):
+            try:
+                os.remove(self._path(key, suffix))
+            except OSError:
+                pass
+
+    def _evict(self):
+        """Drop least recently used entries until within count and size limits"""
+        while self._index and (len(self._index) > self.max_entries or self._total_bytes > self.max_bytes):
+            key = next(iter(self._index))
+            self._forget(key)
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_index()
+            return len(self._index)
+
+
+def build_response(url, body, meta, raw=None):
+    """
+    Build a requests.Response from a cached body so callers need no changes
+
+    Pass an open body file as `raw` (and body=None) to stream it instead;
+    it is closed with the response.
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = "OK"
+    response.url = url
+    if raw is not None:
+        response.raw = raw
+    else:
+        response._content = body
+        response._content_consumed = True
+    response.encoding = "utf-8"
+    response.headers = CaseInsensitiveDict({
+        "Content-Type": meta.get("content_type") or "application/json",
+        "X-CoinWatch-Cache": "hit"
+    })
+    response.from_cache = True
+    return response
+
+
+def is_enabled():
+    """The cache can be switched off with COINWATCH_CACHE=0"""
+    return os.getenv("COINWATCH_CACHE", "1").lower() not in ("0", "false", "off", "no")
+
+
+def get_cache():
+    """Return the process-wide cache configured from the environment"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    max_bytes = int(os.getenv("COINWATCH_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+                except ValueError:
+                    max_bytes = DEFAULT_MAX_BYTES
+                _cache = ResponseCache(
+                    cache_dir=os.getenv("COINWATCH_CACHE_DIR", DEFAULT_CACHE_DIR),
+                    max_bytes=max_bytes
+                )
+    return _cache
+
+
+def reset_cache():
+    """Forget the process-wide cache so the next call re-reads configuration"""
+    global _cache
+    with _cache_lock:
+        _cache = None
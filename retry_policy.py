@@ -0,0 +1,176 @@
+"""
+Shared retry and adaptive throttling policy for CoinGecko requests
+
+- Retry delays honor Retry-After and x-ratelimit-reset headers when the
+  server sends them, and otherwise use exponential backoff with full
+  jitter so parallel clients do not retry in lockstep.
+- Request rate and concurrency follow AIMD (additive increase,
+  multiplicative decrease): every success nudges them up, every 429
+  halves them. The rate is stored in the shared rate limiter state, so
+  all processes converge on the real limit instead of a guessed one.
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import rate_limiter
+
+BASE_DELAY = 2.0  # seconds, first retry window
+MAX_DELAY = 120.0  # seconds, cap for computed backoff
+DEFAULT_RATE_LIMIT_DELAY = 30.0  # seconds, 429 without usable headers
+
+# AIMD tuning
+RATE_INCREASE = 1.0  # calls/minute gained per minute's worth of successful calls
+RATE_DECREASE_FACTOR = 0.5
+MIN_CALLS_PER_MINUTE = 2.0
+DECREASE_HOLD_SECONDS = 10.0  # 429s within this window count as one signal
+CONCURRENCY_DECREASE_FACTOR = 0.5
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def parse_retry_after(headers, now=None):
+    """
+    Read the server-requested wait from response headers
+
+    Supports Retry-After (seconds or HTTP date) and x-ratelimit-reset
+    (epoch seconds or seconds from now).
+
+    Returns:
+        Seconds to wait, or None if no usable header is present
+    """
+    if not headers:
+        return None
+    now = time.time() if now is None else now
+
+    retry_after = headers.get("Retry-After")
+    if retry_after:
+        retry_after = retry_after.strip()
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - now)
+            except (TypeError, ValueError, IndexError):
+                pass
+
+    reset = headers.get("x-ratelimit-reset")
+    if reset:
+        try:
+            reset = float(reset)
+        except ValueError:
+            return None
+        # Large values are absolute epoch timestamps, small ones are relative
+        return max(0.0, reset - now) if reset > 1e9 else max(0.0, reset)
+
+    return None
+
+
+def backoff_delay(attempt, base=BASE_DELAY, cap=MAX_DELAY, rand=random.random):
+    """
+    Exponential backoff with full jitter
+
+    Returns a random delay in [0, min(cap, base * 2**attempt)].
+    """
+    return rand() * min(cap, base * (2 ** attempt))
+
+
+def retry_delay(attempt, response=None, rand=random.random):
+    """
+    Seconds to wait before retry number `attempt` (0-based)
+
+    Server headers win; a small jitter is added so clients released by the
+    same Retry-After do not all fire at once.
+    """
+    header_delay = parse_retry_after(getattr(response, "headers", None)) if response is not None else None
+    if header_delay is not None:
+        return header_delay + rand() * BASE_DELAY
+    return backoff_delay(attempt, rand=rand)
+
+
+class AIMDController:
+    """
+    Additive-increase/multiplicative-decrease control of rate and concurrency
+
+    The request rate lives in the shared rate limiter state. Concurrency is
+    per process: None means unthrottled (use the caller's configured max);
+    after a 429 it drops to a fraction of that and climbs back by about one
+    slot per window of successful requests.
+    """
+
+    def __init__(self, limiter=None):
+        self._limiter = limiter
+        self._lock = threading.Lock()
+        self.concurrency = None
+        self._max_concurrency = None
+
+    @property
+    def limiter(self):
+        return self._limiter or rate_limiter.get_limiter()
+
+    def concurrency_limit(self, max_concurrency):
+        """Current allowed in-flight requests, never above max_concurrency"""
+        with self._lock:
+            self._max_concurrency = max_concurrency
+            if self.concurrency is None:
+                return max_concurrency
+            return max(1, min(max_concurrency, int(self.concurrency)))
+
+    def on_success(self):
+        """Additive increase after a successful request"""
+        self.limiter.increase_rate(RATE_INCREASE)
+        with self._lock:
+            if self.concurrency is not None:
+                self.concurrency += 1.0 / self.concurrency
+                if self._max_concurrency and self.concurrency >= self._max_concurrency:
+                    self.concurrency = None
+
+    def on_rate_limited(self):
+        """Multiplicative decrease after a 429"""
+        self.limiter.decrease_rate(RATE_DECREASE_FACTOR, MIN_CALLS_PER_MINUTE, DECREASE_HOLD_SECONDS)
+        with self._lock:
+            current = self.concurrency if self.concurrency is not None else (self._max_concurrency or 1)
+            self.concurrency = max(1.0, current * CONCURRENCY_DECREASE_FACTOR)
+
+
+def get_controller():
+    """Return the process-wide AIMD controller"""
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AIMDController()
+    return _controller
+
+
+def reset_controller():
+    """Forget the process-wide controller (used by tests)"""
+    global _controller
+    with _controller_lock:
+        _controller = None
+
+
+def record_response(response):
+    """
+    Feed a rate-limited response into the shared policy
+
+    On 429 the shared budget is drained for the server-requested time (or
+    DEFAULT_RATE_LIMIT_DELAY) and rate/concurrency are cut; on success they
+    are nudged up.
+
+    Returns:
+        Backoff in seconds applied for a 429, otherwise 0
+    """
+    if response.status_code == 429:
+        delay = parse_retry_after(response.headers)
+        if delay is None:
+            delay = DEFAULT_RATE_LIMIT_DELAY
+        rate_limiter.backoff(delay)
+        get_controller().on_rate_limited()
+        return delay
+    if response.status_code < 400:
+        get_controller().on_success()
+    return 0
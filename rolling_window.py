@@ -0,0 +1,165 @@
+"""
+Rolling 52-week high/low over a daily price series
+
+RollingExtremes keeps two monotonic deques of (timestamp_ms, price):
+prices in the max deque strictly decrease from head to tail and prices in
+the min deque strictly increase, so the head of each is the window's high
+or low. Adding a day and expiring days that leave the window are
+amortized O(1), and the deques stay short (a handful of points for
+typical series), so the state is persisted alongside the 52w stats.
+
+The newest day is held as a pending point until a later day arrives,
+because intraday refreshes may still replace it.
+"""
+
+from collections import deque
+from datetime import date, datetime, timezone
+
+DAY_MS = 86400 * 1000
+DEFAULT_WINDOW_DAYS = 365
+
+
+def timestamp_to_date(timestamp_ms):
+    """Convert a CoinGecko millisecond timestamp to a YYYY-MM-DD string (UTC)"""
+    return datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def date_to_day(day):
+    """Day number (days since the epoch) of a date"""
+    return (day - date(1970, 1, 1)).days
+
+
+class RollingExtremes:
+    """Sliding-window high/low of a daily series, updated one day at a time"""
+
+    def __init__(self, window_days=DEFAULT_WINDOW_DAYS):
+        self.window_days = window_days
+        self._max = deque()
+        self._min = deque()
+        self._pending = None
+
+    @property
+    def last_day(self):
+        """Day number of the newest point, or None if empty"""
+        return self._pending[0] // DAY_MS if self._pending else None
+
+    def push(self, timestamp_ms, price):
+        """
+        Add the price for a day
+
+        A point for the same day as the newest one replaces it; older days
+        are rejected.
+
+        Raises:
+            ValueError: if the point is older than the newest day
+        """
+        point = (int(timestamp_ms), float(price))
+        day = point[0] // DAY_MS
+        if self._pending is not None:
+            if day < self.last_day:
+                raise ValueError("Points must be pushed in time order")
+            if day > self.last_day:
+                self._commit(self._pending)
+        self._pending = point
+        self.expire(day)
+
+    def extend(self, points):
+        """Push (timestamp_ms, price) points, skipping days already committed"""
+        for timestamp_ms, price in points:
+            if self.last_day is None or int(timestamp_ms) // DAY_MS >= self.last_day:
+                self.push(timestamp_ms, price)
+
+    def _commit(self, point):
+        while self._max and self._max[-1][1] <= point[1]:
+            self._max.pop()
+        self._max.append(point)
+        while self._min and self._min[-1][1] >= point[1]:
+            self._min.pop()
+        self._min.append(point)
+
+    def expire(self, today):
+        """Drop points more than window_days before day number `today`"""
+        cutoff = today - self.window_days
+        while self._max and self._max[0][0] // DAY_MS < cutoff:
+            self._max.popleft()
+        while self._min and self._min[0][0] // DAY_MS < cutoff:
+            self._min.popleft()
+        if self._pending and self.last_day < cutoff:
+            self._pending = None
+
+    def high(self):
+        """(timestamp_ms, price) of the window high, or None if empty"""
+        candidates = [p for p in (self._max[0] if self._max else None, self._pending) if p]
+        return max(candidates, key=lambda p: p[1]) if candidates else None
+
+    def low(self):
+        """(timestamp_ms, price) of the window low, or None if empty"""
+        candidates = [p for p in (self._min[0] if self._min else None, self._pending) if p]
+        return min(candidates, key=lambda p: p[1]) if candidates else None
+
+    def stats(self):
+        """
+        High/low part of a 52w stats entry
+
+        Returns:
+            Dict with high_52w, low_52w and their dates, or None if empty
+        """
+        high, low = self.high(), self.low()
+        if high is None:
+            return None
+        return {
+            "high_52w": high[1],
+            "low_52w": low[1],
+            "high_52w_date": timestamp_to_date(high[0]),
+            "low_52w_date": timestamp_to_date(low[0])
+        }
+
+    def to_dict(self):
+        """JSON-serializable state"""
+        return {
+            "window_days": self.window_days,
+            "max": [list(p) for p in self._max],
+            "min": [list(p) for p in self._min],
+            "pending": list(self._pending) if self._pending else None
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """Rebuild from to_dict() output"""
+        window = cls(state.get("window_days", DEFAULT_WINDOW_DAYS))
+        window._max = deque((int(ts), float(price)) for ts, price in state.get("max", []))
+        window._min = deque((int(ts), float(price)) for ts, price in state.get("min", []))
+        pending = state.get("pending")
+        window._pending = (int(pending[0]), float(pending[1])) if pending else None
+        return window
+
+    @classmethod
+    def from_points(cls, points, window_days=DEFAULT_WINDOW_DAYS):
+        """Build from a time-ordered series of (timestamp_ms, price) points"""
+        window = cls(window_days)
+        window.extend(points)
+        return window
+
+
+def stats_as_of(entry, today=None):
+    """
+    Return a 52w stats entry with expired days dropped as of `today`
+
+    Entries written with a "rolling" state are re-evaluated so the high
+    and low are exact to the day between refreshes; others are returned
+    unchanged.
+
+    Returns:
+        Stats entry dict, or None if every stored day has left the window
+    """
+    if not entry or not entry.get("rolling"):
+        return entry
+    try:
+        window = RollingExtremes.from_dict(entry["rolling"])
+    except (KeyError, ValueError, TypeError, IndexError):
+        return entry
+    window.expire(date_to_day(today or date.today()))
+    stats = window.stats()
+    if stats is None:
+        return None
+    return {**entry, **stats}
@@ -0,0 +1,60 @@
+"""
+Small JSON state files shared between CoinWatch processes
+
+Used by the rate limiter and circuit breaker: the file is opened,
+exclusively flock-ed, read, handed to the caller for modification and
+written back before the lock is released.
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+_thread_lock = threading.Lock()
+
+
+@contextmanager
+def locked_json(path):
+    """
+    Yield the JSON dict stored at `path` under an exclusive lock
+
+    A missing or unreadable file yields an empty dict. Changes made to the
+    dict are written back when the block exits without an exception;
+    an unchanged state is not rewritten.
+    """
+    with _thread_lock:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = b""
+            while True:
+                chunk = os.read(fd, 4096)
+                if not chunk:
+                    break
+                raw += chunk
+            try:
+                state = json.loads(raw) if raw else {}
+            except ValueError:
+                state = {}
+            if not isinstance(state, dict):
+                state = {}
+
+            yield state
+
+            data = json.dumps(state).encode()
+            if data == raw:
+                return
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, data)
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
@@ -0,0 +1,584 @@
+"""
+SQLite-backed state shared by CoinWatch scripts
+
+Replaces the 52w_stats.json and sent_alerts.json documents with indexed
+tables, so a run reads only the coins it needs and a change writes only
+the rows it touches:
+
+- stats_52w: one row per coin (high/low, their dates, rolling window state)
+- alert_slots: a stable bit index per configured alert level of a coin
+- sent_bits: per coin and day, a bitmask of alerted levels; only filled
+  by legacy imports, which seed alert_state from it
+- alert_state: rearm state (fired or cooling, and when it fired) of each
+  level that is not armed; armed levels have no row
+- last_prices: each coin's price at the previous check (for cross_alerts)
+- quote_aths: all-time highs of coins quoted in a currency other than USD
+- run_meta: small key/value facts (last 52w update, completed migrations)
+
+The database runs in WAL mode so the cron'd alert check can read while
+the 52w updater writes. Existing JSON files are imported once, the
+first time their data is requested (or via `python storage.py migrate`).
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+import rearm
+
+DEFAULT_DB_FILE = "coinwatch.db"
+DEFAULT_CURRENCY = "usd"
+MAX_SQL_VARIABLES = 900  # stay below SQLite's default bound-parameter limit
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stats_52w (
+    coin_id TEXT PRIMARY KEY,
+    high_52w REAL,
+    low_52w REAL,
+    high_52w_date TEXT,
+    low_52w_date TEXT,
+    updated_at TEXT,
+    rolling TEXT
+);
+CREATE TABLE IF NOT EXISTS alert_slots (
+    coin_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    value REAL NOT NULL,
+    slot INTEGER NOT NULL,
+    PRIMARY KEY (coin_id, kind, value),
+    UNIQUE (coin_id, slot)
+);
+CREATE TABLE IF NOT EXISTS sent_bits (
+    coin_id TEXT NOT NULL,
+    sent_on TEXT NOT NULL,
+    mask BLOB NOT NULL,
+    PRIMARY KEY (coin_id, sent_on)
+);
+CREATE INDEX IF NOT EXISTS idx_sent_bits_day ON sent_bits (sent_on);
+CREATE TABLE IF NOT EXISTS alert_state (
+    coin_id TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    state INTEGER NOT NULL,
+    fired_at REAL NOT NULL,
+    PRIMARY KEY (coin_id, slot)
+);
+CREATE TABLE IF NOT EXISTS last_prices (
+    coin_id TEXT PRIMARY KEY,
+    price REAL NOT NULL,
+    seen_at TEXT
+);
+CREATE TABLE IF NOT EXISTS quote_aths (
+    coin_id TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    ath REAL NOT NULL,
+    PRIMARY KEY (coin_id, currency)
+);
+CREATE TABLE IF NOT EXISTS run_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+STATS_COLUMNS = ("high_52w", "low_52w", "high_52w_date", "low_52w_date", "updated_at", "rolling")
+ALERT_KEY_RE = re.compile(r"^(.+)_(ath|price)_([^_]+)$")
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def parse_alert_key(key):
+    """
+    Split a legacy '<coin>_ath_<t>' / '<coin>_price_<p>' alert key
+
+    Returns:
+        Tuple of (coin_id, kind, value), or None if the key is malformed
+    """
+    match = ALERT_KEY_RE.match(key)
+    if not match:
+        return None
+    try:
+        return match.group(1), match.group(2), float(match.group(3))
+    except ValueError:
+        return None
+
+
+def format_alert_key(coin_id, kind, value):
+    """Alert key for a level, with whole numbers written without '.0'"""
+    value = float(value)
+    return f"{coin_id}_{kind}_{int(value) if value.is_integer() else value}"
+
+
+def stats_key(coin_id, currency=DEFAULT_CURRENCY):
+    """Key of a coin's 52w stats and price history in a quote currency (the coin ID for USD)"""
+    return coin_id if currency == DEFAULT_CURRENCY else f"{coin_id}.{currency}"
+
+
+def mask_to_blob(mask):
+    return mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+
+
+def blob_to_mask(blob):
+    return int.from_bytes(blob, "little")
+
+
+def _chunks(items, size=MAX_SQL_VARIABLES):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class StateStore:
+    """Connection to the CoinWatch state database"""
+
+    def __init__(self, path=DEFAULT_DB_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate_key_table()
+        self._seed_alert_states()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # --- 52-week stats ---
+
+    def _stats_from_row(self, row):
+        entry = {column: row[column] for column in STATS_COLUMNS if row[column] is not None}
+        if "rolling" in entry:
+            entry["rolling"] = json.loads(entry["rolling"])
+        return entry
+
+    def get_52w_stats(self, coin_id):
+        """Return one coin's stats entry, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM stats_52w WHERE coin_id = ?", (coin_id,)).fetchone()
+        return self._stats_from_row(row) if row else None
+
+    def get_52w_stats_many(self, coin_ids=None):
+        """
+        Return stats entries keyed by coin ID
+
+        Args:
+            coin_ids: Coins to look up (all coins if None)
+        """
+        with self._lock:
+            if coin_ids is None:
+                rows = self._conn.execute("SELECT * FROM stats_52w").fetchall()
+            else:
+                rows = []
+                for chunk in _chunks(coin_ids):
+                    placeholders = ",".join("?" * len(chunk))
+                    rows.extend(self._conn.execute(
+                        f"SELECT * FROM stats_52w WHERE coin_id IN ({placeholders})", chunk
+                    ).fetchall())
+        return {row["coin_id"]: self._stats_from_row(row) for row in rows}
+
+    def upsert_52w_stats(self, coins):
+        """
+        Insert or update stats entries (dict of coin ID to entry)
+
+        Rows whose values are unchanged are left untouched.
+        """
+        rows = []
+        for coin_id, entry in coins.items():
+            rolling = entry.get("rolling")
+            rows.append((
+                coin_id, entry.get("high_52w"), entry.get("low_52w"), entry.get("high_52w_date"),
+                entry.get("low_52w_date"), entry.get("updated_at"),
+                json.dumps(rolling, separators=(",", ":")) if rolling is not None else None
+            ))
+        changed = " OR ".join(f"stats_52w.{c} IS NOT excluded.{c}" for c in STATS_COLUMNS)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in STATS_COLUMNS)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO stats_52w (coin_id, {', '.join(STATS_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                f"ON CONFLICT(coin_id) DO UPDATE SET {updates} WHERE {changed}",
+                rows
+            )
+
+    def delete_52w_stats_except(self, coin_ids):
+        """Remove stats for coins not in coin_ids"""
+        keep = set(coin_ids)
+        with self._lock, self._conn:
+            stored = [row[0] for row in self._conn.execute("SELECT coin_id FROM stats_52w")]
+            stale = [coin_id for coin_id in stored if coin_id not in keep]
+            for chunk in _chunks(stale):
+                placeholders = ",".join("?" * len(chunk))
+                self._conn.execute(f"DELETE FROM stats_52w WHERE coin_id IN ({placeholders})", chunk)
+
+    # --- sent alerts ---
+
+    def alert_slots(self, levels):
+        """
+        Return the bit index of each alert level, assigning new ones
+
+        A level keeps its slot for as long as the database exists, so sent
+        masks stay valid when other levels are added or removed. Values
+        are compared as floats: 80000 and 80000.0 are the same level.
+
+        Args:
+            levels: Sequence of (coin_id, kind, value) tuples
+
+        Returns:
+            List of slots aligned with levels
+        """
+        levels = [(coin_id, kind, float(value)) for coin_id, kind, value in levels]
+        coin_ids = sorted({level[0] for level in levels})
+        with self._lock, self._conn:
+            known = {}
+            next_slot = {}
+            for chunk in _chunks(coin_ids):
+                placeholders = ",".join("?" * len(chunk))
+                for row in self._conn.execute(
+                    f"SELECT coin_id, kind, value, slot FROM alert_slots WHERE coin_id IN ({placeholders})", chunk
+                ):
+                    known[(row[0], row[1], row[2])] = row[3]
+                    next_slot[row[0]] = max(next_slot.get(row[0], 0), row[3] + 1)
+
+            new_rows = []
+            for level in levels:
+                if level not in known:
+                    slot = next_slot.get(level[0], 0)
+                    next_slot[level[0]] = slot + 1
+                    known[level] = slot
+                    new_rows.append((*level, slot))
+            if new_rows:
+                self._conn.executemany(
+                    "INSERT INTO alert_slots (coin_id, kind, value, slot) VALUES (?, ?, ?, ?)", new_rows
+                )
+        return [known[level] for level in levels]
+
+    def sent_masks(self, coin_ids=None, sent_on=None):
+        """
+        Return the sent-level bitmask of each coin with alerts sent
+
+        Args:
+            coin_ids: Only these coins (all coins if None)
+            sent_on: Only alerts sent on this YYYY-MM-DD day (masks of all
+                days are OR-ed together if None)
+
+        Returns:
+            Dict of coin ID to int bitmask (bit n set = slot n sent)
+        """
+        day_clause = " AND sent_on = ?" if sent_on else ""
+        day_args = [sent_on] if sent_on else []
+        with self._lock:
+            if coin_ids is None:
+                rows = self._conn.execute("SELECT coin_id, mask FROM sent_bits WHERE 1 = 1" + day_clause,
+                                          day_args).fetchall()
+            else:
+                rows = []
+                for chunk in _chunks(coin_ids):
+                    placeholders = ",".join("?" * len(chunk))
+                    rows.extend(self._conn.execute(
+                        f"SELECT coin_id, mask FROM sent_bits WHERE coin_id IN ({placeholders})" + day_clause,
+                        chunk + day_args
+                    ).fetchall())
+        masks = {}
+        for coin_id, blob in rows:
+            masks[coin_id] = masks.get(coin_id, 0) | blob_to_mask(blob)
+        return masks
+
+    def mark_sent_masks(self, masks, sent_on):
+        """Set the given bits (dict of coin ID to bitmask) as sent on a day"""
+        masks = {coin_id: mask for coin_id, mask in masks.items() if mask}
+        with self._lock, self._conn:
+            for chunk in _chunks(masks):
+                placeholders = ",".join("?" * len(chunk))
+                for coin_id, blob in self._conn.execute(
+                    f"SELECT coin_id, mask FROM sent_bits WHERE sent_on = ? AND coin_id IN ({placeholders})",
+                    [sent_on] + chunk
+                ):
+                    masks[coin_id] |= blob_to_mask(blob)
+            self._conn.executemany(
+                "INSERT INTO sent_bits (coin_id, sent_on, mask) VALUES (?, ?, ?) "
+                "ON CONFLICT(coin_id, sent_on) DO UPDATE SET mask = excluded.mask",
+                [(coin_id, sent_on, mask_to_blob(mask)) for coin_id, mask in masks.items()]
+            )
+
+    def clear_sent_alerts(self, before=None):
+        """Delete sent alerts, or only those sent before a YYYY-MM-DD day"""
+        with self._lock, self._conn:
+            if before:
+                self._conn.execute("DELETE FROM sent_bits WHERE sent_on < ?", (before,))
+            else:
+                self._conn.execute("DELETE FROM sent_bits")
+
+    def key_masks(self, keys):
+        """Convert legacy alert keys to a dict of coin ID to bitmask"""
+        levels = [level for level in map(parse_alert_key, keys) if level]
+        masks = {}
+        for level, slot in zip(levels, self.alert_slots(levels)):
+            masks[level[0]] = masks.get(level[0], 0) | (1 << slot)
+        return masks
+
+    def mark_alerts_sent(self, keys, sent_on):
+        """Record legacy '<coin>_<kind>_<value>' alert keys as sent on a day"""
+        masks = self.key_masks(keys)
+        self.mark_sent_masks(masks, sent_on)
+        self._fire_masks(masks, sent_on)
+
+    def sent_alert_keys(self, coin_ids=None, sent_on=None):
+        """
+        Return the set of sent alert keys (decoded from the bitmasks)
+
+        Args:
+            coin_ids: Only keys for these coins (all coins if None)
+            sent_on: Only keys sent on this YYYY-MM-DD day (any day if None)
+        """
+        masks = self.sent_masks(coin_ids, sent_on)
+        keys = set()
+        with self._lock:
+            for chunk in _chunks(masks):
+                placeholders = ",".join("?" * len(chunk))
+                for coin_id, kind, value, slot in self._conn.execute(
+                    f"SELECT coin_id, kind, value, slot FROM alert_slots WHERE coin_id IN ({placeholders})", chunk
+                ):
+                    if masks[coin_id] >> slot & 1:
+                        keys.add(format_alert_key(coin_id, kind, value))
+        return keys
+
+    def alert_states(self, coin_ids=None):
+        """
+        Return the rearm state of each level that is not armed
+
+        Args:
+            coin_ids: Only these coins (all coins if None)
+
+        Returns:
+            Dict of coin ID to {slot: (state, fired_at timestamp)}
+        """
+        query = "SELECT coin_id, slot, state, fired_at FROM alert_state"
+        with self._lock:
+            if coin_ids is None:
+                rows = self._conn.execute(query).fetchall()
+            else:
+                rows = []
+                for chunk in _chunks(coin_ids):
+                    placeholders = ",".join("?" * len(chunk))
+                    rows.extend(self._conn.execute(f"{query} WHERE coin_id IN ({placeholders})", chunk).fetchall())
+        states = {}
+        for coin_id, slot, state, fired_at in rows:
+            states.setdefault(coin_id, {})[slot] = (state, fired_at)
+        return states
+
+    def set_alert_states(self, changes):
+        """
+        Write changed rearm states
+
+        Args:
+            changes: Dict of (coin_id, slot) to (state, fired_at), or to
+                None for levels that were re-armed (their row is deleted)
+        """
+        upserts = [(coin_id, slot, state[0], state[1]) for (coin_id, slot), state in changes.items() if state]
+        deletes = [key for key, state in changes.items() if state is None]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO alert_state (coin_id, slot, state, fired_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(coin_id, slot) DO UPDATE SET state = excluded.state, fired_at = excluded.fired_at",
+                upserts
+            )
+            self._conn.executemany("DELETE FROM alert_state WHERE coin_id = ? AND slot = ?", deletes)
+
+    def _fire_masks(self, masks, sent_on):
+        """Mark the bits of masks fired at the start of a YYYY-MM-DD day, unless they fired later"""
+        fired_at = datetime.strptime(sent_on, "%Y-%m-%d").timestamp()
+        rows = [(coin_id, slot, state, fired_at)
+                for coin_id, slots in rearm.fired_states(masks, fired_at).items()
+                for slot, (state, _) in slots.items()]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO alert_state (coin_id, slot, state, fired_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(coin_id, slot) DO UPDATE SET state = excluded.state, fired_at = excluded.fired_at "
+                "WHERE excluded.fired_at > alert_state.fired_at",
+                rows
+            )
+
+    def _seed_alert_states(self):
+        """Give alerts recorded before rearm states existed a fired state"""
+        if self.get_meta("alert_state_seeded"):
+            return
+        by_day = {}
+        for coin_id, sent_on, blob in self._conn.execute("SELECT coin_id, sent_on, mask FROM sent_bits"):
+            masks = by_day.setdefault(sent_on, {})
+            masks[coin_id] = masks.get(coin_id, 0) | blob_to_mask(blob)
+        for sent_on, masks in by_day.items():
+            self._fire_masks(masks, sent_on)
+        self.set_meta("alert_state_seeded", True)
+
+    def _migrate_key_table(self):
+        """Convert a sent_alerts table of string keys into bitmasks"""
+        exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sent_alerts'"
+        ).fetchone()
+        if not exists:
+            return
+        by_day = {}
+        for key, sent_on in self._conn.execute("SELECT alert_key, sent_on FROM sent_alerts"):
+            by_day.setdefault(sent_on, []).append(key)
+        for sent_on, keys in by_day.items():
+            self.mark_alerts_sent(keys, sent_on)
+        with self._conn:
+            self._conn.execute("DROP TABLE sent_alerts")
+
+    # --- previous prices ---
+
+    def last_prices(self, coin_ids):
+        """Return the last recorded price of each coin (dict of coin ID to price)"""
+        rows = []
+        with self._lock:
+            for chunk in _chunks(coin_ids):
+                placeholders = ",".join("?" * len(chunk))
+                rows.extend(self._conn.execute(
+                    f"SELECT coin_id, price FROM last_prices WHERE coin_id IN ({placeholders})", chunk
+                ).fetchall())
+        return {coin_id: price for coin_id, price in rows}
+
+    def set_last_prices(self, prices, seen_at):
+        """Record prices (dict of coin ID to price); unchanged rows are left untouched"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO last_prices (coin_id, price, seen_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(coin_id) DO UPDATE SET price = excluded.price, seen_at = excluded.seen_at "
+                "WHERE last_prices.price IS NOT excluded.price",
+                [(coin_id, price, seen_at) for coin_id, price in prices.items()]
+            )
+
+    # --- quote currency ATHs ---
+
+    def quote_aths(self, pairs):
+        """
+        Return stored ATHs (dict of (coin_id, currency) to price)
+
+        Args:
+            pairs: (coin_id, currency) tuples to look up
+        """
+        wanted = set(pairs)
+        coin_ids = sorted({coin_id for coin_id, _ in wanted})
+        rows = []
+        with self._lock:
+            for chunk in _chunks(coin_ids):
+                placeholders = ",".join("?" * len(chunk))
+                rows.extend(self._conn.execute(
+                    f"SELECT coin_id, currency, ath FROM quote_aths WHERE coin_id IN ({placeholders})", chunk
+                ).fetchall())
+        return {(coin_id, currency): ath for coin_id, currency, ath in rows if (coin_id, currency) in wanted}
+
+    def raise_quote_aths(self, aths):
+        """Store ATHs (dict of (coin_id, currency) to price), keeping higher stored ones"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO quote_aths (coin_id, currency, ath) VALUES (?, ?, ?) "
+                "ON CONFLICT(coin_id, currency) DO UPDATE SET ath = excluded.ath WHERE excluded.ath > quote_aths.ath",
+                [(coin_id, currency, ath) for (coin_id, currency), ath in aths.items()]
+            )
+
+    # --- run metadata ---
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM run_meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO run_meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, json.dumps(value))
+            )
+
+    # --- JSON migration ---
+
+    def migrate_json_once(self, kind, path):
+        """
+        Import a legacy JSON state file the first time it is seen
+
+        Args:
+            kind: "52w_stats" or "sent_alerts"
+            path: JSON file to import
+
+        Returns:
+            True if the file was imported by this call
+
+        Raises:
+            ValueError: if the file exists but is not valid JSON (it is
+                retried on the next call)
+        """
+        meta_key = f"migrated:{kind}:{os.path.abspath(path)}"
+        if self.get_meta(meta_key):
+            return False
+
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            self.set_meta(meta_key, True)
+            return False
+
+        if kind == "52w_stats":
+            coins = data.get("coins") if isinstance(data, dict) else None
+            if isinstance(coins, dict):
+                self.upsert_52w_stats(coins)
+            if isinstance(data, dict) and data.get("last_updated"):
+                self.set_meta("52w_last_updated", data["last_updated"])
+        elif kind == "sent_alerts":
+            alerts = data.get("sent_alerts") if isinstance(data, dict) else None
+            if isinstance(alerts, dict) and data.get("date"):
+                self.mark_alerts_sent([key for key, sent in alerts.items() if sent], data["date"])
+        else:
+            raise ValueError(f"Unknown state kind: {kind}")
+
+        self.set_meta(meta_key, True)
+        return True
+
+
+def get_store():
+    """Return the process-wide store configured from the environment"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = StateStore(os.getenv("COINWATCH_DB", DEFAULT_DB_FILE))
+    return _store
+
+
+def reset_store():
+    """Close and forget the process-wide store (used by tests)"""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+        _store = None
+
+
+def main():
+    """Import 52w_stats.json and sent_alerts.json into the database"""
+    import sys
+
+    if sys.argv[1:2] != ["migrate"]:
+        print("Usage: python storage.py migrate [52w_stats.json] [sent_alerts.json]")
+        sys.exit(1)
+
+    stats_file = sys.argv[2] if len(sys.argv) > 2 else "52w_stats.json"
+    alerts_file = sys.argv[3] if len(sys.argv) > 3 else "sent_alerts.json"
+    store = get_store()
+    for kind, path in (("52w_stats", stats_file), ("sent_alerts", alerts_file)):
+        try:
+            imported = store.migrate_json_once(kind, path)
+        except ValueError as e:
+            print(f"❌ Could not import '{path}': {e}")
+            sys.exit(1)
+        print(f"✅ Imported {path}" if imported else f"💡 {path} already imported or not present")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+import random
+import numpy as np
+import pytest
+import alert_engine
+
+
+def make_config(coins):
+    return {"coins": [
+        {"id": coin_id, "name": coin_id.title(), "symbol": coin_id[:3].upper(),
+         "ath_thresholds": ath, "price_alerts": price}
+        for coin_id, ath, price in coins
+    ]}
+
+
+def reference(config, prices, aths, sent):
+    """Per-coin evaluation as check_alerts did it before vectorization"""
+    result = {}
+    for idx, coin in enumerate(config["coins"]):
+        best_ath = best_price = None
+        if aths[idx] and not np.isnan(aths[idx]):
+            drop = (aths[idx] - prices[idx]) / aths[idx] * 100
+            hits = [t for t in coin["ath_thresholds"] if drop >= t and f"{coin['id']}_ath_{t}" not in sent]
+            best_ath = max(hits) if hits else None
+        hits = [p for p in coin["price_alerts"] if prices[idx] <= p and f"{coin['id']}_price_{p}" not in sent]
+        best_price = min(hits) if hits else None
+        result[coin["id"]] = (best_ath, best_price)
+    return result
+
+
+class TestCompile:
+    """Test rule compilation"""
+
+    def test_flat_arrays(self):
+        """Test one entry per rule, ordered by kind, coin and value"""
+        rules = alert_engine.compile_rules(make_config([("btc", [50, 30], [100]), ("eth", [], [5, 2])]))
+        assert len(rules) == 5
+        assert rules.rule_kind.tolist() == [0, 0, 1, 1, 1]
+        assert rules.rule_coin.tolist() == [0, 0, 0, 1, 1]
+        assert rules.rule_value.tolist() == [30, 50, 100, 2, 5]
+
+    def test_sent_mask_from_bits(self):
+        """Test set bits map onto rule positions through the slots"""
+        slots = {("btc", "ath", 30.0): 5, ("btc", "price", 100.5): 0}
+        rules = alert_engine.compile_rules(make_config([("btc", [30], [100.5])]),
+                                           lambda levels: [slots[level] for level in levels])
+        assert rules.sent_mask({"btc": 0b1, "other": 0b1}).tolist() == [False, True]
+        assert rules.sent_mask({"btc": 1 << 5 | 1 << 9}).tolist() == [True, False]
+        assert rules.sent_bits([0, 1]) == {"btc": 1 << 5 | 1}
+
+    def test_duplicate_thresholds_compile_to_one_rule(self):
+        """Test equal levels (80000 and 80000.0) are indexed once"""
+        rules = alert_engine.compile_rules(make_config([("btc", [30, 30], [80000, 80000.0, 70000])]))
+        assert rules.rule_value.tolist() == [30, 70000, 80000]
+        assert rules.rule_slot.tolist() == [0, 1, 2]
+
+    def test_segment_bounds(self):
+        """Test each coin's rules of a kind form one [start, end) segment"""
+        rules = alert_engine.compile_rules(make_config([("btc", [50, 30], [100]), ("eth", [], [5, 2])]))
+        start, end = rules.bounds[alert_engine.PRICE]
+        assert start.tolist() == [2, 3] and end.tolist() == [3, 5]
+        start, end = rules.bounds[alert_engine.ATH]
+        assert (end - start).tolist() == [2, 0]
+
+
+class TestIncrementalCompile:
+    """Test recompiling an edited config"""
+
+    def test_only_changed_coins_recompiled(self):
+        """Test unchanged coins reuse their compilation and slots"""
+        requested = []
+
+        def slot_of(levels):
+            requested.extend(levels)
+            return list(range(100, 100 + len(levels)))
+
+        old = alert_engine.compile_rules(make_config([("btc", [30], [1]), ("eth", [20], []), ("sol", [], [5])]), slot_of)
+        requested.clear()
+        new = alert_engine.compile_rules(make_config([("btc", [30], [1]), ("eth", [20, 40], []), ("ada", [10], [])]),
+                                         slot_of, previous=old)
+
+        assert new.changes == (["ada"], ["sol"], ["eth"])
+        assert {level[0] for level in requested} == {"eth", "ada"}
+        assert new.rule_slot[new.rule_coin == 0].tolist() == old.rule_slot[old.rule_coin == 0].tolist()
+
+    def test_matches_full_compile(self):
+        """Test an incremental compile equals compiling from scratch"""
+        old = alert_engine.compile_rules(make_config([("btc", [30, 50], [1, 2]), ("eth", [20], [])]))
+        config = make_config([("eth", [20], [7]), ("btc", [30, 50], [1, 2])])
+        incremental = alert_engine.compile_rules(config, previous=old)
+        full = alert_engine.compile_rules(config)
+        for attr in ("rule_kind", "rule_coin", "rule_value", "rule_slot"):
+            assert getattr(incremental, attr).tolist() == getattr(full, attr).tolist()
+        assert incremental.rule_raw == full.rule_raw
+
+
+class TestEvaluate:
+    """Test whole-snapshot evaluation"""
+
+    def test_best_rule_per_coin(self):
+        """Test highest ATH drop and lowest price target are picked"""
+        config = make_config([("btc", [10, 30, 50], [60000, 45000, 40000]), ("eth", [20], [])])
+        rules = alert_engine.compile_rules(config)
+        evaluation = alert_engine.evaluate(rules, [42000, 3000], [69000, 3500], rules.sent_mask({}))
+        assert rules.rule_raw[evaluation.best_ath[0]] == 30
+        assert rules.rule_raw[evaluation.best_price[0]] == 45000
+        assert evaluation.best_ath[1] == alert_engine.NO_RULE
+        assert evaluation.alerting_coins().tolist() == [0]
+
+    def test_sent_rules_skipped(self):
+        """Test an already sent best rule falls back to the next one"""
+        rules = alert_engine.compile_rules(make_config([("btc", [10, 30], [])]))
+        evaluation = alert_engine.evaluate(rules, [42000], [69000], rules.sent_mask({"btc": 0b10}))
+        assert rules.rule_raw[evaluation.best_ath[0]] == 10
+
+    def test_triggered_ranges_are_slices(self):
+        """Test triggered levels come back as one slice per coin and kind"""
+        rules = alert_engine.compile_rules(make_config([("btc", [10, 20, 30, 50], [30, 40, 50, 60])]))
+        evaluation = alert_engine.evaluate(rules, [40], [60], rules.sent_mask({}))
+        start, end = (int(a[0]) for a in evaluation.ath_range)
+        assert rules.rule_raw[start:end] == [10, 20, 30]
+        start, end = (int(a[0]) for a in evaluation.price_range)
+        assert rules.rule_raw[start:end] == [40, 50, 60]
+        assert len(evaluation.triggered_rules(0)) == 6
+
+    def test_triggered_rules_skip_sent(self):
+        """Test sent levels inside the triggered slice are left out"""
+        rules = alert_engine.compile_rules(make_config([("btc", [10, 20, 30], [])]))
+        evaluation = alert_engine.evaluate(rules, [40], [100], rules.sent_mask({"btc": 0b10}))
+        assert [rules.rule_raw[i] for i in evaluation.triggered_rules(0)] == [10, 30]
+
+    def test_threshold_equal_to_metric_triggers(self):
+        """Test levels exactly at the drop or price fire"""
+        rules = alert_engine.compile_rules(make_config([("btc", [50], [100])]))
+        evaluation = alert_engine.evaluate(rules, [100], [200], rules.sent_mask({}))
+        assert evaluation.best_ath[0] == 0 and evaluation.best_price[0] == 1
+
+    def test_unknown_prices_never_trigger(self):
+        """Test NaN prices and ATHs trigger nothing"""
+        rules = alert_engine.compile_rules(make_config([("btc", [10], [1e9])]))
+        evaluation = alert_engine.evaluate(rules, [np.nan], [np.nan], rules.sent_mask({}))
+        assert evaluation.triggered_rules(0) == []
+        assert evaluation.alerting_coins().size == 0
+
+    def test_last_ath_segment_excludes_price_rules(self):
+        """Test the final ATH segment does not spill into price rules"""
+        rules = alert_engine.compile_rules(make_config([("btc", [10], [1e9])]))
+        evaluation = alert_engine.evaluate(rules, [100], [105], rules.sent_mask({}))
+        assert evaluation.best_ath[0] == alert_engine.NO_RULE
+        assert rules.rule_raw[evaluation.best_price[0]] == 1e9
+
+    @pytest.mark.parametrize("seed", range(3))
+    def test_matches_per_coin_reference(self, seed):
+        """Test vectorized results equal the per-coin loop on random configs"""
+        rng = random.Random(seed)
+        coins = [(f"coin{i}", rng.sample(range(5, 95, 5), rng.randint(0, 5)),
+                  [round(rng.uniform(1, 100), 2) for _ in range(rng.randint(0, 5))]) for i in range(300)]
+        config = make_config(coins)
+        prices = [rng.uniform(1, 100) for _ in coins]
+        aths = [p * rng.uniform(1, 4) if rng.random() > 0.1 else np.nan for p in prices]
+        rules = alert_engine.compile_rules(config)
+        sent_rules = rng.sample(range(len(rules)), len(rules) // 4)
+        sent = {f"{rules.coin_ids[rules.rule_coin[i]]}_{alert_engine.KIND_NAMES[rules.rule_kind[i]]}_{rules.rule_raw[i]}"
+                for i in sent_rules}
+
+        evaluation = alert_engine.evaluate(rules, prices, aths, rules.sent_mask(rules.sent_bits(sent_rules)))
+        expected = reference(config, prices, aths, sent)
+        for idx, coin_id in enumerate(rules.coin_ids):
+            got_ath = rules.rule_raw[evaluation.best_ath[idx]] if evaluation.best_ath[idx] != -1 else None
+            got_price = rules.rule_raw[evaluation.best_price[idx]] if evaluation.best_price[idx] != -1 else None
+            assert (got_ath, got_price) == expected[coin_id]
+
+
+class TestNextTriggers:
+    """Test the cached next trigger price per coin"""
+
+    def test_highest_unsent_level(self):
+        """Test the trigger is the larger of the price target and the ATH threshold price"""
+        rules = alert_engine.compile_rules(make_config([("btc", [30, 50], [60, 20]), ("eth", [], []),
+                                                        ("sol", [40], [])]))
+        sent = rules.sent_mask({})
+        triggers = alert_engine.next_trigger_prices(rules, [100, np.nan, np.nan], sent)
+        assert triggers[0] == 70
+        assert triggers[1] == -np.inf
+        assert triggers[2] == -np.inf  # ATH rules need an ATH
+
+        sent[[0, 4]] = True  # btc's ATH 30% and price 60 rules
+        triggers = alert_engine.next_trigger_prices(rules, [100, np.nan, np.nan], sent)
+        assert triggers[0] == 50
+
+    def test_candidates_follow_ath_and_sent_state(self):
+        """Test invalidation on alerts and recomputation when the ATH moves"""
+        rules = alert_engine.compile_rules(make_config([("btc", [10], [50])]))
+        sent = rules.sent_mask({})
+        triggers = alert_engine.NextTriggers(rules, sent)
+        assert triggers.candidates([95], [100]).size == 0
+        assert triggers.candidates([90], [100]).tolist() == [0]
+        assert triggers.candidates([95], [110]).tolist() == [0]
+
+        sent[0] = True
+        triggers.invalidate(rules.rule_coin[[0]])
+        assert triggers.candidates([95], [110]).size == 0
+        assert triggers.candidates([50], [110]).tolist() == [0]
+
+    @pytest.mark.parametrize("seed", range(3))
+    def test_never_misses_an_alert(self, seed):
+        """Test gated evaluation triggers exactly what full evaluation does"""
+        rng = random.Random(seed)
+        coins = [(f"coin{i}", rng.sample(range(5, 95, 5), rng.randint(0, 5)),
+                  [round(rng.uniform(1, 100), 2) for _ in range(rng.randint(0, 5))]) for i in range(300)]
+        rules = alert_engine.compile_rules(make_config(coins))
+        sent = rules.sent_mask(rules.sent_bits(rng.sample(range(len(rules)), len(rules) // 4)))
+        triggers = alert_engine.NextTriggers(rules, sent)
+        for _ in range(5):
+            prices = [rng.uniform(1, 100) for _ in coins]
+            aths = [p * rng.uniform(1, 4) if rng.random() > 0.1 else np.nan for p in prices]
+            full = alert_engine.evaluate(rules, prices, aths, sent)
+            gated = alert_engine.evaluate(rules, prices, aths, sent, coins=triggers.candidates(prices, aths))
+            assert full.best_ath.tolist() == gated.best_ath.tolist()
+            assert full.best_price.tolist() == gated.best_price.tolist()
+
+
+class TestCrossIndex:
+    """Test crossing detection over cross_alerts levels"""
+
+    def make_index(self, coins):
+        return alert_engine.CrossIndex([coin["id"] for coin in coins], coins)
+
+    def crossed(self, index, previous, current):
+        return [(index.coin_ids[index.rule_coin[i]], alert_engine.DIRECTION_NAMES[index.rule_direction[i]],
+                 index.rule_raw[i]) for i in index.crossed(previous, current)]
+
+    def test_directions(self):
+        """Test rising prices cross up levels and falling prices down levels"""
+        index = self.make_index([{"id": "btc", "cross_alerts": {"up": [10, 20, 30], "down": [15, 25]}},
+                                 {"id": "eth", "cross_alerts": {"down": [5]}}, {"id": "sol"}])
+        assert self.crossed(index, [12, 6, 1], [30, 5, 2]) == [("btc", "up", 20), ("btc", "up", 30), ("eth", "down", 5)]
+        assert self.crossed(index, [26, 6, 1], [15, 7, 2]) == [("btc", "down", 15), ("btc", "down", 25)]
+
+    def test_boundaries(self):
+        """Test a level counts as crossed on reaching it, not on leaving it"""
+        index = self.make_index([{"id": "btc", "cross_alerts": {"up": [20], "down": [20]}}])
+        assert self.crossed(index, [19], [20]) == [("btc", "up", 20)]
+        assert self.crossed(index, [20], [21]) == []
+        assert self.crossed(index, [21], [20]) == [("btc", "down", 20)]
+        assert self.crossed(index, [20], [19]) == []
+
+    def test_unknown_prices_never_cross(self):
+        """Test NaN previous or current prices cross nothing"""
+        index = self.make_index([{"id": "btc", "cross_alerts": {"up": [20], "down": [10]}}])
+        assert self.crossed(index, [np.nan], [25]) == []
+        assert self.crossed(index, [15], [np.nan]) == []
+
+    def test_matches_linear_scan(self):
+        """Test indexed crossings equal a scan of every level"""
+        rng = random.Random(0)
+        coins = [{"id": f"coin{i}", "cross_alerts": {
+            "up": [rng.randint(1, 100) for _ in range(rng.randint(0, 20))],
+            "down": [rng.randint(1, 100) for _ in range(rng.randint(0, 20))]}} for i in range(200)]
+        index = self.make_index(coins)
+        previous = [rng.randint(1, 100) for _ in coins]
+        current = [rng.randint(1, 100) for _ in coins]
+        expected = sorted(
+            (coin["id"], direction, level)
+            for coin, old, new in zip(coins, previous, current)
+            for direction in ("up", "down")
+            for level in set(coin["cross_alerts"][direction])
+            if (old < level <= new if direction == "up" else new <= level < old)
+        )
+        assert sorted(self.crossed(index, previous, current)) == expected
+
+
+class TestTopK:
+    """Test the bounded top-K selector"""
+
+    def test_keeps_highest(self):
+        """Test only the k highest priorities are kept, in push order"""
+        top = alert_engine.TopK(2)
+        for priority, item in [(1, "a"), (5, "b"), (3, "c"), (4, "d"), (0, "e")]:
+            top.push(priority, item)
+        assert top.items() == ["b", "d"]
+        assert top.deferred == 3
+
+    def test_ties_keep_first(self):
+        """Test equal priorities keep the earliest item"""
+        top = alert_engine.TopK(1)
+        top.push(2, "first")
+        assert top.push(2, "second") == "second"
+        assert top.items() == ["first"]
+
+    def test_unbounded(self):
+        """Test k=None keeps everything"""
+        top = alert_engine.TopK()
+        for i in range(50):
+            top.push(i % 7, i)
+        assert top.items() == list(range(50))
+        assert top.deferred == 0
+
+
+class TestSnapshotArrays:
+    """Test aligning markets data with compiled coins"""
+
+    def test_alignment_and_fallback(self):
+        """Test prices/ATHs land at each coin's index with ATH fallback"""
+        rules = alert_engine.compile_rules(make_config([("btc", [10], []), ("eth", [10], []), ("sol", [], [])]))
+        current_data = [{"id": "eth", "current_price": 3000, "ath": None},
+                        {"id": "btc", "current_price": 40000, "ath": 69000},
+                        {"id": "doge", "current_price": 0.1}]
+        prices, aths, positions = alert_engine.snapshot_arrays(rules, current_data, {"eth": 4800})
+        assert prices[:2].tolist() == [40000, 3000]
+        assert aths[:2].tolist() == [69000, 4800]
+        assert positions.tolist() == [1, 0, -1]
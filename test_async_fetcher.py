@@ -0,0 +1,53 @@
+import threading
+import time
+import async_fetcher
+
+
+class TestFetchAll:
+    """Test the concurrent fetch engine"""
+
+    def test_returns_result_per_item(self):
+        """Test every item gets its result"""
+        results = async_fetcher.fetch_all(["a", "b", "c"], lambda item: item.upper())
+        assert results == {"a": "A", "b": "B", "c": "C"}
+
+    def test_empty_items(self):
+        """Test an empty item list returns no results"""
+        assert async_fetcher.fetch_all([], lambda item: item) == {}
+
+    def test_concurrency_is_bounded(self):
+        """Test no more than `concurrency` fetches run at once"""
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def slow_fetch(item):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.02)
+            with lock:
+                state["active"] -= 1
+            return item
+
+        async_fetcher.fetch_all(range(10), slow_fetch, concurrency=3)
+        assert 1 < state["peak"] <= 3
+
+    def test_results_stream_in_completion_order(self):
+        """Test on_result fires as each fetch completes, not in input order"""
+        delays = {"slow": 0.1, "fast": 0.0}
+        order = []
+
+        def fetch(item):
+            time.sleep(delays[item])
+            return item
+
+        async_fetcher.fetch_all(["slow", "fast"], fetch, concurrency=2,
+                                on_result=lambda item, result: order.append(item))
+        assert order == ["fast", "slow"]
+
+    def test_concurrency_from_env(self, monkeypatch):
+        """Test concurrency can be configured through the environment"""
+        monkeypatch.setenv("COINWATCH_CONCURRENCY", "16")
+        assert async_fetcher.get_concurrency() == 16
+        monkeypatch.setenv("COINWATCH_CONCURRENCY", "many")
+        assert async_fetcher.get_concurrency() == async_fetcher.DEFAULT_CONCURRENCY
@@ -0,0 +1,106 @@
+import pytest
+import circuit_breaker
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(tmp_path, clock):
+    return circuit_breaker.CircuitBreaker(
+        state_file=str(tmp_path / "breaker.json"),
+        failure_threshold=3,
+        reset_timeout=300,
+        probe_timeout=60,
+        clock=clock
+    )
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions"""
+
+    def test_closed_allows_requests(self, breaker):
+        """Test a fresh breaker lets requests through"""
+        breaker.before_request()
+        assert breaker.state() == circuit_breaker.CLOSED
+
+    def test_opens_after_threshold(self, breaker):
+        """Test repeated failures open the circuit"""
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state() == circuit_breaker.CLOSED
+        breaker.record_failure()
+        assert breaker.state() == circuit_breaker.OPEN
+
+    def test_success_resets_failure_count(self, breaker):
+        """Test failures must be consecutive to open the circuit"""
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state() == circuit_breaker.CLOSED
+
+    def test_open_fails_fast(self, breaker):
+        """Test requests raise immediately while open"""
+        trip(breaker)
+        with pytest.raises(circuit_breaker.CircuitOpenError) as exc_info:
+            breaker.before_request()
+        assert exc_info.value.retry_in == pytest.approx(300)
+
+    def test_half_open_allows_single_probe(self, breaker, clock):
+        """Test only one probe goes through after the cool-down"""
+        trip(breaker)
+        clock.now += 301
+        breaker.before_request()  # the probe
+        assert breaker.state() == circuit_breaker.HALF_OPEN
+        with pytest.raises(circuit_breaker.CircuitOpenError):
+            breaker.before_request()
+
+    def test_probe_success_closes(self, breaker, clock):
+        """Test a successful probe closes the circuit"""
+        trip(breaker)
+        clock.now += 301
+        breaker.before_request()
+        breaker.record_success()
+        assert breaker.state() == circuit_breaker.CLOSED
+        breaker.before_request()
+
+    def test_probe_failure_reopens(self, breaker, clock):
+        """Test a failed probe re-opens the circuit for another cool-down"""
+        trip(breaker)
+        clock.now += 301
+        breaker.before_request()
+        breaker.record_failure()
+        assert breaker.state() == circuit_breaker.OPEN
+        with pytest.raises(circuit_breaker.CircuitOpenError):
+            breaker.before_request()
+
+    def test_stale_probe_is_replaced(self, breaker, clock):
+        """Test a probe that never reported back does not block forever"""
+        trip(breaker)
+        clock.now += 301
+        breaker.before_request()
+        clock.now += 61
+        breaker.before_request()
+
+    def test_state_survives_new_instance(self, breaker, tmp_path, clock):
+        """Test the open state is visible to another process"""
+        trip(breaker)
+        other = circuit_breaker.CircuitBreaker(state_file=breaker.state_file, clock=clock)
+        with pytest.raises(circuit_breaker.CircuitOpenError):
+            other.before_request()
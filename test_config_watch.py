@@ -0,0 +1,67 @@
+import os
+import pytest
+import config_watch
+
+
+@pytest.fixture(params=[True, False], ids=["inotify", "poll"])
+def use_inotify(request):
+    return request.param
+
+
+def bump(path, content):
+    """Write content with a distinct mtime"""
+    path.write_text(content)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+class TestFileWatcher:
+    """Test config file change detection"""
+
+    def test_no_change(self, tmp_path, use_inotify):
+        """Test an untouched file is not reported"""
+        path = tmp_path / "coins_config.json"
+        path.write_text("{}")
+        watcher = config_watch.FileWatcher([str(path)], use_inotify=use_inotify)
+        assert watcher.changed() == set()
+        watcher.close()
+
+    def test_in_place_write(self, tmp_path, use_inotify):
+        """Test rewriting the file is reported once"""
+        path = tmp_path / "coins_config.json"
+        path.write_text("{}")
+        watcher = config_watch.FileWatcher([str(path)], use_inotify=use_inotify)
+        bump(path, '{"coins": []}')
+        assert watcher.changed() == {str(path)}
+        assert watcher.changed() == set()
+        watcher.close()
+
+    def test_atomic_replace(self, tmp_path, use_inotify):
+        """Test replacing the file via rename is reported"""
+        path = tmp_path / "coins_config.json"
+        path.write_text("{}")
+        watcher = config_watch.FileWatcher([str(path)], use_inotify=use_inotify)
+        tmp = tmp_path / "coins_config.json.tmp"
+        tmp.write_text('{"coins": []}')
+        os.replace(tmp, path)
+        assert watcher.changed() == {str(path)}
+        watcher.close()
+
+    def test_other_files_ignored(self, tmp_path, use_inotify):
+        """Test changes to unwatched files in the directory are not reported"""
+        path = tmp_path / "coins_config.json"
+        path.write_text("{}")
+        watcher = config_watch.FileWatcher([str(path)], use_inotify=use_inotify)
+        (tmp_path / "crypto_alert.log").write_text("line")
+        assert watcher.changed() == set()
+        watcher.close()
+
+    def test_forget_reports_again(self, tmp_path, use_inotify):
+        """Test a forgotten file is re-reported on the next check"""
+        path = tmp_path / "coins_config.json"
+        path.write_text("{}")
+        watcher = config_watch.FileWatcher([str(path)], use_inotify=use_inotify)
+        watcher.forget(str(path))
+        assert watcher.changed() == {str(path)}
+        assert watcher.changed() == set()
+        watcher.close()
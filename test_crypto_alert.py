@@ -1,9 +1,12 @@
 import pytest
 import json
 import os
-from datetime import date
+from datetime import date, datetime
 from unittest.mock import patch, mock_open, MagicMock
+from urllib.parse import urlencode
 import crypto_alert
+import rearm
+import storage
 
 
 @pytest.fixture
@@ -100,7 +103,7 @@ class TestAlertTracking:
         with patch("builtins.open", mock_open(read_data=mock_file_content)):
             result = crypto_alert.load_sent_alerts(sample_alert_config)
             assert result["date"] == str(date.today())
-            assert "bitcoin_ath_30" in result["sent_alerts"]
+            assert result["sent_bits"]["bitcoin"] == storage.get_store().key_masks(["bitcoin_ath_30"])["bitcoin"]
 
     def test_load_sent_alerts_new_day(self, sample_alert_config):
         """Test alert reset on new day"""
@@ -114,24 +117,67 @@ class TestAlertTracking:
         with patch("builtins.open", mock_open(read_data=mock_file_content)):
             result = crypto_alert.load_sent_alerts(sample_alert_config)
             assert result["date"] == str(date.today())
-            assert result["sent_alerts"] == {}
+            assert result["sent_bits"] == {}
 
     def test_load_sent_alerts_file_not_found(self, sample_alert_config):
         """Test creating new tracking when file doesn't exist"""
         with patch("builtins.open", side_effect=FileNotFoundError):
             result = crypto_alert.load_sent_alerts(sample_alert_config)
             assert result["date"] == str(date.today())
-            assert result["sent_alerts"] == {}
+            assert result["sent_bits"] == {}
 
     def test_save_sent_alerts(self, sample_alert_config, sample_sent_alerts):
         """Test saving alert tracking data"""
-        mock_file = mock_open()
-        with patch("builtins.open", mock_file):
-            crypto_alert.save_sent_alerts(sample_sent_alerts, sample_alert_config)
-            mock_file.assert_called_once_with("sent_alerts.json", 'w')
-            handle = mock_file()
-            written_data = "".join(call.args[0] for call in handle.write.call_args_list)
-            assert "bitcoin_ath_30" in written_data
+        store = storage.get_store()
+        bits = store.key_masks(sample_sent_alerts["sent_alerts"])
+        crypto_alert.save_sent_alerts({"date": sample_sent_alerts["date"], "sent_bits": bits}, sample_alert_config)
+        with patch("builtins.open", side_effect=FileNotFoundError):
+            result = crypto_alert.load_sent_alerts(sample_alert_config)
+        assert result["sent_bits"] == bits
+        # Rearm states are the single record; no per-day masks accumulate
+        assert set(store.alert_states()) == {"bitcoin", "ethereum"}
+        assert store.sent_masks() == {}
+
+    def test_load_sent_alerts_for_coins(self, sample_alert_config, sample_sent_alerts):
+        """Test only the requested coins' masks are read"""
+        bits = storage.get_store().key_masks(sample_sent_alerts["sent_alerts"])
+        crypto_alert.save_sent_alerts({"date": sample_sent_alerts["date"], "sent_bits": bits}, sample_alert_config)
+        with patch("builtins.open", side_effect=FileNotFoundError):
+            result = crypto_alert.load_sent_alerts(sample_alert_config, ["ethereum"])
+        assert result["sent_bits"] == {"ethereum": bits["ethereum"]}
+
+    def test_legacy_file_imported_once(self, sample_alert_config, sample_sent_alerts):
+        """Test the JSON tracking file is migrated on first load only"""
+        with patch("builtins.open", mock_open(read_data=json.dumps(sample_sent_alerts))) as mock_file:
+            crypto_alert.load_sent_alerts(sample_alert_config)
+            crypto_alert.load_sent_alerts(sample_alert_config)
+        assert mock_file.call_count == 1
+
+    def test_sent_alerts_without_daily_reset(self, sample_sent_alerts):
+        """Test alerts from earlier days still count when daily reset is off"""
+        alert_config = {"reset_alerts_daily": False, "alert_tracking_file": "sent_alerts.json"}
+        bits = storage.get_store().key_masks(["bitcoin_ath_30"])
+        crypto_alert.save_sent_alerts({"date": "2024-01-01", "sent_bits": bits}, alert_config)
+        with patch("builtins.open", side_effect=FileNotFoundError):
+            result = crypto_alert.load_sent_alerts(alert_config)
+        assert result["sent_bits"] == bits
+
+    def test_check_alerts_saves_only_new_keys(self):
+        """Test a run records just the alerts it triggered"""
+        coins_config = {"coins": [{"id": "bitcoin", "name": "Bitcoin", "symbol": "BTC",
+                                   "ath_thresholds": [30, 40], "price_alerts": []}]}
+        sent_alerts_data = {"date": str(date.today()),
+                            "sent_bits": storage.get_store().key_masks(["bitcoin_ath_30"])}
+
+        with patch("crypto_alert.load_coins_config", return_value=coins_config), \
+             patch("crypto_alert.load_alert_config", return_value={"reset_alerts_daily": True}), \
+             patch("crypto_alert.load_sent_alerts", return_value=sent_alerts_data), \
+             patch("crypto_alert.load_52w_stats", return_value={"coins": {}}), \
+             patch("crypto_alert.save_sent_alerts") as mock_save, \
+             patch("crypto_alert.get_current_prices", return_value=[{"id": "bitcoin", "current_price": 40000, "ath": 69000}]):
+            crypto_alert.check_alerts()
+
+        assert mock_save.call_args[0][0]["sent_bits"] == storage.get_store().key_masks(["bitcoin_ath_40"])
 
 
 class TestAPIFunctions:
@@ -149,7 +195,7 @@ class TestAPIFunctions:
         ]
         mock_response.raise_for_status = MagicMock()
 
-        with patch("requests.get", return_value=mock_response):
+        with patch("http_client.get", return_value=mock_response):
             result = crypto_alert.get_current_prices(["bitcoin"])
             assert len(result) == 1
             assert result[0]["id"] == "bitcoin"
@@ -158,7 +204,7 @@ class TestAPIFunctions:
     def test_get_current_prices_api_error(self):
         """Test handling of API errors"""
         import requests
-        with patch("requests.get", side_effect=requests.exceptions.RequestException("API Error")):
+        with patch("http_client.get", side_effect=requests.exceptions.RequestException("API Error")):
             result = crypto_alert.get_current_prices(["bitcoin"])
             assert result is None
 
@@ -175,11 +221,87 @@ class TestAPIFunctions:
         }
         mock_response.raise_for_status = MagicMock()
 
-        with patch("requests.get", return_value=mock_response):
+        with patch("http_client.get", return_value=mock_response):
             result = crypto_alert.get_ath_price("bitcoin")
             assert result["market_data"]["ath"]["usd"] == 69000
 
 
+class TestMarketsBatching:
+    """Test chunked, paginated markets fetching"""
+
+    def test_chunk_coin_ids_respects_count_limit(self):
+        """Test chunks never exceed the per-page ID count"""
+        coin_ids = [f"coin-{i}" for i in range(600)]
+        chunks = crypto_alert.chunk_coin_ids(coin_ids, max_ids=250, max_query_length=100000)
+        assert [len(c) for c in chunks] == [250, 250, 100]
+        assert sum(chunks, []) == coin_ids
+
+    def test_chunk_coin_ids_respects_query_length(self):
+        """Test comma-joined IDs stay under the query length limit"""
+        coin_ids = [f"some-long-coin-name-{i}" for i in range(300)]
+        chunks = crypto_alert.chunk_coin_ids(coin_ids, max_ids=250, max_query_length=460)
+        assert all(len(urlencode({"ids": ",".join(c)})) - len("ids=") <= 460 for c in chunks)
+        assert sum(chunks, []) == coin_ids
+
+    def test_full_chunk_fetches_one_page(self):
+        """Test a chunk of exactly one page's worth of IDs is not paged further"""
+        coin_ids = [f"c{i}" for i in range(crypto_alert.MARKETS_PER_PAGE)]
+        with patch("crypto_alert.fetch_markets_page",
+                   side_effect=lambda ids_chunk, page, use_cache=True: [{"id": i} for i in ids_chunk]) as mock_page:
+            snapshot, missing = crypto_alert.fetch_markets_snapshot(coin_ids)
+        assert mock_page.call_count == 1
+        assert len(snapshot) == len(coin_ids) and missing == []
+
+    def test_snapshot_pages_and_merges(self):
+        """Test full pages trigger the next page and results are merged"""
+        coin_ids = [f"coin-{i}" for i in range(300)]
+        pages = {}
+
+        def fake_page(ids_chunk, page, use_cache=True):
+            pages.setdefault(tuple(ids_chunk), []).append(page)
+            start = (page - 1) * crypto_alert.MARKETS_PER_PAGE
+            return [{"id": coin_id} for coin_id in ids_chunk[start:start + crypto_alert.MARKETS_PER_PAGE]]
+
+        with patch("crypto_alert.chunk_coin_ids", return_value=[coin_ids]), \
+             patch("crypto_alert.fetch_markets_page", side_effect=fake_page):
+            snapshot, missing = crypto_alert.fetch_markets_snapshot(coin_ids)
+
+        assert len(snapshot) == 300
+        assert missing == []
+        assert pages[tuple(coin_ids)] == [1, 2]
+
+    def test_snapshot_reports_missing_ids(self):
+        """Test IDs absent from the response are reported"""
+        with patch("crypto_alert.fetch_markets_page", return_value=[{"id": "bitcoin"}]):
+            snapshot, missing = crypto_alert.fetch_markets_snapshot(["bitcoin", "not-a-coin"])
+        assert [e["id"] for e in snapshot] == ["bitcoin"]
+        assert missing == ["not-a-coin"]
+
+    def test_snapshot_keeps_partial_results(self):
+        """Test a failed chunk does not discard chunks that succeeded"""
+        def fake_page(ids_chunk, page, use_cache=True):
+            if ids_chunk == ["ethereum"]:
+                return None
+            return [{"id": coin_id} for coin_id in ids_chunk]
+
+        with patch("crypto_alert.chunk_coin_ids", return_value=[["bitcoin"], ["ethereum"]]), \
+             patch("crypto_alert.fetch_markets_page", side_effect=fake_page):
+            snapshot, missing = crypto_alert.fetch_markets_snapshot(["bitcoin", "ethereum"])
+        assert [e["id"] for e in snapshot] == ["bitcoin"]
+        assert missing == ["ethereum"]
+
+    def test_markets_page_circuit_open(self):
+        """Test an open circuit makes the markets fetch fail fast"""
+        import circuit_breaker
+        with patch("http_client.get", side_effect=circuit_breaker.CircuitOpenError(120)):
+            assert crypto_alert.fetch_markets_page(["bitcoin"], 1) is None
+
+    def test_snapshot_all_failed(self):
+        """Test None is returned when nothing could be fetched"""
+        with patch("crypto_alert.fetch_markets_page", return_value=None):
+            assert crypto_alert.get_current_prices(["bitcoin"]) is None
+
+
 class TestAlertLogic:
     """Test alert triggering logic"""
 
@@ -196,21 +318,14 @@ class TestAlertLogic:
         current_prices = [
             {
                 "id": "bitcoin",
-                "current_price": 48300  # 30% drop from 69000
+                "current_price": 48300,  # 30% drop from 69000
+                "ath": 69000
             }
         ]
 
-        ath_data = {
-            "market_data": {
-                "ath": {
-                    "usd": 69000
-                }
-            }
-        }
-
         sent_alerts_data = {
             "date": str(date.today()),
-            "sent_alerts": {}
+            "sent_bits": {}
         }
 
         with patch("crypto_alert.load_coins_config", return_value=sample_coins_config), \
@@ -218,8 +333,7 @@ class TestAlertLogic:
              patch("crypto_alert.load_sent_alerts", return_value=sent_alerts_data), \
              patch("crypto_alert.save_sent_alerts"), \
              patch("crypto_alert.get_current_prices", return_value=current_prices), \
-             patch("crypto_alert.get_ath_price", return_value=ath_data), \
-             patch("time.sleep"):
+             patch("crypto_alert.get_ath_price") as mock_ath:
 
             alerts = crypto_alert.check_alerts()
 
@@ -228,6 +342,45 @@ class TestAlertLogic:
             assert len(ath_alerts) == 1
             assert ath_alerts[0]["threshold"] == 30
             assert abs(ath_alerts[0]["dropPercent"] - 30.0) < 0.1
+            # ATH comes from the markets batch, no per-coin request
+            assert not mock_ath.called
+
+    def test_ath_fallback_fetch_when_enabled(self, sample_coins_config):
+        """Test per-coin ATH fetch is used only when opted in and ATH is missing"""
+        current_prices = [{"id": "bitcoin", "current_price": 48300}]
+        ath_data = {"market_data": {"ath": {"usd": 69000}}}
+        sent_alerts_data = {"date": str(date.today()), "sent_bits": {}}
+        alert_config = {"reset_alerts_daily": True, "ath_fallback_fetch": True}
+
+        with patch("crypto_alert.load_coins_config", return_value=sample_coins_config), \
+             patch("crypto_alert.load_alert_config", return_value=alert_config), \
+             patch("crypto_alert.load_sent_alerts", return_value=sent_alerts_data), \
+             patch("crypto_alert.save_sent_alerts"), \
+             patch("crypto_alert.get_current_prices", return_value=current_prices), \
+             patch("crypto_alert.get_ath_price", return_value=ath_data) as mock_ath, \
+             patch("time.sleep"):
+
+            alerts = crypto_alert.check_alerts()
+
+            mock_ath.assert_called_once_with("bitcoin")
+            assert any(a["type"] == "ath" and a["threshold"] == 30 for a in alerts)
+
+    def test_ath_missing_without_fallback(self, sample_coins_config, sample_alert_config):
+        """Test ATH check is skipped when markets data has no ATH and fallback is off"""
+        current_prices = [{"id": "bitcoin", "current_price": 48300}]
+        sent_alerts_data = {"date": str(date.today()), "sent_bits": {}}
+
+        with patch("crypto_alert.load_coins_config", return_value=sample_coins_config), \
+             patch("crypto_alert.load_alert_config", return_value=sample_alert_config), \
+             patch("crypto_alert.load_sent_alerts", return_value=sent_alerts_data), \
+             patch("crypto_alert.save_sent_alerts"), \
+             patch("crypto_alert.get_current_prices", return_value=current_prices), \
+             patch("crypto_alert.get_ath_price") as mock_ath:
+
+            alerts = crypto_alert.check_alerts()
+
+            assert not mock_ath.called
+            assert not any(a["type"] == "ath" for a in alerts)
 
     def test_price_alert_triggers_correctly(self, sample_coins_config, sample_alert_config):
         """Test that price alert triggers when price drops below target"""
@@ -240,7 +393,7 @@ class TestAlertLogic:
 
         sent_alerts_data = {
             "date": str(date.today()),
-            "sent_alerts": {}
+            "sent_bits": {}
         }
 
         with patch("crypto_alert.load_coins_config", return_value=sample_coins_config), \
@@ -269,9 +422,7 @@ class TestAlertLogic:
 
         sent_alerts_data = {
             "date": str(date.today()),
-            "sent_alerts": {
-                "bitcoin_price_70000": True  # Already sent
-            }
+            "sent_bits": storage.get_store().key_masks(["bitcoin_price_70000"])  # Already sent
         }
 
         with patch("crypto_alert.load_coins_config", return_value=sample_coins_config), \
@@ -289,6 +440,63 @@ class TestAlertLogic:
             assert len(price_alerts_70k) == 0
 
 
+class TestAlertLimit:
+    """Test max_alerts_per_run"""
+
+    coins_config = {"coins": [
+        {"id": coin_id, "name": coin_id.title(), "symbol": coin_id[:3].upper(),
+         "ath_thresholds": [], "price_alerts": [100]}
+        for coin_id in ("alpha", "beta", "gamma", "delta")
+    ]}
+    # 10%, 40%, 20% and 30% below the 100 target; market cap ranks 4, 3, 2, 1
+    current_prices = [
+        {"id": "alpha", "current_price": 90, "ath": 200, "market_cap_rank": 4},
+        {"id": "beta", "current_price": 60, "ath": 120, "market_cap_rank": 3},
+        {"id": "gamma", "current_price": 80, "ath": 400, "market_cap_rank": 2},
+        {"id": "delta", "current_price": 70, "ath": 100, "market_cap_rank": 1},
+    ]
+
+    def run(self, alert_config):
+        with patch("crypto_alert.load_coins_config", return_value=self.coins_config), \
+             patch("crypto_alert.load_alert_config", return_value=alert_config), \
+             patch("crypto_alert.load_sent_alerts", return_value={"date": str(date.today()), "sent_bits": {}}), \
+             patch("crypto_alert.load_52w_stats", return_value={"coins": {}}), \
+             patch("crypto_alert.save_sent_alerts") as mock_save, \
+             patch("crypto_alert.get_current_prices", return_value=self.current_prices):
+            alerts = crypto_alert.check_alerts()
+        saved = mock_save.call_args[0][0]["sent_bits"] if mock_save.called else {}
+        return [alert["crypto"].split()[0] for alert in alerts], set(saved)
+
+    def test_deepest_alerts_selected(self):
+        """Test the default priority keeps the alerts furthest past their target"""
+        names, saved = self.run({"max_alerts_per_run": 2})
+        assert names == ["Beta", "Delta"]
+        assert saved == {"beta", "delta"}
+
+    def test_market_cap_rank_priority(self):
+        """Test ranking by market cap rank"""
+        names, _ = self.run({"max_alerts_per_run": 2, "alert_priority": "market_cap_rank"})
+        assert names == ["Gamma", "Delta"]
+
+    def test_ath_drop_priority(self):
+        """Test ranking by drop from ATH"""
+        names, _ = self.run({"max_alerts_per_run": 1, "alert_priority": "ath_drop"})
+        assert names == ["Gamma"]
+
+    def test_unlimited_without_setting(self):
+        """Test every alert is returned when no limit is configured"""
+        names, saved = self.run({})
+        assert names == ["Alpha", "Beta", "Gamma", "Delta"]
+        assert len(saved) == 4
+
+    def test_alert_priority_depth(self):
+        """Test depth is measured below the triggering price"""
+        ath_alert = {"type": "ath", "athPrice": 100, "threshold": 50, "currentPrice": 40}
+        price_alert = {"type": "price", "targetPrice": 50, "currentPrice": 45}
+        assert crypto_alert.alert_priority(ath_alert, "depth") == pytest.approx(20)
+        assert crypto_alert.alert_priority(price_alert, "depth") == pytest.approx(10)
+
+
 class TestDryRunMode:
     """Test dry run mode functionality"""
 
@@ -305,7 +513,7 @@ class TestDryRunMode:
             }
         ]
 
-        with patch("requests.post") as mock_post:
+        with patch("http_client.post") as mock_post:
             crypto_alert.send_discord_alert(alerts, dry_run=True)
             # Discord webhook should NOT be called in dry run
             assert not mock_post.called
@@ -324,9 +532,8 @@ class TestDryRunMode:
             ]
         }
 
-        current_prices = [{"id": "bitcoin", "current_price": 48300}]
-        ath_data = {"market_data": {"ath": {"usd": 69000}}}
-        sent_alerts_data = {"date": str(date.today()), "sent_alerts": {}}
+        current_prices = [{"id": "bitcoin", "current_price": 48300, "ath": 69000}]
+        sent_alerts_data = {"date": str(date.today()), "sent_bits": {}}
         alert_config = {"reset_alerts_daily": True}
 
         with patch("crypto_alert.load_coins_config", return_value=sample_coins_config), \
@@ -334,9 +541,7 @@ class TestDryRunMode:
              patch("crypto_alert.load_sent_alerts", return_value=sent_alerts_data), \
              patch("crypto_alert.load_52w_stats", return_value={"coins": {}}), \
              patch("crypto_alert.save_sent_alerts") as mock_save, \
-             patch("crypto_alert.get_current_prices", return_value=current_prices), \
-             patch("crypto_alert.get_ath_price", return_value=ath_data), \
-             patch("time.sleep"):
+             patch("crypto_alert.get_current_prices", return_value=current_prices):
 
             alerts = crypto_alert.check_alerts(dry_run=True)
 
@@ -358,9 +563,8 @@ class TestDryRunMode:
             ]
         }
 
-        current_prices = [{"id": "bitcoin", "current_price": 48300}]
-        ath_data = {"market_data": {"ath": {"usd": 69000}}}
-        sent_alerts_data = {"date": str(date.today()), "sent_alerts": {}}
+        current_prices = [{"id": "bitcoin", "current_price": 48300, "ath": 69000}]
+        sent_alerts_data = {"date": str(date.today()), "sent_bits": {}}
         alert_config = {"reset_alerts_daily": True}
 
         with patch("crypto_alert.load_coins_config", return_value=sample_coins_config), \
@@ -368,9 +572,7 @@ class TestDryRunMode:
              patch("crypto_alert.load_sent_alerts", return_value=sent_alerts_data), \
              patch("crypto_alert.load_52w_stats", return_value={"coins": {}}), \
              patch("crypto_alert.save_sent_alerts"), \
-             patch("crypto_alert.get_current_prices", return_value=current_prices), \
-             patch("crypto_alert.get_ath_price", return_value=ath_data), \
-             patch("time.sleep"):
+             patch("crypto_alert.get_current_prices", return_value=current_prices):
 
             alerts = crypto_alert.check_alerts(dry_run=True)
 
@@ -380,6 +582,414 @@ class TestDryRunMode:
             assert alerts[0]["crypto"] == "Bitcoin (BTC)"
 
 
+class TestDaemonMode:
+    """Test the long-running daemon"""
+
+    def test_next_tick_delay_is_drift_free(self):
+        """Test ticks stay on the start + k * interval grid"""
+        assert crypto_alert.next_tick_delay(100.0, 60, 100.0) == 60
+        assert crypto_alert.next_tick_delay(100.0, 60, 103.5) == 56.5
+        assert crypto_alert.next_tick_delay(100.0, 60, 161.0) == 59
+
+    def test_next_tick_delay_skips_missed_ticks(self):
+        """Test a check overrunning several intervals waits for the next slot"""
+        assert crypto_alert.next_tick_delay(0.0, 60, 150.0) == 30
+
+    def test_state_kept_between_ticks(self):
+        """Test config and state load once and sent alerts apply in memory"""
+        coins_config = {"coins": [{"id": "bitcoin", "name": "Bitcoin", "symbol": "BTC",
+                                   "ath_thresholds": [30], "price_alerts": []}]}
+        stop_event = MagicMock()
+        stop_event.is_set.return_value = False
+
+        with patch("crypto_alert.load_coins_config", return_value=coins_config) as mock_coins, \
+             patch("crypto_alert.load_alert_config", return_value={"check_interval_minutes": 5}), \
+             patch("crypto_alert.load_52w_stats", return_value={"coins": {}}) as mock_stats, \
+             patch("crypto_alert.send_discord_alert") as mock_send, \
+             patch("crypto_alert.save_sent_alerts") as mock_save, \
+             patch("crypto_alert.get_current_prices",
+                   return_value=[{"id": "bitcoin", "current_price": 40000, "ath": 69000}]) as mock_prices:
+            crypto_alert.run_daemon(stop_event=stop_event, max_ticks=3)
+
+        assert mock_coins.call_count == 1
+        assert mock_stats.call_count == 1
+        assert mock_send.call_count == 1
+        assert mock_save.call_count == 1
+        assert stop_event.wait.call_count == 2
+        assert 0 < stop_event.wait.call_args[0][0] <= 300
+        # Every tick fetches fresh prices rather than a cached snapshot
+        assert mock_prices.call_args.kwargs["use_cache"] is False
+
+    def test_stats_reloaded_after_update(self):
+        """Test 52w stats are re-read once the updater writes new ones"""
+        coins_config = {"coins": [{"id": "bitcoin", "name": "Bitcoin", "symbol": "BTC",
+                                   "ath_thresholds": [], "price_alerts": [1]}]}
+        context = crypto_alert.AlertContext()
+        with patch("crypto_alert.load_coins_config", return_value=coins_config), \
+             patch("crypto_alert.load_alert_config", return_value={}), \
+             patch("crypto_alert.load_52w_stats", return_value={"coins": {}, "last_updated": None}) as mock_stats:
+            context.load_config()
+            context.load_state()
+            context.load_state()
+            storage.get_store().set_meta("52w_last_updated", "2024-01-02T00:00:00")
+            context.load_state()
+        assert mock_stats.call_count == 2
+
+    def test_next_trigger_lowered_after_alert(self):
+        """Test the cached next trigger price moves past a level once it is sent"""
+        coins_config = {"coins": [{"id": "bitcoin", "name": "Bitcoin", "symbol": "BTC",
+                                   "ath_thresholds": [], "price_alerts": [50000, 30000]}]}
+        context = crypto_alert.AlertContext()
+        with patch("crypto_alert.load_coins_config", return_value=coins_config), \
+             patch("crypto_alert.load_alert_config", return_value={}), \
+             patch("crypto_alert.load_52w_stats", return_value={"coins": {}}), \
+             patch("crypto_alert.save_sent_alerts"), \
+             patch("crypto_alert.get_current_prices",
+                   return_value=[{"id": "bitcoin", "current_price": 40000, "ath": 69000}]):
+            assert crypto_alert.check_alerts(context=context)
+            assert context.next_triggers().prices.tolist() == [30000]
+            assert crypto_alert.check_alerts(context=context) == []
+
+    def test_failed_tick_does_not_stop_daemon(self):
+        """Test an exception in one check is logged and the loop continues"""
+        stop_event = MagicMock()
+        stop_event.is_set.return_value = False
+        with patch("crypto_alert.load_coins_config", return_value={"coins": []}), \
+             patch("crypto_alert.load_alert_config", return_value={}), \
+             patch("crypto_alert.run_check", side_effect=[RuntimeError("boom"), []]) as mock_check:
+            crypto_alert.run_daemon(stop_event=stop_event, max_ticks=2)
+        assert mock_check.call_count == 2
+
+
+class TestConfigReload:
+    """Test applying config edits in daemon mode"""
+
+    def make_context(self, coins):
+        context = crypto_alert.AlertContext()
+        with patch("crypto_alert.load_coins_config", return_value={"coins": coins}), \
+             patch("crypto_alert.load_alert_config", return_value={}), \
+             patch("crypto_alert.load_52w_stats", return_value={"coins": {c["id"]: {"high_52w": 1.0} for c in coins}}):
+            context.load_config()
+            context.load_state()
+        return context
+
+    def coin(self, coin_id, ath=(), price=()):
+        return {"id": coin_id, "name": coin_id.title(), "symbol": coin_id[:3].upper(),
+                "ath_thresholds": list(ath), "price_alerts": list(price)}
+
+    def test_reload_is_incremental(self):
+        """Test only added coins are read and unchanged coins keep their sent state"""
+        context = self.make_context([self.coin("bitcoin", [30]), self.coin("solana", [20])])
+        context.record_sent([0])
+        new_coins = [self.coin("bitcoin", [30]), self.coin("ethereum", [], [2000])]
+
+        with patch("crypto_alert.load_coins_config", return_value={"coins": new_coins}), \
+             patch("crypto_alert.load_alert_config", return_value={}), \
+             patch("crypto_alert.load_sent_alerts", return_value={"date": None, "sent_bits": {}}) as mock_sent, \
+             patch("crypto_alert.load_52w_stats", return_value={"coins": {"ethereum": {"high_52w": 2.0}}}) as mock_stats:
+            assert context.reload_config() is True
+
+        mock_sent.assert_called_once_with({}, ["ethereum"])
+        mock_stats.assert_called_once_with(["ethereum"])
+        assert context.rules.changes == (["ethereum"], ["solana"], [])
+        assert set(context.stats_52w["coins"]) == {"bitcoin", "ethereum"}
+        assert context.sent_mask.tolist() == [True, False]
+
+    def test_currency_switch_rereads_sent_state(self):
+        """Test a coin moved to another quote currency gets its stored state for that currency"""
+        context = self.make_context([self.coin("bitcoin", [], [50000])])
+        context.record_sent([0])
+        store = storage.get_store()
+        eur_slot = store.alert_slots([("bitcoin", "price.eur", 50000)])[0]
+        store.set_alert_states({("bitcoin", eur_slot): (rearm.FIRED, datetime.now().timestamp())})
+
+        for currency, sent in (("eur", True), ("gbp", False)):
+            coins = [{**self.coin("bitcoin", [], [50000]), "quote_currency": currency}]
+            with patch("crypto_alert.load_coins_config", return_value={"coins": coins}), \
+                 patch("crypto_alert.load_alert_config", return_value={}), \
+                 patch("crypto_alert.load_sent_alerts", wraps=crypto_alert.load_sent_alerts) as mock_sent, \
+                 patch("crypto_alert.load_52w_stats", return_value={"coins": {}}):
+                assert context.reload_config() is True
+            mock_sent.assert_called_once_with({}, ["bitcoin"])
+            assert context.sent_mask.tolist() == [sent]
+
+    def test_invalid_config_keeps_previous(self):
+        """Test a broken edit leaves the running config in place"""
+        context = self.make_context([self.coin("bitcoin", [30])])
+        rules = context.rules
+        with patch("crypto_alert.load_coins_config", return_value=None):
+            assert context.reload_config() is False
+        assert context.rules is rules
+
+    def test_invalid_values_keep_previous(self):
+        """Test malformed levels or alert settings are rejected like at validation"""
+        context = self.make_context([self.coin("bitcoin", [30])])
+        rules, alert_config = context.rules, context.alert_config
+        with patch("crypto_alert.load_coins_config", return_value={"coins": [self.coin("bitcoin", ["30%"])]}), \
+             patch("crypto_alert.load_alert_config", return_value={}):
+            assert context.reload_config() is False
+        with patch("crypto_alert.load_coins_config", return_value={"coins": [self.coin("bitcoin", [40])]}), \
+             patch("crypto_alert.load_alert_config", return_value={"max_alerts_per_run": 0}):
+            assert context.reload_config() is False
+        assert context.rules is rules and context.alert_config is alert_config
+
+    def test_daemon_reloads_between_ticks(self):
+        """Test the daemon applies a config change before the next check"""
+        stop_event = MagicMock()
+        stop_event.is_set.return_value = False
+        watcher = MagicMock()
+        watcher.changed.side_effect = [set(), {"coins_config.json"}]
+        coins_config = {"coins": [self.coin("bitcoin", [30])]}
+
+        with patch("config_watch.FileWatcher", return_value=watcher), \
+             patch("crypto_alert.load_coins_config", return_value=coins_config), \
+             patch("crypto_alert.load_alert_config", return_value={}), \
+             patch("crypto_alert.AlertContext.reload_config", return_value=True) as mock_reload, \
+             patch("crypto_alert.run_check"):
+            crypto_alert.run_daemon(stop_event=stop_event, max_ticks=2)
+
+        assert mock_reload.call_count == 1
+
+
+class TestVelocityAlerts:
+    """Test velocity alerts in daemon mode"""
+
+    def test_fast_drop_alerts_once(self):
+        """Test a drop within the window alerts on the tick it happens, once"""
+        coins_config = {"coins": [{"id": "bitcoin", "name": "Bitcoin", "symbol": "BTC", "ath_thresholds": [],
+                                   "price_alerts": [], "velocity_alerts": [{"drop_percent": 10, "window_minutes": 30}]}]}
+        context = crypto_alert.AlertContext()
+        results = []
+        with patch("crypto_alert.load_coins_config", return_value=coins_config), \
+             patch("crypto_alert.load_alert_config", return_value={}), \
+             patch("crypto_alert.load_52w_stats", return_value={"coins": {}}), \
+             patch.object(crypto_alert, "time") as mock_time:
+            mock_time.time.side_effect = [0.0, 900.0, 1800.0, 2700.0]
+            context.load_config()
+            context.start_velocity(900)
+            for price in (100, 95, 88, 86):
+                with patch("crypto_alert.get_current_prices",
+                           return_value=[{"id": "bitcoin", "current_price": price, "ath": 200}]):
+                    results.append(crypto_alert.check_alerts(context=context))
+
+        assert [len(alerts) for alerts in results] == [0, 0, 1, 0]
+        alert = results[2][0]
+        assert alert["type"] == "velocity"
+        assert alert["windowHigh"] == 100
+        assert alert["dropPercent"] == 12.0
+        assert alert["windowMinutes"] == 30
+
+    def test_one_shot_runs_skip_velocity(self):
+        """Test a single check has no samples and builds no tracker"""
+        context = crypto_alert.AlertContext()
+        assert context.velocity is None
+
+
+class TestCrossAlerts:
+    """Test alerts for price levels crossed between checks"""
+
+    coins_config = {"coins": [{"id": "bitcoin", "name": "Bitcoin", "symbol": "BTC", "ath_thresholds": [],
+                               "price_alerts": [], "cross_alerts": {"up": [70000, 75000], "down": [60000]}},
+                              {"id": "ethereum", "name": "Ethereum", "symbol": "ETH", "ath_thresholds": [],
+                               "price_alerts": [], "cross_alerts": {"up": [3000]}}]}
+
+    def run_checks(self, snapshots, alert_config=None):
+        results = []
+        with patch("crypto_alert.load_coins_config", return_value=self.coins_config), \
+             patch("crypto_alert.load_alert_config", return_value=alert_config or {}), \
+             patch("crypto_alert.load_52w_stats", return_value={"coins": {}}):
+            for snapshot in snapshots:
+                data = [{"id": coin_id, "current_price": price, "ath": 100000} for coin_id, price in snapshot.items()]
+                with patch("crypto_alert.get_current_prices", return_value=data):
+                    results.append(crypto_alert.check_alerts())
+        return results
+
+    def test_crossings_between_runs(self):
+        """Test previous prices persist between one-shot runs and crosses alert once"""
+        results = self.run_checks([{"bitcoin": 68000}, {"bitcoin": 76000}, {"bitcoin": 77000},
+                                   {"bitcoin": 59000}])
+        assert [len(alerts) for alerts in results] == [0, 1, 0, 1]
+        up, down = results[1][0], results[3][0]
+        assert (up["type"], up["direction"], up["level"]) == ("cross", "up", 75000)
+        assert up["levelsCrossed"] == [70000, 75000]
+        assert up["previousPrice"] == 68000
+        assert (down["direction"], down["level"]) == ("down", 60000)
+
+    def test_run_check_counts_crosses(self):
+        """Test the found-alerts summary counts cross alerts"""
+        alerts = [{"type": "cross"}, {"type": "price"}]
+        with patch("crypto_alert.check_alerts", return_value=alerts), \
+             patch("crypto_alert.send_discord_alert"), \
+             patch("crypto_alert.logger") as mock_logger:
+            crypto_alert.run_check()
+        assert "Found 2 alerts (0 ATH, 1 price, 1 cross)" in mock_logger.info.call_args_list[0][0][0]
+
+    def test_deferred_crossing_retried(self):
+        """Test a crossing deferred by max_alerts_per_run alerts on the next run"""
+        results = self.run_checks([{"bitcoin": 68000, "ethereum": 2900}, {"bitcoin": 71000, "ethereum": 3300},
+                                   {"bitcoin": 71000, "ethereum": 3300}], {"max_alerts_per_run": 1})
+        assert [[alert["crypto"] for alert in alerts] for alerts in results] == [
+            [], ["Ethereum (ETH)"], ["Bitcoin (BTC)"]]
+
+    def test_validation(self):
+        """Test cross_alerts must map up/down to positive price lists"""
+        coin = {"id": "bitcoin", "name": "Bitcoin", "symbol": "BTC", "ath_thresholds": [], "price_alerts": []}
+        for cross in ({"up": [1], "down": [2.5]}, {"down": []}):
+            assert crypto_alert.validate_coins_config({"coins": [{**coin, "cross_alerts": cross}]}) == []
+        for cross in ([1], {"sideways": [1]}, {"up": [0]}, {"up": "1"}):
+            assert crypto_alert.validate_coins_config({"coins": [{**coin, "cross_alerts": cross}]})
+
+
+class TestRearm:
+    """Test per-alert cooldown and hysteresis instead of a daily reset"""
+
+    coins_config = {"coins": [{"id": "bitcoin", "name": "Bitcoin", "symbol": "BTC", "ath_thresholds": [],
+                               "price_alerts": [50000, 30000]}]}
+
+    def run_checks(self, prices, alert_config):
+        results = []
+        with patch("crypto_alert.load_coins_config", return_value=self.coins_config), \
+             patch("crypto_alert.load_alert_config", return_value=alert_config), \
+             patch("crypto_alert.load_52w_stats", return_value={"coins": {}}):
+            for price in prices:
+                with patch("crypto_alert.get_current_prices",
+                           return_value=[{"id": "bitcoin", "current_price": price, "ath": 100000}]):
+                    results.append([alert["targetPrice"] for alert in crypto_alert.check_alerts()])
+        return results
+
+    def fire(self, state, hours_ago):
+        store = storage.get_store()
+        slot = store.alert_slots([("bitcoin", "price", 50000)])[0]
+        store.set_alert_states({("bitcoin", slot): (state, datetime.now().timestamp() - hours_ago * 3600)})
+        return slot
+
+    def test_rearms_after_cooldown(self):
+        """Test an alert fires again once its cooldown has passed, not before"""
+        slot = self.fire(rearm.FIRED, hours_ago=2)
+        assert self.run_checks([40000], {"rearm_cooldown_hours": 3}) == [[]]
+        assert self.run_checks([40000], {"rearm_cooldown_hours": 1}) == [[50000]]
+        state, fired_at = storage.get_store().alert_states()["bitcoin"][slot]
+        assert state == rearm.FIRED and fired_at > datetime.now().timestamp() - 60
+
+    def test_hysteresis_requires_recovery(self):
+        """Test a cooled-down alert re-arms only after the price leaves the band"""
+        self.fire(rearm.FIRED, hours_ago=2)
+        config = {"rearm_cooldown_hours": 1, "rearm_hysteresis_percent": 5}
+        assert self.run_checks([49000, 52000, 53000, 49000], config) == [[], [], [], [50000]]
+
+    def test_persists_only_changed_entries(self):
+        """Test a run writes just the alerts that re-armed or fired"""
+        store = storage.get_store()
+        other = store.alert_slots([("bitcoin", "price", 30000)])[0]
+        slot = self.fire(rearm.FIRED, hours_ago=2)
+        store.set_alert_states({("bitcoin", other): (rearm.FIRED, datetime.now().timestamp())})
+        with patch.object(store, "set_alert_states", wraps=store.set_alert_states) as mock_set:
+            self.run_checks([60000], {"rearm_cooldown_hours": 1})
+        assert mock_set.call_args_list[-1][0][0] == {("bitcoin", slot): None}
+        assert set(store.alert_states()["bitcoin"]) == {other}
+
+    def test_daily_reset_is_the_default_policy(self):
+        """Test alerts fired before today re-arm without a cooldown configured"""
+        self.fire(rearm.FIRED, hours_ago=48)
+        assert self.run_checks([40000, 40000], {"reset_alerts_daily": True}) == [[50000], []]
+
+    def test_validation(self):
+        """Test rearm settings must be non-negative numbers"""
+        assert crypto_alert.validate_alert_config({"rearm_cooldown_hours": 1.5, "rearm_hysteresis_percent": 0}) == []
+        for config in ({"rearm_cooldown_hours": -1}, {"rearm_hysteresis_percent": "5"},
+                       {"rearm_cooldown_hours": True}):
+            assert crypto_alert.validate_alert_config(config)
+
+
+class TestQuoteCurrency:
+    """Test coins whose levels are quoted in another currency"""
+
+    coins_config = {"coins": [{"id": "bitcoin", "name": "Bitcoin", "symbol": "BTC", "ath_thresholds": [30],
+                               "price_alerts": [50000], "quote_currency": "eur"},
+                              {"id": "ethereum", "name": "Ethereum", "symbol": "ETH", "ath_thresholds": [],
+                               "price_alerts": [2500]}]}
+    markets = [{"id": "bitcoin", "current_price": 60000, "ath": 70000},
+               {"id": "ethereum", "current_price": 2400, "ath": 4800}]
+
+    def run_check(self, quotes, eur_ath=64000, dry_run=True):
+        response = MagicMock()
+        response.json.return_value = quotes
+        with patch("crypto_alert.load_coins_config", return_value=self.coins_config), \
+             patch("crypto_alert.load_alert_config", return_value={}), \
+             patch("crypto_alert.load_52w_stats", return_value={"coins": {}}) as mock_stats, \
+             patch("crypto_alert.get_current_prices", return_value=[dict(entry) for entry in self.markets]), \
+             patch("http_client.get", return_value=response) as mock_get, \
+             patch("crypto_alert.get_ath_prices", return_value={"bitcoin": eur_ath}) as mock_ath:
+            alerts = crypto_alert.check_alerts(dry_run=dry_run)
+        return alerts, mock_get, mock_ath, mock_stats
+
+    def test_levels_compared_in_quote_currency(self):
+        """Test EUR levels use the EUR price and ATH from one /simple/price call"""
+        alerts, mock_get, mock_ath, mock_stats = self.run_check({"bitcoin": {"eur": 44000, "eur_24h_change": -2.0}})
+        btc, eth = alerts
+        assert (btc["type"], btc["currentPrice"], btc["athPrice"], btc["quoteCurrency"]) == ("ath", 44000, 64000, "eur")
+        assert btc["priceChange24h"] == -2.0 and btc["priceChange7d"] is None
+        assert (eth["type"], eth["currentPrice"], eth["quoteCurrency"]) == ("price", 2400, "usd")
+        assert mock_get.call_count == 1
+        assert mock_get.call_args.kwargs["params"]["vs_currencies"] == "eur"
+        mock_ath.assert_called_once_with(["bitcoin"], currencies={"bitcoin": "eur"})
+        mock_stats.assert_called_once_with(["bitcoin.eur", "ethereum"])
+
+    def test_ath_seeded_once_and_raised(self):
+        """Test the stored ATH is not refetched and follows new highs"""
+        self.run_check({"bitcoin": {"eur": 44000}}, dry_run=False)
+        _, _, mock_ath, _ = self.run_check({"bitcoin": {"eur": 66000}}, eur_ath=None, dry_run=False)
+        assert not mock_ath.called
+        assert storage.get_store().quote_aths([("bitcoin", "eur")]) == {("bitcoin", "eur"): 66000}
+
+    def test_dry_run_does_not_store_ath(self):
+        """Test a dry run uses the seeded ATH without saving it"""
+        alerts, _, _, _ = self.run_check({"bitcoin": {"eur": 44000}})
+        assert alerts[0]["athPrice"] == 64000
+        assert storage.get_store().quote_aths([("bitcoin", "eur")]) == {}
+
+    def test_missing_quote_skips_coin(self):
+        """Test a coin without a price in its currency is not evaluated in USD"""
+        alerts, _, _, _ = self.run_check({})
+        assert [alert["crypto"] for alert in alerts] == ["Ethereum (ETH)"]
+
+    def test_currency_switch_resets_state(self):
+        """Test previous prices and sent levels do not carry over to a new currency"""
+        coin = {"id": "bitcoin", "name": "Bitcoin", "symbol": "BTC", "ath_thresholds": [],
+                "price_alerts": [62000], "cross_alerts": {"down": [58000]}}
+        response = MagicMock()
+        response.json.return_value = {"bitcoin": {"eur": 55200}}
+        results = []
+        with patch("crypto_alert.load_alert_config", return_value={}), \
+             patch("crypto_alert.load_52w_stats", return_value={"coins": {}}), \
+             patch("crypto_alert.get_current_prices",
+                   return_value=[{"id": "bitcoin", "current_price": 60000, "ath": 70000}]), \
+             patch("http_client.get", return_value=response):
+            for currency in ("usd", "eur"):
+                with patch("crypto_alert.load_coins_config",
+                           return_value={"coins": [{**coin, "quote_currency": currency}]}):
+                    results.append([(alert["type"], alert["currentPrice"]) for alert in crypto_alert.check_alerts()])
+        assert results == [[("price", 60000)], [("price", 55200)]]
+
+    def test_discord_shows_currency(self):
+        """Test non-USD prices are labelled with their currency"""
+        alerts = [{"type": "price", "crypto": "Bitcoin (BTC)", "currentPrice": 44000, "targetPrice": 50000,
+                   "priceDiff": -6000, "priceDiffPercent": -12.0, "quoteCurrency": "eur"}]
+        with patch("http_client.post") as mock_post, \
+             patch("crypto_alert.DISCORD_WEBHOOK_URL", "https://discord.webhook.url"):
+            crypto_alert.send_discord_alert(alerts)
+        description = mock_post.call_args.kwargs["json"]["embeds"][0]["description"]
+        assert "Target: 50,000.000000 EUR" in description
+        assert "$" not in description
+
+    def test_validation(self):
+        """Test quote_currency must be a lowercase currency code"""
+        coin = {"id": "bitcoin", "name": "Bitcoin", "symbol": "BTC", "ath_thresholds": [], "price_alerts": []}
+        assert crypto_alert.validate_coins_config({"coins": [{**coin, "quote_currency": "eur"}]}) == []
+        for currency in ("EUR", "e-ur", 1):
+            assert crypto_alert.validate_coins_config({"coins": [{**coin, "quote_currency": currency}]})
+
+
 class TestConfigValidator:
     """Test configuration validation"""
 
@@ -468,6 +1078,25 @@ class TestConfigValidator:
         errors = crypto_alert.validate_alert_config(invalid_config)
         assert len(errors) > 0
 
+    def test_validate_check_interval_positive(self):
+        """Test a zero check interval is rejected"""
+        errors = crypto_alert.validate_alert_config({"check_interval_minutes": 0})
+        assert len(errors) == 1
+        assert "check_interval_minutes" in errors[0]
+
+    def test_validate_alert_limit_and_priority(self):
+        """Test a zero alert limit and an unknown priority are rejected"""
+        errors = crypto_alert.validate_alert_config({"max_alerts_per_run": 0, "alert_priority": "volume"})
+        assert len(errors) == 2
+
+    def test_validate_velocity_alerts(self):
+        """Test velocity rules need positive drop_percent and window_minutes"""
+        coin = {"id": "bitcoin", "name": "Bitcoin", "symbol": "BTC", "ath_thresholds": [], "price_alerts": []}
+        valid = {"coins": [{**coin, "velocity_alerts": [{"drop_percent": 10, "window_minutes": 30}]}]}
+        invalid = {"coins": [{**coin, "velocity_alerts": [{"drop_percent": 10}]}]}
+        assert crypto_alert.validate_coins_config(valid) == []
+        assert len(crypto_alert.validate_coins_config(invalid)) == 1
+
     def test_validate_coin_id_format(self):
         """Test validation of CoinGecko ID format"""
         invalid_config = {
@@ -506,7 +1135,7 @@ class TestDiscordIntegration:
         mock_response = MagicMock()
         mock_response.raise_for_status = MagicMock()
 
-        with patch("requests.post", return_value=mock_response) as mock_post:
+        with patch("http_client.post", return_value=mock_response) as mock_post:
             with patch("crypto_alert.DISCORD_WEBHOOK_URL", "https://discord.webhook.url"):
                 crypto_alert.send_discord_alert(alerts)
 
@@ -533,7 +1162,7 @@ class TestDiscordIntegration:
         mock_response = MagicMock()
         mock_response.raise_for_status = MagicMock()
 
-        with patch("requests.post", return_value=mock_response) as mock_post:
+        with patch("http_client.post", return_value=mock_response) as mock_post:
             with patch("crypto_alert.DISCORD_WEBHOOK_URL", "https://discord.webhook.url"):
                 crypto_alert.send_discord_alert(alerts)
 
@@ -545,6 +1174,6 @@ class TestDiscordIntegration:
 
     def test_send_discord_alert_empty(self):
         """Test that no webhook is called for empty alerts"""
-        with patch("requests.post") as mock_post:
+        with patch("http_client.post") as mock_post:
             crypto_alert.send_discord_alert([])
             assert not mock_post.called
@@ -0,0 +1,88 @@
+import os
+import pytest
+import history_store
+
+DAY_MS = history_store.DAY_MS
+
+
+@pytest.fixture
+def store(tmp_path):
+    return history_store.HistoryStore(str(tmp_path / "history"))
+
+
+class TestColumnFiles:
+    """Test the on-disk layout"""
+
+    def test_packed_little_endian_columns(self, store):
+        """Test each point takes 8 bytes per column"""
+        store.write("bitcoin", [(1000, 1.5), (2000, 2.5)])
+        ts_path = os.path.join(store.root, "daily", "bitcoin.ts")
+        px_path = os.path.join(store.root, "daily", "bitcoin.px")
+        with open(ts_path, "rb") as f:
+            assert f.read() == (1000).to_bytes(8, "little") + (2000).to_bytes(8, "little")
+        assert os.path.getsize(px_path) == 16
+
+    def test_read_round_trip(self, store):
+        """Test mapped columns return what was written"""
+        store.write("bitcoin", [(1000, 1.5), (2000, 2.5)])
+        store.append("bitcoin", [(3000, 3.5)])
+        with store.read("bitcoin") as series:
+            assert len(series) == 3
+            assert list(series) == [(1000, 1.5), (2000, 2.5), (3000, 3.5)]
+            assert series.since(2000) == 1
+
+    def test_missing_series_is_empty(self, store):
+        """Test reading an unknown coin yields an empty series"""
+        with store.read("nope") as series:
+            assert len(series) == 0
+        assert not store.exists("nope")
+
+    def test_torn_append_hidden(self, store):
+        """Test readers ignore a price written without its timestamp"""
+        store.write("bitcoin", [(1000, 1.5)])
+        with open(os.path.join(store.root, "daily", "bitcoin.px"), "ab") as f:
+            f.write(b"\x00" * 8)
+        with store.read("bitcoin") as series:
+            assert len(series) == 1
+
+    def test_rejects_unsafe_names(self, store):
+        """Test coin IDs cannot escape the store directory"""
+        with pytest.raises(ValueError):
+            store.read("../etc")
+
+
+class TestMergeDaily:
+    """Test incremental merging of daily points"""
+
+    def test_append_and_replace_same_day(self, store):
+        """Test new days are appended and a refreshed day replaced in place"""
+        store.merge_daily("bitcoin", [(0, 1.0), (DAY_MS + 3600000, 2.0)], 365)
+        store.merge_daily("bitcoin", [(DAY_MS, 2.5), (2 * DAY_MS, 3.0)], 365)
+        with store.read("bitcoin") as series:
+            assert list(series) == [(0, 1.0), (DAY_MS, 2.5), (2 * DAY_MS, 3.0)]
+
+    def test_trims_after_slack(self, store):
+        """Test days outside the window are dropped once enough accumulate"""
+        store.merge_daily("bitcoin", [(d * DAY_MS, float(d)) for d in range(10)], 5)
+        with store.read("bitcoin") as series:
+            assert len(series) == 10  # within COMPACT_SLACK_DAYS, no rewrite
+        assert [p[1] for p in store.window("bitcoin", 5)] == [4.0, 5.0, 6.0, 7.0, 8.0, 9.0]
+
+        store.merge_daily("bitcoin", [(d * DAY_MS, float(d)) for d in range(10, 60)], 5)
+        with store.read("bitcoin") as series:
+            assert series.timestamps[0] == 54 * DAY_MS
+            assert len(series) == 6
+
+    def test_returns_point_count(self, store):
+        """Test the stored size is reported"""
+        assert store.merge_daily("bitcoin", [], 365) == 0
+        assert store.merge_daily("bitcoin", [(0, 1.0), (DAY_MS, 2.0)], 365) == 2
+
+
+class TestGetStore:
+    """Test environment configuration"""
+
+    def test_dir_from_env(self, monkeypatch, tmp_path):
+        """Test COINWATCH_HISTORY_DIR selects the root"""
+        monkeypatch.setenv("COINWATCH_HISTORY_DIR", str(tmp_path / "h"))
+        assert history_store.get_store().root == str(tmp_path / "h")
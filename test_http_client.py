@@ -0,0 +1,141 @@
+import pytest
+from unittest.mock import patch, MagicMock
+import http_client
+import state_file
+
+
+@pytest.fixture(autouse=True)
+def fresh_session():
+    """Reset the shared session around each test"""
+    http_client.close_session()
+    yield
+    http_client.close_session()
+
+
+class TestSession:
+    """Test shared session creation"""
+
+    def test_session_is_shared(self):
+        """Test the same session is reused across calls"""
+        assert http_client.get_session() is http_client.get_session()
+
+    def test_session_default_headers(self):
+        """Test gzip and JSON headers are set by default"""
+        session = http_client.get_session()
+        assert "gzip" in session.headers["Accept-Encoding"]
+        assert session.headers["Accept"] == "application/json"
+
+    def test_pool_size_from_env(self, monkeypatch):
+        """Test pool size can be configured through the environment"""
+        monkeypatch.setenv("COINWATCH_HTTP_POOL_SIZE", "25")
+        session = http_client.get_session()
+        adapter = session.get_adapter("https://api.coingecko.com")
+        assert adapter._pool_maxsize == 25
+
+    def test_invalid_pool_size_falls_back(self, monkeypatch):
+        """Test an invalid pool size falls back to the default"""
+        monkeypatch.setenv("COINWATCH_HTTP_POOL_SIZE", "lots")
+        assert http_client.get_pool_size() == http_client.DEFAULT_POOL_SIZE
+
+    def test_close_session_creates_new_one(self):
+        """Test closing the session makes the next call create a new one"""
+        first = http_client.get_session()
+        http_client.close_session()
+        assert http_client.get_session() is not first
+
+
+class TestRequests:
+    """Test request helpers"""
+
+    def test_get_uses_default_timeout(self):
+        """Test GET goes through the session with split timeouts"""
+        mock_session = MagicMock()
+        mock_session.get.return_value.status_code = 200
+        with patch("http_client.get_session", return_value=mock_session):
+            http_client.get("https://example.com", params={"a": 1})
+        mock_session.get.assert_called_once_with(
+            "https://example.com", params={"a": 1}, timeout=http_client.DEFAULT_TIMEOUT
+        )
+
+    def test_get_waits_for_rate_limiter(self):
+        """Test GET reserves budget from the shared limiter"""
+        mock_session = MagicMock()
+        mock_session.get.return_value.status_code = 200
+        with patch("http_client.get_session", return_value=mock_session), \
+             patch("rate_limiter.acquire") as mock_acquire:
+            http_client.get("https://example.com")
+        assert mock_acquire.called
+
+    def test_get_reports_response_to_retry_policy(self):
+        """Test a 429 response is handed to the shared retry policy"""
+        mock_session = MagicMock()
+        mock_session.get.return_value.status_code = 429
+        with patch("http_client.get_session", return_value=mock_session), \
+             patch("rate_limiter.acquire"), \
+             patch("retry_policy.record_response") as mock_record:
+            response = http_client.get("https://example.com")
+        mock_record.assert_called_once_with(response)
+
+    def test_get_without_rate_limit(self):
+        """Test rate limiting can be skipped per request"""
+        mock_session = MagicMock()
+        with patch("http_client.get_session", return_value=mock_session), \
+             patch("rate_limiter.acquire") as mock_acquire, \
+             patch("retry_policy.record_response") as mock_record:
+            http_client.get("https://example.com", rate_limited=False)
+        assert not mock_acquire.called
+        assert not mock_record.called
+
+    def test_open_circuit_fails_fast(self):
+        """Test no request is sent while the circuit is open"""
+        import circuit_breaker
+        mock_session = MagicMock()
+        breaker = circuit_breaker.get_breaker()
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        with patch("http_client.get_session", return_value=mock_session):
+            with pytest.raises(circuit_breaker.CircuitOpenError):
+                http_client.get("https://example.com")
+        assert not mock_session.get.called
+
+    def test_failures_recorded_by_breaker(self):
+        """Test 5xx responses and timeouts count as breaker failures"""
+        import requests
+        import circuit_breaker
+        mock_session = MagicMock()
+        mock_session.get.return_value.status_code = 503
+        with patch("http_client.get_session", return_value=mock_session), \
+             patch.object(circuit_breaker.CircuitBreaker, "record_failure") as mock_failure:
+            http_client.get("https://example.com")
+            mock_session.get.side_effect = requests.exceptions.Timeout
+            with pytest.raises(requests.exceptions.Timeout):
+                http_client.get("https://example.com")
+        assert mock_failure.call_count == 2
+
+    def test_rate_limited_probe_keeps_circuit_half_open(self):
+        """Test a 429 probe neither closes a half-open circuit nor resets its failures"""
+        import circuit_breaker
+        breaker = circuit_breaker.get_breaker()
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        mock_session = MagicMock()
+        mock_session.get.return_value.status_code = 429
+        mock_session.get.return_value.headers = {"Retry-After": "1"}
+        with patch.object(breaker, "clock", return_value=breaker.clock() + breaker.reset_timeout + 1), \
+             patch("http_client.get_session", return_value=mock_session), \
+             patch("retry_policy.record_response"):
+            http_client.get("https://example.com")
+            assert breaker.state() == circuit_breaker.HALF_OPEN
+            with pytest.raises(circuit_breaker.CircuitOpenError):
+                http_client.get("https://example.com")
+        with state_file.locked_json(breaker.state_file) as state:
+            assert state["failures"] == breaker.failure_threshold
+
+    def test_post_timeout_override(self):
+        """Test POST passes through a custom timeout"""
+        mock_session = MagicMock()
+        with patch("http_client.get_session", return_value=mock_session):
+            http_client.post("https://example.com", json={"x": 1}, timeout=(5, 10))
+        mock_session.post.assert_called_once_with(
+            "https://example.com", json={"x": 1}, timeout=(5, 10)
+        )
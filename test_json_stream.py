@@ -0,0 +1,61 @@
+import json
+import pytest
+import json_stream
+
+
+def chunked(data, size):
+    """Split encoded JSON into fixed-size byte chunks"""
+    body = json.dumps(data).encode() if not isinstance(data, bytes) else data
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+class TestIterPairs:
+    """Test incremental pair parsing"""
+
+    @pytest.mark.parametrize("size", [1, 3, 7, 64, 100000])
+    def test_any_chunking(self, size):
+        """Test pairs are parsed identically whatever the chunk boundaries"""
+        data = {"prices": [[1640000000000, 50000.5], [1641000000000, 1.2e-05], [1642000000000, -3]],
+                "market_caps": [[1, 2]]}
+        assert list(json_stream.iter_pairs(chunked(data, size), "prices")) == [
+            (1640000000000.0, 50000.5), (1641000000000.0, 1.2e-05), (1642000000000.0, -3.0)
+        ]
+
+    def test_selects_requested_key(self):
+        """Test only the named array is returned"""
+        data = {"prices": [[1, 2]], "total_volumes": [[3, 4], [5, 6]]}
+        assert list(json_stream.iter_pairs(chunked(data, 5), "total_volumes")) == [(3.0, 4.0), (5.0, 6.0)]
+
+    def test_stops_after_array(self):
+        """Test the rest of the stream is not read once the array closes"""
+        consumed = []
+
+        def chunks():
+            for chunk in chunked({"prices": [[1, 2]], "market_caps": [[3, 4]] * 100}, 8):
+                consumed.append(chunk)
+                yield chunk
+
+        assert list(json_stream.iter_pairs(chunks(), "prices")) == [(1.0, 2.0)]
+        assert len(consumed) < 5
+
+    def test_empty_array(self):
+        """Test an empty array yields nothing"""
+        assert list(json_stream.iter_pairs(chunked({"prices": []}, 2), "prices")) == []
+
+    def test_missing_key(self):
+        """Test a document without the key yields nothing"""
+        assert list(json_stream.iter_pairs(chunked({"invalid": "data"}, 4), "prices")) == []
+
+    def test_skips_null_values(self):
+        """Test pairs with a null value are skipped"""
+        assert list(json_stream.iter_pairs([b'{"prices": [[1, null], [2, 3]]}'], "prices")) == [(2.0, 3.0)]
+
+    def test_truncated_stream(self):
+        """Test a stream ending inside the array raises ValueError"""
+        with pytest.raises(ValueError):
+            list(json_stream.iter_pairs([b'{"prices": [[1, 2], [3,'], "prices"))
+
+    def test_malformed_array(self):
+        """Test non-pair content raises ValueError"""
+        with pytest.raises(ValueError):
+            list(json_stream.iter_pairs([b'{"prices": [' + b'"x"' * 2000 + b']}'], "prices"))
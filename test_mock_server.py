@@ -0,0 +1,170 @@
+import pytest
+import requests
+from unittest.mock import patch
+import http_client
+import mock_server
+import rate_limiter
+
+
+@pytest.fixture
+def server():
+    """Mock server on a free port"""
+    srv = mock_server.MockServer(mock_server.MockConfig(coins=300), port=0).start_in_thread()
+    yield srv
+    srv.stop()
+
+
+@pytest.fixture
+def pointed_at(server, monkeypatch):
+    """Point CoinWatch at the mock server with an unconstrained rate budget"""
+    monkeypatch.setenv("COINGECKO_API_URL", server.api_url)
+    monkeypatch.setenv("COINGECKO_CALLS_PER_MINUTE", "100000")
+    monkeypatch.setenv("COINGECKO_BURST", "1000")
+    rate_limiter.reset_limiter()
+    http_client.close_session()
+    yield server
+    http_client.close_session()
+
+
+class TestSyntheticData:
+    """Test deterministic synthetic data"""
+
+    def test_series_is_deterministic(self):
+        """Test the same coin always gets the same history"""
+        assert mock_server.price_series("bitcoin", 30, 42) == mock_server.price_series("bitcoin", 30, 42)
+        assert mock_server.price_series("bitcoin", 30, 42) != mock_server.price_series("ethereum", 30, 42)
+
+    def test_series_length(self):
+        """Test `days` daily points plus today are returned"""
+        assert len(mock_server.price_series("bitcoin", 365, 42)) == 366
+
+    def test_snapshot_consistent_with_series(self):
+        """Test current price is the last chart point and ATH is above the 52w high"""
+        snapshot = mock_server.coin_snapshot("bitcoin", 42)
+        series = mock_server.price_series("bitcoin", 365, 42)
+        assert snapshot["current_price"] == series[-1][1]
+        assert snapshot["ath"] >= max(price for _, price in series)
+
+
+class TestEndpoints:
+    """Test mock API endpoints"""
+
+    def test_markets_paging(self, server):
+        """Test /coins/markets honours per_page and page"""
+        url = f"{server.api_url}/coins/markets"
+        first = requests.get(url, params={"per_page": 250, "page": 1}).json()
+        second = requests.get(url, params={"per_page": 250, "page": 2}).json()
+        assert len(first) == 250
+        assert len(second) == 50
+
+    def test_markets_by_ids(self, server):
+        """Test any requested ID is served"""
+        data = requests.get(f"{server.api_url}/coins/markets", params={"ids": "bitcoin,whatever"}).json()
+        assert [entry["id"] for entry in data] == ["bitcoin", "whatever"]
+        assert "ath" in data[0]
+
+    def test_coin_and_chart(self, server):
+        """Test /coins/{id} and /coins/{id}/market_chart"""
+        coin = requests.get(f"{server.api_url}/coins/bitcoin").json()
+        chart = requests.get(f"{server.api_url}/coins/bitcoin/market_chart", params={"days": 10}).json()
+        assert coin["market_data"]["ath"]["usd"] > 0
+        assert len(chart["prices"]) == 11
+        assert len(chart["total_volumes"]) == 11
+
+    def test_simple_price(self, server):
+        """Test /simple/price quotes every requested coin in every currency"""
+        data = requests.get(f"{server.api_url}/simple/price", params={
+            "ids": "bitcoin,ethereum", "vs_currencies": "usd,eur", "include_market_cap": "true"}).json()
+        usd = mock_server.coin_snapshot("bitcoin", 42)["current_price"]
+        assert data["bitcoin"]["usd"] == usd
+        assert data["bitcoin"]["eur"] == usd * mock_server.FX_RATES["eur"]
+        assert "eur_market_cap" in data["ethereum"]
+        assert "eur_24h_vol" not in data["ethereum"]
+
+    def test_search(self, server):
+        """Test /search matches synthetic coin IDs"""
+        data = requests.get(f"{server.api_url}/search", params={"query": "coin-0000"}).json()
+        assert len(data["coins"]) == 9
+
+    def test_discord_webhook(self, server):
+        """Test the Discord stand-in accepts webhook posts"""
+        response = requests.post(server.webhook_url, json={"embeds": []})
+        assert response.status_code == 204
+        assert server.stats()["discord"] == 1
+
+    def test_rate_limit_injection(self):
+        """Test 429s are injected with a Retry-After header"""
+        srv = mock_server.MockServer(mock_server.MockConfig(rate_429=1.0, retry_after=7), port=0).start_in_thread()
+        try:
+            response = requests.get(f"{srv.api_url}/coins/bitcoin")
+            assert response.status_code == 429
+            assert response.headers["Retry-After"] == "7"
+        finally:
+            srv.stop()
+
+    def test_server_error_injection(self):
+        """Test 5xx responses are injected"""
+        srv = mock_server.MockServer(mock_server.MockConfig(rate_5xx=1.0), port=0).start_in_thread()
+        try:
+            assert requests.get(f"{srv.api_url}/coins/bitcoin").status_code == 503
+        finally:
+            srv.stop()
+
+
+class TestAgainstCoinWatch:
+    """Run the real fetchers against the mock server"""
+
+    def test_check_alerts_end_to_end(self, pointed_at):
+        """Test a full dry-run alert check uses one markets request"""
+        import crypto_alert
+        coins_config = {"coins": [
+            {"id": f"coin-{idx:05d}", "name": f"Coin {idx}", "symbol": "C",
+             "ath_thresholds": [1], "price_alerts": [1e9]}
+            for idx in range(1, 51)
+        ]}
+        with patch("crypto_alert.load_coins_config", return_value=coins_config), \
+             patch("crypto_alert.load_alert_config", return_value={"reset_alerts_daily": True}), \
+             patch("crypto_alert.load_sent_alerts", return_value={"date": None, "sent_bits": {}}), \
+             patch("crypto_alert.load_52w_stats", return_value={"coins": {}}):
+            alerts = crypto_alert.check_alerts(dry_run=True)
+
+        assert len(alerts) == 50
+        assert pointed_at.stats()["markets"] == 1
+
+    def test_quote_currency_end_to_end(self, pointed_at):
+        """Test EUR-quoted coins add a single /simple/price request"""
+        import crypto_alert
+        coins_config = {"coins": [
+            {"id": f"coin-{idx:05d}", "name": f"Coin {idx}", "symbol": "C",
+             "ath_thresholds": [], "price_alerts": [1e9], "quote_currency": "eur" if idx % 2 else "usd"}
+            for idx in range(1, 21)
+        ]}
+        with patch("crypto_alert.load_coins_config", return_value=coins_config), \
+             patch("crypto_alert.load_alert_config", return_value={"reset_alerts_daily": True}), \
+             patch("crypto_alert.load_sent_alerts", return_value={"date": None, "sent_bits": {}}), \
+             patch("crypto_alert.load_52w_stats", return_value={"coins": {}}):
+            alerts = crypto_alert.check_alerts(dry_run=True)
+
+        eur = [alert for alert in alerts if alert["quoteCurrency"] == "eur"]
+        snapshot = mock_server.coin_snapshot("coin-00001", 42)
+        assert len(alerts) == 20 and len(eur) == 10
+        assert eur[0]["currentPrice"] == snapshot["current_price"] * mock_server.FX_RATES["eur"]
+        assert pointed_at.stats()["markets"] == 1
+        assert pointed_at.stats()["simple_price"] == 1
+
+    def test_discord_alert_end_to_end(self, pointed_at):
+        """Test alerts are delivered to the webhook stand-in"""
+        import crypto_alert
+        alerts = [{"type": "price", "crypto": "Coin (C)", "currentPrice": 1.0, "targetPrice": 2.0,
+                   "priceDiff": -1.0, "priceDiffPercent": -50.0}]
+        with patch("crypto_alert.DISCORD_WEBHOOK_URL", pointed_at.webhook_url):
+            crypto_alert.send_discord_alert(alerts)
+        assert pointed_at.stats()["discord"] == 1
+
+    def test_52w_fetch_end_to_end(self, pointed_at):
+        """Test 52w high/low is computed from the mock chart"""
+        import update_52w_stats
+        result = update_52w_stats.fetch_52w_high_low("coin-00001")
+        prices = [price for _, price in mock_server.price_series("coin-00001", 365, 42)]
+        assert result["high_52w"] == max(prices)
+        assert result["low_52w"] == min(prices)
@@ -0,0 +1,122 @@
+import pytest
+import rate_limiter
+
+
+class FakeClock:
+    """Controllable clock for deterministic bucket tests"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def bucket(tmp_path, clock):
+    """60 calls/minute (1 per second) with a burst of 2"""
+    return rate_limiter.TokenBucket(
+        state_file=str(tmp_path / "bucket.json"),
+        calls_per_minute=60,
+        burst=2,
+        clock=clock,
+        sleep=clock.sleep
+    )
+
+
+class TestTokenBucket:
+    """Test token bucket behaviour"""
+
+    def test_burst_is_free(self, bucket, clock):
+        """Test requests within the burst do not wait"""
+        assert bucket.acquire() == 0
+        assert bucket.acquire() == 0
+        assert clock.sleeps == []
+
+    def test_waits_only_for_deficit(self, bucket, clock):
+        """Test the wait after the burst equals one token interval"""
+        bucket.acquire()
+        bucket.acquire()
+        assert bucket.acquire() == pytest.approx(1.0)
+        assert clock.sleeps == [pytest.approx(1.0)]
+
+    def test_refill_over_time(self, bucket, clock):
+        """Test tokens refill at the configured rate"""
+        bucket.acquire()
+        bucket.acquire()
+        clock.now += 5
+        assert bucket.acquire() == 0
+
+    def test_refill_capped_at_burst(self, bucket, clock):
+        """Test idle time does not accumulate more than the burst"""
+        clock.now += 3600
+        bucket.acquire()
+        bucket.acquire()
+        assert bucket.acquire() == pytest.approx(1.0)
+
+    def test_backoff_delays_next_request(self, bucket, clock):
+        """Test backoff makes the next request wait at least that long"""
+        bucket.backoff(30)
+        assert bucket.acquire() == pytest.approx(31.0)
+
+    def test_state_shared_between_instances(self, tmp_path, clock):
+        """Test two limiters on the same file share one budget"""
+        state_file = str(tmp_path / "shared.json")
+        first = rate_limiter.TokenBucket(state_file, 60, 1, clock=clock, sleep=clock.sleep)
+        second = rate_limiter.TokenBucket(state_file, 60, 1, clock=clock, sleep=clock.sleep)
+        assert first.reserve() == 0
+        assert second.reserve() == pytest.approx(1.0)
+
+    def test_corrupt_state_file_resets(self, tmp_path, clock):
+        """Test an unreadable state file starts a fresh bucket"""
+        state_file = tmp_path / "bucket.json"
+        state_file.write_text("not json")
+        bucket = rate_limiter.TokenBucket(str(state_file), 60, 2, clock=clock, sleep=clock.sleep)
+        assert bucket.reserve() == 0
+
+
+class TestDefaultLimiter:
+    """Test process-wide limiter configuration"""
+
+    def test_configured_from_env(self, monkeypatch):
+        """Test rate and burst come from the environment"""
+        monkeypatch.setenv("COINGECKO_CALLS_PER_MINUTE", "500")
+        monkeypatch.setenv("COINGECKO_BURST", "10")
+        rate_limiter.reset_limiter()
+        limiter = rate_limiter.get_limiter()
+        assert limiter.calls_per_minute == 500
+        assert limiter.burst == 10
+
+    def test_invalid_env_uses_default(self, monkeypatch):
+        """Test invalid values fall back to defaults"""
+        monkeypatch.setenv("COINGECKO_CALLS_PER_MINUTE", "fast")
+        rate_limiter.reset_limiter()
+        assert rate_limiter.get_limiter().calls_per_minute == rate_limiter.DEFAULT_CALLS_PER_MINUTE
+
+    def test_non_positive_env_uses_default(self, monkeypatch):
+        """Test zero or negative values fall back to defaults instead of dividing by zero"""
+        monkeypatch.setenv("COINGECKO_CALLS_PER_MINUTE", "0")
+        monkeypatch.setenv("COINGECKO_BURST", "-1")
+        rate_limiter.reset_limiter()
+        limiter = rate_limiter.get_limiter()
+        assert limiter.calls_per_minute == rate_limiter.DEFAULT_CALLS_PER_MINUTE
+        assert limiter.burst == rate_limiter.DEFAULT_BURST
+
+
+class TestBucketValidation:
+    """Test TokenBucket rejects unusable limits"""
+
+    def test_zero_rate_rejected(self, tmp_path):
+        """Test a zero calls-per-minute limit is refused at construction"""
+        with pytest.raises(ValueError):
+            rate_limiter.TokenBucket(state_file=str(tmp_path / "rl.json"), calls_per_minute=0)
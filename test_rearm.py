@@ -0,0 +1,70 @@
+from datetime import datetime
+import rearm
+
+
+def schedule(cooldown=3600, hysteresis=0.0):
+    return rearm.RearmSchedule(lambda fired_at: fired_at + cooldown if cooldown is not None else None, hysteresis)
+
+
+class TestRearmSchedule:
+    """Test the armed/fired/cooling state machine"""
+
+    def test_rearms_after_cooldown(self):
+        """Test a fired alert stays sent until its cooldown expires"""
+        rearms = schedule()
+        rearms.fire([("btc", 0), ("btc", 3)], 1000.0)
+        assert rearms.sent_bits() == {"btc": 0b1001}
+        assert rearms.expire(4599.0) == []
+        assert sorted(rearms.expire(4600.0)) == [("btc", 0), ("btc", 3)]
+        assert rearms.sent_bits() == {}
+
+    def test_refire_restarts_cooldown(self):
+        """Test the expiry of an earlier firing is skipped once the alert fires again"""
+        rearms = schedule()
+        rearms.fire([("btc", 0)], 0.0)
+        rearms.expire(3600.0)
+        rearms.fire([("btc", 0)], 5000.0)
+        rearms.fire([("btc", 0)], 6000.0)
+        assert rearms.expire(8600.0) == []
+        assert rearms.expire(9600.0) == [("btc", 0)]
+
+    def test_never_rearms_without_cooldown(self):
+        """Test alerts stay sent when the policy has no expiry"""
+        rearms = schedule(cooldown=None)
+        rearms.fire([("btc", 0)], 0.0)
+        assert rearms.expire(1e12) == []
+        assert rearms.sent_bits() == {"btc": 1}
+
+    def test_hysteresis_cools_before_rearming(self):
+        """Test an expired alert waits in COOLING until recover()"""
+        rearms = schedule(hysteresis=5)
+        rearms.fire([("btc", 0)], 0.0)
+        assert rearms.expire(3600.0) == []
+        assert rearms.entries[("btc", 0)] == (rearm.COOLING, 0.0)
+        assert rearms.cooling == {("btc", 0)}
+        assert rearms.recover([("btc", 0), ("eth", 1)]) == [("btc", 0)]
+        assert rearms.sent_bits() == {}
+
+    def test_only_changes_reported(self):
+        """Test loaded entries are not changes and taken changes are cleared"""
+        rearms = schedule()
+        rearms.load({"btc": {0: (rearm.FIRED, 0.0), 1: (rearm.FIRED, 2000.0)}})
+        assert rearms.take_changes() == {}
+        rearms.expire(3600.0)
+        rearms.fire([("eth", 2)], 3600.0)
+        assert rearms.take_changes() == {("btc", 0): None, ("eth", 2): (rearm.FIRED, 3600.0)}
+        assert rearms.take_changes() == {}
+
+    def test_drop_coins(self):
+        """Test entries of removed coins are forgotten"""
+        rearms = schedule()
+        rearms.fire([("btc", 0), ("eth", 0)], 0.0)
+        rearms.drop_coins(["eth"])
+        assert rearms.sent_bits() == {"eth": 1}
+        assert rearms.expire(3600.0) == [("eth", 0)]
+
+    def test_next_midnight(self):
+        """Test the daily policy re-arms at the following local midnight"""
+        fired_at = datetime(2024, 1, 1, 23, 59).timestamp()
+        assert rearm.next_midnight(fired_at) == datetime(2024, 1, 2).timestamp()
+        assert rearm.next_midnight(datetime(2024, 1, 2).timestamp()) == datetime(2024, 1, 3).timestamp()
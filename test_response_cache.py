@@ -0,0 +1,206 @@
+import pytest
+from unittest.mock import patch, MagicMock
+import http_client
+import response_cache
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return response_cache.ResponseCache(str(tmp_path / "cache"), max_entries=3, max_bytes=1000, clock=clock)
+
+
+class TestEndpointTTL:
+    """Test TTL selection per endpoint"""
+
+    def test_market_chart_ttl(self):
+        """Test the 365-day chart is cached for hours"""
+        url = "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart"
+        assert response_cache.ttl_for(url) >= 3600
+
+    def test_markets_ttl_is_short(self):
+        """Test prices are cached only briefly"""
+        assert response_cache.ttl_for("https://api.coingecko.com/api/v3/coins/markets") == 60
+
+    def test_coin_and_search_ttls(self):
+        """Test /coins/{id} and /search are cacheable"""
+        assert response_cache.ttl_for("https://api.coingecko.com/api/v3/coins/bitcoin") == 3600
+        assert response_cache.ttl_for("https://api.coingecko.com/api/v3/search") == 24 * 3600
+
+    def test_unknown_endpoint_not_cached(self):
+        """Test other URLs (e.g. Discord) are never cached"""
+        assert response_cache.ttl_for("https://discord.com/api/webhooks/1/abc") is None
+
+    def test_key_ignores_param_order(self):
+        """Test params are sorted into the key"""
+        assert response_cache.cache_key("u", {"a": 1, "b": 2}) == response_cache.cache_key("u", {"b": 2, "a": 1})
+        assert response_cache.cache_key("u", {"a": 1}) != response_cache.cache_key("u", {"a": 2})
+
+
+class TestResponseCache:
+    """Test cache storage, expiry and eviction"""
+
+    def test_store_and_lookup(self, cache):
+        """Test a stored body can be read back"""
+        cache.store("k1", "u", b'{"a": 1}', ttl=60, etag='"v1"')
+        meta = cache.lookup("k1")
+        assert meta["etag"] == '"v1"'
+        assert cache.is_fresh(meta)
+        assert cache.read_body("k1") == b'{"a": 1}'
+
+    def test_entry_expires(self, cache, clock):
+        """Test entries become stale after their TTL"""
+        cache.store("k1", "u", b"x", ttl=60)
+        clock.now += 61
+        assert not cache.is_fresh(cache.lookup("k1"))
+
+    def test_refresh_extends_expiry(self, cache, clock):
+        """Test a revalidated entry is fresh again"""
+        cache.store("k1", "u", b"x", ttl=60)
+        clock.now += 61
+        cache.refresh("k1", ttl=60)
+        assert cache.is_fresh(cache.lookup("k1"))
+
+    def test_persists_across_instances(self, cache, tmp_path, clock):
+        """Test another process sees stored entries"""
+        cache.store("k1", "u", b"body", ttl=60)
+        other = response_cache.ResponseCache(str(tmp_path / "cache"), clock=clock)
+        assert other.lookup("k1") is not None
+        assert other.read_body("k1") == b"body"
+
+    def test_evicts_least_recently_used_by_count(self, cache):
+        """Test the oldest unused entry is evicted past max_entries"""
+        for key in ("a", "b", "c"):
+            cache.store(key, "u", b"x", ttl=60)
+        cache.lookup("a")  # a is now most recently used
+        cache.store("d", "u", b"x", ttl=60)
+        assert cache.lookup("b") is None
+        assert cache.lookup("a") is not None
+        assert len(cache) == 3
+
+    def test_evicts_by_size(self, cache):
+        """Test entries are evicted when total size exceeds max_bytes"""
+        cache.store("big1", "u", b"x" * 600, ttl=60)
+        cache.store("big2", "u", b"x" * 600, ttl=60)
+        assert cache.lookup("big1") is None
+        assert cache.lookup("big2") is not None
+
+
+class TestHttpClientCaching:
+    """Test cache integration in http_client.get"""
+
+    URL = "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart"
+
+    @pytest.fixture(autouse=True)
+    def enabled_cache(self, monkeypatch):
+        monkeypatch.setenv("COINWATCH_CACHE", "1")
+        response_cache.reset_cache()
+
+    def make_response(self, status=200, body=b'{"prices": []}', headers=None):
+        response = MagicMock()
+        response.status_code = status
+        response.content = body
+        response.headers = headers or {}
+        response.iter_content = lambda chunk_size=1, decode_unicode=False: (
+            body[i:i + chunk_size] for i in range(0, len(body), chunk_size))
+        return response
+
+    def test_fresh_hit_skips_network(self):
+        """Test a second identical request is served from cache"""
+        session = MagicMock()
+        session.get.return_value = self.make_response(headers={"ETag": '"v1"'})
+        with patch("http_client.get_session", return_value=session):
+            http_client.get(self.URL, params={"days": "365"})
+            cached = http_client.get(self.URL, params={"days": "365"})
+        assert session.get.call_count == 1
+        assert cached.json() == {"prices": []}
+        assert cached.headers["X-CoinWatch-Cache"] == "hit"
+
+    def test_stale_entry_revalidates_with_etag(self):
+        """Test a stale entry sends If-None-Match and reuses the body on 304"""
+        session = MagicMock()
+        session.get.return_value = self.make_response(headers={"ETag": '"v1"'})
+        with patch("http_client.get_session", return_value=session):
+            http_client.get(self.URL)
+
+        key = response_cache.cache_key(self.URL)
+        response_cache.get_cache().lookup(key)["expires_at"] = 0
+
+        session.get.return_value = self.make_response(status=304, body=b"")
+        with patch("http_client.get_session", return_value=session):
+            revalidated = http_client.get(self.URL)
+
+        assert session.get.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+        assert revalidated.status_code == 200
+        assert revalidated.json() == {"prices": []}
+
+    def test_errors_not_cached(self):
+        """Test non-200 responses are not stored"""
+        session = MagicMock()
+        session.get.return_value = self.make_response(status=500)
+        with patch("http_client.get_session", return_value=session):
+            http_client.get(self.URL)
+            http_client.get(self.URL)
+        assert session.get.call_count == 2
+
+    def test_cache_hit_uses_no_rate_budget(self):
+        """Test cached responses do not consume rate limiter tokens"""
+        session = MagicMock()
+        session.get.return_value = self.make_response()
+        with patch("http_client.get_session", return_value=session), \
+             patch("rate_limiter.acquire") as mock_acquire:
+            http_client.get(self.URL)
+            http_client.get(self.URL)
+        assert mock_acquire.call_count == 1
+
+    def test_streamed_response_cached_and_replayed(self):
+        """Test streamed requests are cached and hits support iter_content"""
+        session = MagicMock()
+        session.get.return_value = self.make_response(body=b'{"prices": [[1, 2]]}')
+        with patch("http_client.get_session", return_value=session):
+            first = http_client.get(self.URL, stream=True)
+            assert b"".join(first.iter_content(chunk_size=4)) == b'{"prices": [[1, 2]]}'
+            cached = http_client.get(self.URL, stream=True)
+        assert session.get.call_count == 1
+        assert cached.headers["X-CoinWatch-Cache"] == "hit"
+        assert b"".join(cached.iter_content(chunk_size=4)) == b'{"prices": [[1, 2]]}'
+        cached.close()
+        assert not response_cache.get_cache()._bodies
+
+    def test_market_chart_fetch_cached_after_early_stop(self):
+        """Test a chart parsed only up to "prices" is still cached when the response closes"""
+        import update_52w_stats
+        body = b'{"prices": [[1, 2.0], [2, 3.0]], "market_caps": [[1, 5.0]], "total_volumes": [[1, 6.0]]}'
+        session = MagicMock()
+        session.get.return_value = self.make_response(body=body)
+        close = session.get.return_value.close
+        with patch("http_client.get_session", return_value=session):
+            first = update_52w_stats.fetch_daily_prices("bitcoin", 365)
+            second = update_52w_stats.fetch_daily_prices("bitcoin", 365)
+        assert first == second == [(1, 2.0), (2, 3.0)]
+        assert session.get.call_count == 1
+        close.assert_called_once()
+
+    def test_abandoned_stream_not_cached(self):
+        """Test a stream the caller stops reading leaves no cache entry"""
+        session = MagicMock()
+        session.get.return_value = self.make_response(body=b'{"prices": [[1, 2]]}')
+        with patch("http_client.get_session", return_value=session):
+            chunks = http_client.get(self.URL, stream=True).iter_content(chunk_size=4)
+            next(chunks)
+            chunks.close()
+            http_client.get(self.URL, stream=True)
+        assert session.get.call_count == 2
+        assert len(response_cache.get_cache()) == 0
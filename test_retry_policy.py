@@ -0,0 +1,145 @@
+import pytest
+from unittest.mock import patch, MagicMock
+import rate_limiter
+import retry_policy
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def limiter(tmp_path, clock):
+    return rate_limiter.TokenBucket(str(tmp_path / "bucket.json"), calls_per_minute=60, burst=1,
+                                    clock=clock, sleep=clock.sleep)
+
+
+class TestRetryAfter:
+    """Test server-requested delays"""
+
+    def test_retry_after_seconds(self):
+        """Test a numeric Retry-After header"""
+        assert retry_policy.parse_retry_after({"Retry-After": "42"}) == 42
+
+    def test_retry_after_http_date(self):
+        """Test an HTTP-date Retry-After header"""
+        headers = {"Retry-After": "Wed, 21 Oct 2015 07:28:30 GMT"}
+        now = 1445412480.0  # 07:28:00 GMT
+        assert retry_policy.parse_retry_after(headers, now=now) == pytest.approx(30)
+
+    def test_ratelimit_reset_epoch(self):
+        """Test an absolute x-ratelimit-reset timestamp"""
+        assert retry_policy.parse_retry_after({"x-ratelimit-reset": "1700000060"}, now=1700000000) == 60
+
+    def test_ratelimit_reset_relative(self):
+        """Test a relative x-ratelimit-reset value"""
+        assert retry_policy.parse_retry_after({"x-ratelimit-reset": "15"}) == 15
+
+    def test_no_headers(self):
+        """Test None is returned without usable headers"""
+        assert retry_policy.parse_retry_after({}) is None
+        assert retry_policy.parse_retry_after({"Retry-After": "soon"}) is None
+
+
+class TestBackoff:
+    """Test jittered exponential backoff"""
+
+    def test_backoff_grows_exponentially(self):
+        """Test the backoff window doubles per attempt"""
+        assert retry_policy.backoff_delay(0, rand=lambda: 1.0) == retry_policy.BASE_DELAY
+        assert retry_policy.backoff_delay(3, rand=lambda: 1.0) == retry_policy.BASE_DELAY * 8
+
+    def test_backoff_is_capped(self):
+        """Test the backoff never exceeds MAX_DELAY"""
+        assert retry_policy.backoff_delay(20, rand=lambda: 1.0) == retry_policy.MAX_DELAY
+
+    def test_backoff_is_jittered(self):
+        """Test the delay is scaled by the random factor"""
+        assert retry_policy.backoff_delay(2, rand=lambda: 0.25) == pytest.approx(retry_policy.BASE_DELAY)
+
+    def test_retry_delay_prefers_headers(self):
+        """Test Retry-After wins over computed backoff"""
+        response = MagicMock(headers={"Retry-After": "10"})
+        assert retry_policy.retry_delay(5, response, rand=lambda: 0.0) == 10
+
+
+class TestAIMD:
+    """Test additive increase / multiplicative decrease"""
+
+    def test_rate_halves_on_429(self, limiter):
+        """Test the shared rate is cut multiplicatively"""
+        controller = retry_policy.AIMDController(limiter)
+        controller.on_rate_limited()
+        assert limiter.rate * 60 == pytest.approx(30)
+
+    def test_decreases_within_hold_count_once(self, limiter):
+        """Test a burst of 429s only halves the rate once"""
+        controller = retry_policy.AIMDController(limiter)
+        controller.on_rate_limited()
+        controller.on_rate_limited()
+        assert limiter.rate * 60 == pytest.approx(30)
+
+    def test_rate_recovers_additively(self, limiter, clock):
+        """Test successes raise the rate back towards the ceiling"""
+        controller = retry_policy.AIMDController(limiter)
+        controller.on_rate_limited()
+        for _ in range(30):
+            controller.on_success()
+        assert 30 < limiter.rate * 60 < 32
+
+    def test_rate_never_exceeds_ceiling(self, limiter):
+        """Test the configured calls_per_minute is the ceiling"""
+        controller = retry_policy.AIMDController(limiter)
+        for _ in range(100):
+            controller.on_success()
+        assert limiter.rate * 60 == pytest.approx(60)
+
+    def test_concurrency_halves_and_recovers(self, limiter):
+        """Test concurrency drops on 429 and climbs back to the max"""
+        controller = retry_policy.AIMDController(limiter)
+        assert controller.concurrency_limit(8) == 8
+        controller.on_rate_limited()
+        assert controller.concurrency_limit(8) == 4
+        for _ in range(100):
+            controller.on_success()
+        assert controller.concurrency_limit(8) == 8
+
+
+class TestRecordResponse:
+    """Test the shared response hook"""
+
+    def test_429_applies_retry_after_backoff(self):
+        """Test a 429 drains the shared budget for the Retry-After time"""
+        response = MagicMock(status_code=429, headers={"Retry-After": "12"})
+        with patch("rate_limiter.backoff") as mock_backoff, \
+             patch.object(retry_policy.AIMDController, "on_rate_limited") as mock_decrease:
+            assert retry_policy.record_response(response) == 12
+        mock_backoff.assert_called_once_with(12)
+        assert mock_decrease.called
+
+    def test_429_without_headers_uses_default(self):
+        """Test a bare 429 backs off for the default delay"""
+        response = MagicMock(status_code=429, headers={})
+        with patch("rate_limiter.backoff") as mock_backoff, \
+             patch.object(retry_policy.AIMDController, "on_rate_limited"):
+            retry_policy.record_response(response)
+        mock_backoff.assert_called_once_with(retry_policy.DEFAULT_RATE_LIMIT_DELAY)
+
+    def test_success_increases(self):
+        """Test a successful response triggers additive increase"""
+        response = MagicMock(status_code=200, headers={})
+        with patch.object(retry_policy.AIMDController, "on_success") as mock_increase:
+            assert retry_policy.record_response(response) == 0
+        assert mock_increase.called
@@ -0,0 +1,105 @@
+import random
+from datetime import date
+import pytest
+import rolling_window
+
+DAY_MS = rolling_window.DAY_MS
+
+
+def brute_force(points, window_days):
+    """Reference high/low of the last window_days + 1 days of a series"""
+    newest = points[-1][0] // DAY_MS
+    in_window = [p for p in points if p[0] // DAY_MS >= newest - window_days]
+    return max(p[1] for p in in_window), min(p[1] for p in in_window)
+
+
+class TestRollingExtremes:
+    """Test the monotonic-deque rolling window"""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_full_rescan(self, seed):
+        """Test every step matches max/min over the window"""
+        rng = random.Random(seed)
+        window = rolling_window.RollingExtremes(window_days=30)
+        points = []
+        price = 100.0
+        for day in range(400):
+            price *= 1 + (rng.random() - 0.5) * 0.2
+            points.append((day * DAY_MS, price))
+            window.push(*points[-1])
+            assert (window.high()[1], window.low()[1]) == brute_force(points, 30)
+
+    def test_same_day_replaces_pending(self):
+        """Test an intraday refresh replaces the newest day without losing older highs"""
+        window = rolling_window.RollingExtremes()
+        window.push(0, 10.0)
+        window.push(DAY_MS, 20.0)
+        window.push(DAY_MS + 3600000, 5.0)
+        assert window.high() == (0, 10.0)
+        assert window.low() == (DAY_MS + 3600000, 5.0)
+
+    def test_rejects_older_days(self):
+        """Test points must arrive in time order"""
+        window = rolling_window.RollingExtremes()
+        window.push(5 * DAY_MS, 1.0)
+        with pytest.raises(ValueError):
+            window.push(DAY_MS, 2.0)
+
+    def test_extend_skips_committed_days(self):
+        """Test overlapping fetches only apply the new days"""
+        window = rolling_window.RollingExtremes.from_points([(d * DAY_MS, float(d)) for d in range(5)])
+        window.extend([(d * DAY_MS, 100.0 + d) for d in range(2, 7)])
+        assert window.high() == (6 * DAY_MS, 106.0)
+        assert window.low() == (0, 0.0)
+
+    def test_deques_stay_short(self):
+        """Test a falling series keeps one entry in the min deque"""
+        window = rolling_window.RollingExtremes.from_points([(d * DAY_MS, 1000.0 - d) for d in range(365)])
+        assert len(window.to_dict()["min"]) <= 1
+
+    def test_round_trip(self):
+        """Test the persisted state behaves like the original"""
+        rng = random.Random(7)
+        points = [(d * DAY_MS, rng.random()) for d in range(100)]
+        original = rolling_window.RollingExtremes.from_points(points[:60], window_days=20)
+        restored = rolling_window.RollingExtremes.from_dict(original.to_dict())
+        original.extend(points[60:])
+        restored.extend(points[60:])
+        assert original.to_dict() == restored.to_dict()
+        assert restored.stats()["high_52w"] == brute_force(points, 20)[0]
+
+
+class TestStatsAsOf:
+    """Test day-exact evaluation of stored stats"""
+
+    def entry(self):
+        day0 = rolling_window.date_to_day(date(2024, 1, 1))
+        window = rolling_window.RollingExtremes.from_points([
+            (day0 * DAY_MS, 500.0),
+            ((day0 + 100) * DAY_MS, 200.0),
+            ((day0 + 200) * DAY_MS, 300.0),
+        ])
+        return {"updated_at": "2024-07-19", "rolling": window.to_dict(), **window.stats()}
+
+    def test_unchanged_within_window(self):
+        """Test stats are returned as stored while every day is in the window"""
+        result = rolling_window.stats_as_of(self.entry(), date(2024, 8, 1))
+        assert result["high_52w"] == 500.0
+        assert result["high_52w_date"] == "2024-01-01"
+
+    def test_expired_high_dropped(self):
+        """Test a high older than 52 weeks is replaced by the next one"""
+        result = rolling_window.stats_as_of(self.entry(), date(2025, 1, 15))
+        assert result["high_52w"] == 300.0
+        assert result["low_52w"] == 200.0
+        assert result["updated_at"] == "2024-07-19"
+
+    def test_fully_expired(self):
+        """Test an entry with no day left in the window returns None"""
+        assert rolling_window.stats_as_of(self.entry(), date(2026, 1, 1)) is None
+
+    def test_legacy_entry_passthrough(self):
+        """Test entries without rolling state are returned unchanged"""
+        entry = {"high_52w": 1, "low_52w": 0}
+        assert rolling_window.stats_as_of(entry) is entry
+        assert rolling_window.stats_as_of(None) is None
@@ -0,0 +1,195 @@
+import json
+from datetime import datetime
+import pytest
+import storage
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = storage.StateStore(str(tmp_path / "state.db"))
+    yield store
+    store.close()
+
+
+class TestSchema:
+    """Test database setup"""
+
+    def test_wal_mode(self, store):
+        """Test the database runs in WAL mode"""
+        assert store._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_parse_alert_key(self):
+        """Test legacy alert keys are split into coin, kind and value"""
+        assert storage.parse_alert_key("bitcoin_ath_30") == ("bitcoin", "ath", 30.0)
+        assert storage.parse_alert_key("usd-coin_price_0.99") == ("usd-coin", "price", 0.99)
+        assert storage.parse_alert_key("garbage") is None
+
+    def test_migrates_key_table(self, tmp_path):
+        """Test a database with the string-key sent_alerts table is converted"""
+        import sqlite3
+        path = str(tmp_path / "old.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE sent_alerts (alert_key TEXT PRIMARY KEY, coin_id TEXT NOT NULL, sent_on TEXT NOT NULL)")
+        conn.execute("INSERT INTO sent_alerts VALUES ('bitcoin_price_80000.0', 'bitcoin', '2024-01-02')")
+        conn.commit()
+        conn.close()
+
+        store = storage.StateStore(path)
+        assert store.sent_alert_keys(sent_on="2024-01-02") == {"bitcoin_price_80000"}
+        assert not store._conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sent_alerts'").fetchone()
+        store.close()
+
+
+    def test_seeds_alert_states(self, tmp_path):
+        """Test masks recorded before rearm states existed become fired states once"""
+        path = str(tmp_path / "old.db")
+        store = storage.StateStore(path)
+        store.mark_sent_masks({"btc": 0b101}, "2024-01-02")
+        store._conn.execute("DELETE FROM run_meta WHERE key = 'alert_state_seeded'")
+        store._conn.commit()
+        store.close()
+
+        store = storage.StateStore(path)
+        midnight = datetime(2024, 1, 2).timestamp()
+        assert store.alert_states() == {"btc": {0: (1, midnight), 2: (1, midnight)}}
+        store.close()
+
+
+class TestStats:
+    """Test 52w stats rows"""
+
+    def test_upsert_and_point_lookup(self, store):
+        """Test per-coin upserts and lookups"""
+        store.upsert_52w_stats({"bitcoin": {"high_52w": 2.0, "low_52w": 1.0, "updated_at": "2024-01-01",
+                                            "rolling": {"pending": [0, 1.0]}}})
+        store.upsert_52w_stats({"bitcoin": {"high_52w": 3.0, "low_52w": 1.0, "updated_at": "2024-01-02"}})
+        assert store.get_52w_stats("bitcoin") == {"high_52w": 3.0, "low_52w": 1.0, "updated_at": "2024-01-02"}
+        assert store.get_52w_stats("ethereum") is None
+
+    def test_unchanged_rows_not_written(self, store):
+        """Test re-saving identical stats changes no rows"""
+        coins = {f"coin-{i}": {"high_52w": float(i), "low_52w": 0.0} for i in range(5)}
+        store.upsert_52w_stats(coins)
+        before = store._conn.total_changes
+        coins["coin-3"] = {"high_52w": 99.0, "low_52w": 0.0}
+        store.upsert_52w_stats(coins)
+        assert store._conn.total_changes - before == 1
+
+    def test_lookup_many(self, store):
+        """Test lookups for a subset of coins, beyond the SQL variable limit"""
+        store.upsert_52w_stats({f"coin-{i}": {"high_52w": float(i)} for i in range(1000)})
+        wanted = [f"coin-{i}" for i in range(0, 1000, 2)] + ["missing"] * 500
+        assert len(store.get_52w_stats_many(wanted)) == 500
+        assert len(store.get_52w_stats_many()) == 1000
+
+
+class TestSentAlerts:
+    """Test sent alert bitmasks"""
+
+    def test_slots_are_stable(self, store):
+        """Test levels keep their slot and equal floats share one"""
+        assert store.alert_slots([("btc", "ath", 30), ("btc", "price", 80000), ("eth", "ath", 30)]) == [0, 1, 0]
+        assert store.alert_slots([("btc", "price", 70000), ("btc", "price", 80000.0)]) == [2, 1]
+
+    def test_masks_or_within_a_day(self, store):
+        """Test bits marked on the same day accumulate"""
+        store.mark_sent_masks({"btc": 0b01}, "2024-01-01")
+        store.mark_sent_masks({"btc": 0b10, "eth": 0}, "2024-01-01")
+        store.mark_sent_masks({"btc": 0b100}, "2024-01-02")
+        assert store.sent_masks(sent_on="2024-01-01") == {"btc": 0b11}
+        assert store.sent_masks() == {"btc": 0b111}
+
+    def test_alert_states(self, store):
+        """Test rearm states are upserted and re-armed ones deleted"""
+        store.set_alert_states({("btc", 0): (1, 100.0), ("btc", 2): (2, 50.0), ("eth", 1): (1, 10.0)})
+        store.set_alert_states({("btc", 0): None, ("eth", 1): (1, 200.0)})
+        assert store.alert_states() == {"btc": {2: (2, 50.0)}, "eth": {1: (1, 200.0)}}
+        assert store.alert_states(["eth"]) == {"eth": {1: (1, 200.0)}}
+
+    def test_legacy_keys_get_fired_states(self, store):
+        """Test alerts imported by key count as fired at the start of their day"""
+        store.mark_alerts_sent(["btc_ath_30"], "2024-01-01")
+        midnight = datetime(2024, 1, 1).timestamp()
+        assert store.alert_states() == {"btc": {0: (1, midnight)}}
+
+    def test_wide_masks(self, store):
+        """Test masks beyond 64 levels round-trip"""
+        store.mark_sent_masks({"btc": 1 << 200}, "2024-01-01")
+        assert store.sent_masks(["btc"]) == {"btc": 1 << 200}
+
+    def test_mark_and_query_by_day(self, store):
+        """Test keys can be filtered by coin and day"""
+        store.mark_alerts_sent(["bitcoin_ath_30", "ethereum_price_2500"], "2024-01-01")
+        store.mark_alerts_sent(["bitcoin_price_50000"], "2024-01-02")
+        assert store.sent_alert_keys(sent_on="2024-01-02") == {"bitcoin_price_50000"}
+        assert store.sent_alert_keys(["bitcoin"]) == {"bitcoin_ath_30", "bitcoin_price_50000"}
+
+    def test_resend_moves_to_new_day(self, store):
+        """Test a key re-sent on a later day counts for that day"""
+        store.mark_alerts_sent(["bitcoin_ath_30"], "2024-01-01")
+        store.mark_alerts_sent(["bitcoin_ath_30"], "2024-01-02")
+        store.mark_alerts_sent(["bitcoin_ath_30"], "2024-01-01")
+        assert store.sent_alert_keys(sent_on="2024-01-02") == {"bitcoin_ath_30"}
+
+    def test_clear_before(self, store):
+        """Test pruning alerts from earlier days"""
+        store.mark_alerts_sent(["a_ath_1"], "2024-01-01")
+        store.mark_alerts_sent(["b_ath_1"], "2024-01-02")
+        store.clear_sent_alerts(before="2024-01-02")
+        assert store.sent_alert_keys() == {"b_ath_1"}
+
+
+class TestLastPrices:
+    """Test previous prices kept for cross alerts"""
+
+    def test_round_trip(self, store):
+        """Test prices are stored per coin and overwritten on change"""
+        store.set_last_prices({"a": 1.5, "b": 2.0}, "2024-01-01T00:00:00")
+        store.set_last_prices({"a": 3.0}, "2024-01-01T00:15:00")
+        assert store.last_prices(["a", "b", "c"]) == {"a": 3.0, "b": 2.0}
+
+
+class TestQuoteAths:
+    """Test ATHs kept for coins quoted in other currencies"""
+
+    def test_only_raised(self, store):
+        """Test a stored ATH is replaced by higher values only"""
+        store.raise_quote_aths({("btc", "eur"): 60000.0, ("btc", "gbp"): 50000.0})
+        store.raise_quote_aths({("btc", "eur"): 55000.0, ("btc", "gbp"): 52000.0})
+        assert store.quote_aths([("btc", "eur"), ("btc", "gbp"), ("btc", "jpy")]) == {
+            ("btc", "eur"): 60000.0, ("btc", "gbp"): 52000.0}
+
+    def test_stats_key(self):
+        """Test USD stats keep the plain coin ID"""
+        assert storage.stats_key("bitcoin") == "bitcoin"
+        assert storage.stats_key("bitcoin", "eur") == "bitcoin.eur"
+
+
+class TestMigration:
+    """Test one-shot import of legacy JSON files"""
+
+    def test_imports_once(self, store, tmp_path):
+        """Test each file is imported a single time"""
+        path = tmp_path / "52w_stats.json"
+        path.write_text(json.dumps({"last_updated": "2024-01-01",
+                                    "coins": {"bitcoin": {"high_52w": 2.0, "low_52w": 1.0}}}))
+        assert store.migrate_json_once("52w_stats", str(path)) is True
+        assert store.migrate_json_once("52w_stats", str(path)) is False
+        assert store.get_52w_stats("bitcoin")["high_52w"] == 2.0
+        assert store.get_meta("52w_last_updated") == "2024-01-01"
+
+    def test_sent_alerts_import(self, store, tmp_path):
+        """Test sent alerts keep their original day"""
+        path = tmp_path / "sent_alerts.json"
+        path.write_text(json.dumps({"date": "2024-01-01", "sent_alerts": {"bitcoin_ath_30": True}}))
+        store.migrate_json_once("sent_alerts", str(path))
+        assert store.sent_alert_keys(sent_on="2024-01-01") == {"bitcoin_ath_30"}
+
+    def test_invalid_json_retried(self, store, tmp_path):
+        """Test a broken file raises and is not marked as imported"""
+        path = tmp_path / "52w_stats.json"
+        path.write_text("{broken")
+        with pytest.raises(ValueError):
+            store.migrate_json_once("52w_stats", str(path))
+        path.write_text(json.dumps({"coins": {}}))
+        assert store.migrate_json_once("52w_stats", str(path)) is True
@@ -1,10 +1,21 @@
 import pytest
 import json
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta, timezone
 from unittest.mock import patch, mock_open, MagicMock
+import history_store
 import update_52w_stats
 
 
+def make_chart_response(data, chunk_size=16):
+    """Mock streamed response serving `data` as small JSON byte chunks"""
+    body = json.dumps(data).encode()
+    mock_response = MagicMock()
+    mock_response.iter_content.side_effect = lambda *args, **kwargs: iter(
+        [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    )
+    return mock_response
+
+
 @pytest.fixture
 def sample_coins_config():
     """Sample coins configuration"""
@@ -88,21 +99,18 @@ class TestSaveStats:
 
     def test_save_stats_success(self, sample_52w_stats):
         """Test successful saving of 52w stats"""
-        mock_file = mock_open()
-        with patch("builtins.open", mock_file):
-            update_52w_stats.save_52w_stats(sample_52w_stats)
-            mock_file.assert_called_once_with("52w_stats.json", 'w')
-            handle = mock_file()
-            written_data = "".join(call.args[0] for call in handle.write.call_args_list)
-            assert "bitcoin" in written_data
-            assert "high_52w" in written_data
-
-    def test_save_stats_with_custom_file(self, sample_52w_stats):
-        """Test saving to custom file path"""
-        mock_file = mock_open()
-        with patch("builtins.open", mock_file):
-            update_52w_stats.save_52w_stats(sample_52w_stats, "custom_stats.json")
-            mock_file.assert_called_once_with("custom_stats.json", 'w')
+        update_52w_stats.save_52w_stats(sample_52w_stats)
+        with patch("builtins.open", side_effect=FileNotFoundError):
+            result = update_52w_stats.load_52w_stats()
+        assert result == sample_52w_stats
+
+    def test_save_stats_removes_dropped_coins(self, sample_52w_stats):
+        """Test coins no longer in the stats are deleted"""
+        update_52w_stats.save_52w_stats(sample_52w_stats)
+        del sample_52w_stats["coins"]["ethereum"]
+        update_52w_stats.save_52w_stats(sample_52w_stats)
+        with patch("builtins.open", side_effect=FileNotFoundError):
+            assert list(update_52w_stats.load_52w_stats()["coins"]) == ["bitcoin"]
 
 
 class TestFetchMarketChart:
@@ -110,39 +118,57 @@ class TestFetchMarketChart:
 
     def test_fetch_52w_success(self, sample_market_chart_response):
         """Test successful API call for 52w data"""
-        mock_response = MagicMock()
-        mock_response.json.return_value = sample_market_chart_response
+        mock_response = make_chart_response(sample_market_chart_response)
         mock_response.raise_for_status = MagicMock()
 
-        with patch("requests.get", return_value=mock_response):
+        with patch("http_client.get", return_value=mock_response):
             result = update_52w_stats.fetch_52w_high_low("bitcoin")
             assert result["high_52w"] == 60000
             assert result["low_52w"] == 40000
+            assert result["high_52w_date"] == "2022-01-24"
+            assert result["low_52w_date"] == "2022-02-04"
+
+    def test_fetch_52w_streams_response(self, sample_market_chart_response):
+        """Test the chart is read via iter_content and never fully decoded"""
+        mock_response = make_chart_response(sample_market_chart_response)
+
+        with patch("http_client.get", return_value=mock_response) as mock_get:
+            update_52w_stats.fetch_52w_high_low("bitcoin")
+
+        assert mock_get.call_args[1]["stream"] is True
+        assert not mock_response.json.called
+        assert mock_response.close.called
+
+    def test_price_extremes_single_pass(self):
+        """Test high/low come from one pass over a generator"""
+        points = ((ts, price) for ts, price in [(1, 5.0), (2, 9.0), (3, 1.0), (4, 9.0)])
+        high, low = update_52w_stats.price_extremes(points)
+        assert high == (2, 9.0)
+        assert low == (3, 1.0)
+        assert update_52w_stats.price_extremes(iter([])) == (None, None)
 
     def test_fetch_52w_api_error(self):
         """Test handling of API errors"""
         import requests
-        with patch("requests.get", side_effect=requests.exceptions.RequestException("API Error")):
+        with patch("http_client.get", side_effect=requests.exceptions.RequestException("API Error")):
             result = update_52w_stats.fetch_52w_high_low("bitcoin")
             assert result is None
 
     def test_fetch_52w_empty_prices(self):
         """Test handling when API returns no price data"""
-        mock_response = MagicMock()
-        mock_response.json.return_value = {"prices": []}
+        mock_response = make_chart_response({"prices": []})
         mock_response.raise_for_status = MagicMock()
 
-        with patch("requests.get", return_value=mock_response):
+        with patch("http_client.get", return_value=mock_response):
             result = update_52w_stats.fetch_52w_high_low("bitcoin")
             assert result is None
 
     def test_fetch_52w_malformed_response(self):
         """Test handling malformed API response"""
-        mock_response = MagicMock()
-        mock_response.json.return_value = {"invalid": "data"}
+        mock_response = make_chart_response({"invalid": "data"})
         mock_response.raise_for_status = MagicMock()
 
-        with patch("requests.get", return_value=mock_response):
+        with patch("http_client.get", return_value=mock_response):
             result = update_52w_stats.fetch_52w_high_low("bitcoin")
             assert result is None
 
@@ -179,15 +205,14 @@ class TestUpdateStats:
 
     def test_update_all_coins_success(self, sample_coins_config, sample_market_chart_response):
         """Test successfully updating stats for all coins"""
-        mock_response = MagicMock()
-        mock_response.json.return_value = sample_market_chart_response
+        mock_response = make_chart_response(sample_market_chart_response)
         mock_response.raise_for_status = MagicMock()
 
         coins_config_json = json.dumps(sample_coins_config)
         mock_file = mock_open(read_data=coins_config_json)
 
         with patch("builtins.open", mock_file), \
-             patch("requests.get", return_value=mock_response), \
+             patch("http_client.get", return_value=mock_response), \
              patch("update_52w_stats.save_52w_stats") as mock_save, \
              patch("time.sleep"):
 
@@ -210,10 +235,9 @@ class TestUpdateStats:
             if "bitcoin" in url:
                 raise requests.exceptions.RequestException("API Error")
             else:
-                mock_resp = MagicMock()
-                mock_resp.json.return_value = {
+                mock_resp = make_chart_response({
                     "prices": [[1640000000000, 1000], [1641000000000, 2000]]
-                }
+                })
                 mock_resp.raise_for_status = MagicMock()
                 return mock_resp
 
@@ -221,7 +245,7 @@ class TestUpdateStats:
         mock_file = mock_open(read_data=coins_config_json)
 
         with patch("builtins.open", mock_file), \
-             patch("requests.get", side_effect=side_effect_api), \
+             patch("http_client.get", side_effect=side_effect_api), \
              patch("update_52w_stats.save_52w_stats") as mock_save, \
              patch("time.sleep"):
 
@@ -234,23 +258,169 @@ class TestUpdateStats:
             assert "bitcoin" not in saved_data["coins"]
 
     def test_update_respects_rate_limiting(self, sample_coins_config, sample_market_chart_response):
-        """Test that rate limiting sleep is called between API requests"""
-        mock_response = MagicMock()
-        mock_response.json.return_value = sample_market_chart_response
+        """Test that every API request waits for the shared rate limiter"""
+        mock_response = make_chart_response(sample_market_chart_response)
+        mock_response.status_code = 200
         mock_response.raise_for_status = MagicMock()
+        mock_session = MagicMock()
+        mock_session.get.return_value = mock_response
 
         coins_config_json = json.dumps(sample_coins_config)
         mock_file = mock_open(read_data=coins_config_json)
 
         with patch("builtins.open", mock_file), \
-             patch("requests.get", return_value=mock_response), \
-             patch("update_52w_stats.save_52w_stats"), \
-             patch("time.sleep") as mock_sleep:
+             patch("http_client.get_session", return_value=mock_session), \
+             patch("rate_limiter.acquire") as mock_acquire, \
+             patch("update_52w_stats.save_52w_stats"):
+
+            update_52w_stats.update_all_52w_stats()
+
+            # One budget reservation per request (2 coins = 2 requests)
+            assert mock_acquire.call_count == 2
+            assert mock_session.get.call_count == 2
+
+
+class TestIncrementalRefresh:
+    """Test fetching only the days missing from the stored series"""
+
+    DAY_MS = 86400 * 1000
+
+    def test_days_to_fetch_new_coin(self):
+        """Test coins without history get a full backfill"""
+        assert update_52w_stats.days_to_fetch(None) == 365
+        assert update_52w_stats.days_to_fetch({"updated_at": "2024-01-01", "prices": []}) == 365
+
+    def test_days_to_fetch_since_update(self):
+        """Test only the days since updated_at are requested"""
+        today = date(2024, 3, 10)
+        coin_history = {"updated_at": "2024-03-03", "prices": [[0, 1.0]]}
+        assert update_52w_stats.days_to_fetch(coin_history, today) == 7
+        coin_history["updated_at"] = "2024-03-10"
+        assert update_52w_stats.days_to_fetch(coin_history, today) == 0
+
+    def test_days_to_fetch_old_or_invalid_history(self):
+        """Test very old or unreadable history falls back to a backfill"""
+        today = date(2024, 3, 10)
+        assert update_52w_stats.days_to_fetch({"updated_at": "2022-01-01", "prices": [[0, 1.0]]}, today) == 365
+        assert update_52w_stats.days_to_fetch({"updated_at": "bogus", "prices": [[0, 1.0]]}, today) == 365
+
+    def test_update_fetches_only_missing_days(self, sample_coins_config):
+        """Test a run after a previous one requests a few days per coin"""
+        today_ms = int(datetime.combine(date.today(), datetime.min.time(), tzinfo=timezone.utc).timestamp() * 1000)
+        stored = {"coins": {
+            "bitcoin": {
+                "updated_at": str(date.today() - timedelta(days=3)),
+                "prices": [[today_ms - day * self.DAY_MS, 100.0 + day] for day in range(3, 300)]
+            }
+        }}
+        requested = {}
+
+        def fake_fetch(coin_id, days, max_retries=3, vs_currency="usd"):
+            requested[coin_id] = days
+            return [(today_ms - day * self.DAY_MS, 50.0) for day in range(days, -1, -1)]
+
+        with patch("update_52w_stats.load_coins_config", return_value=sample_coins_config), \
+             patch("update_52w_stats.load_price_history", return_value=stored), \
+             patch("update_52w_stats.fetch_daily_prices", side_effect=fake_fetch), \
+             patch("update_52w_stats.save_price_history") as mock_save_history, \
+             patch("update_52w_stats.save_52w_stats") as mock_save:
+            update_52w_stats.update_all_52w_stats()
+
+        assert requested == {"bitcoin": 3, "ethereum": 365}
+        bitcoin = mock_save.call_args[0][0]["coins"]["bitcoin"]
+        assert bitcoin["high_52w"] == 399.0
+        assert bitcoin["low_52w"] == 50.0
+        history = mock_save_history.call_args[0][0]["coins"]["bitcoin"]
+        assert history["updated_at"] == str(date.today())
+        assert "prices" not in history
+        with history_store.get_store().read("bitcoin") as series:
+            assert len(series) == 300
+            assert series.prices[-1] == 50.0
+        assert history["rolling"]["pending"][1] == 50.0
+
+    def test_quote_currency_series(self):
+        """Test a coin quoted in EUR gets its history and stats in EUR under its own key"""
+        coins_config = {"coins": [{"id": "bitcoin", "name": "Bitcoin", "symbol": "BTC",
+                                   "ath_thresholds": [], "price_alerts": [], "quote_currency": "eur"}]}
+        today_ms = int(datetime.combine(date.today(), datetime.min.time(), tzinfo=timezone.utc).timestamp() * 1000)
+        requested = []
+
+        def fake_fetch(coin_id, days, max_retries=3, vs_currency="usd"):
+            requested.append((coin_id, vs_currency))
+            return [(today_ms - day * self.DAY_MS, 90.0 + day) for day in range(days, -1, -1)]
+
+        with patch("update_52w_stats.load_coins_config", return_value=coins_config), \
+             patch("update_52w_stats.load_price_history", return_value={"coins": {}}), \
+             patch("update_52w_stats.fetch_daily_prices", side_effect=fake_fetch), \
+             patch("update_52w_stats.save_price_history"), \
+             patch("update_52w_stats.save_52w_stats") as mock_save:
+            update_52w_stats.update_all_52w_stats()
 
+        assert requested == [("bitcoin", "eur")]
+        assert list(mock_save.call_args[0][0]["coins"]) == ["bitcoin.eur"]
+
+    def test_store_failure_isolated_to_coin(self, sample_coins_config):
+        """Test a coin whose history cannot be stored fails alone and is retried"""
+        today_ms = int(datetime.combine(date.today(), datetime.min.time(), tzinfo=timezone.utc).timestamp() * 1000)
+        merge_daily = history_store.HistoryStore.merge_daily
+        attempts = []
+
+        def flaky_merge(store, coin_id, points, window_days):
+            attempts.append(coin_id)
+            if coin_id == "bitcoin":
+                raise OSError("No space left on device")
+            return merge_daily(store, coin_id, points, window_days)
+
+        with patch("update_52w_stats.load_coins_config", return_value=sample_coins_config), \
+             patch("update_52w_stats.load_price_history", return_value={"coins": {}}), \
+             patch("update_52w_stats.fetch_daily_prices",
+                   side_effect=lambda coin_id, days, **kwargs: [(today_ms, 10.0)]), \
+             patch.object(history_store.HistoryStore, "merge_daily", autospec=True, side_effect=flaky_merge), \
+             patch("update_52w_stats.save_price_history"), \
+             patch("update_52w_stats.save_52w_stats") as mock_save:
             update_52w_stats.update_all_52w_stats()
 
-            # Should sleep between requests (2 coins = 1 sleep between them)
-            assert mock_sleep.call_count >= 1
+        assert attempts.count("bitcoin") == 2
+        assert list(mock_save.call_args[0][0]["coins"]) == ["ethereum"]
+
+    def test_update_extends_stored_rolling_window(self, sample_coins_config):
+        """Test new days are pushed onto the persisted window instead of rescanning"""
+        import rolling_window
+        today_ms = int(datetime.combine(date.today(), datetime.min.time(), tzinfo=timezone.utc).timestamp() * 1000)
+        prices = [[today_ms - day * self.DAY_MS, 10.0] for day in range(2, 10)]
+        window = rolling_window.RollingExtremes.from_points(prices)
+        stored = {"coins": {
+            coin["id"]: {"updated_at": str(date.today() - timedelta(days=2)), "prices": prices,
+                         "rolling": window.to_dict()}
+            for coin in sample_coins_config["coins"]
+        }}
+
+        with patch("update_52w_stats.load_coins_config", return_value=sample_coins_config), \
+             patch("update_52w_stats.load_price_history", return_value=stored), \
+             patch("update_52w_stats.fetch_daily_prices", return_value=[(today_ms, 99.0)]), \
+             patch("rolling_window.RollingExtremes.from_points") as mock_rebuild, \
+             patch("update_52w_stats.save_price_history"), \
+             patch("update_52w_stats.save_52w_stats") as mock_save:
+            update_52w_stats.update_all_52w_stats()
+
+        assert not mock_rebuild.called
+        assert mock_save.call_args[0][0]["coins"]["ethereum"]["high_52w"] == 99.0
+
+    def test_current_coins_not_fetched(self, sample_coins_config):
+        """Test coins already updated today need no request"""
+        stored = {"coins": {
+            coin["id"]: {"updated_at": str(date.today()), "prices": [[1640000000000, 10.0]]}
+            for coin in sample_coins_config["coins"]
+        }}
+        with patch("update_52w_stats.load_coins_config", return_value=sample_coins_config), \
+             patch("update_52w_stats.load_price_history", return_value=stored), \
+             patch("http_client.get") as mock_get, \
+             patch("update_52w_stats.save_price_history"), \
+             patch("update_52w_stats.save_52w_stats") as mock_save:
+            update_52w_stats.update_all_52w_stats()
+
+        assert not mock_get.called
+        assert mock_save.call_args[0][0]["coins"]["bitcoin"]["high_52w"] == 10.0
 
 
 class TestGetStats:
@@ -263,6 +433,18 @@ class TestGetStats:
         assert result["high_52w"] == 124128
         assert result["low_52w"] == 15460
 
+    def test_get_coin_stats_expires_old_high(self):
+        """Test a high that left the 52-week window is dropped without a refresh"""
+        import rolling_window
+        day0 = rolling_window.date_to_day(date(2024, 1, 1))
+        window = rolling_window.RollingExtremes.from_points([
+            (day0 * 86400000, 900.0), ((day0 + 30) * 86400000, 400.0), ((day0 + 60) * 86400000, 450.0)
+        ])
+        stats = {"coins": {"bitcoin": {**window.stats(), "updated_at": "2024-03-01", "rolling": window.to_dict()}}}
+
+        assert update_52w_stats.get_coin_52w_stats("bitcoin", stats, today=date(2024, 6, 1))["high_52w"] == 900.0
+        assert update_52w_stats.get_coin_52w_stats("bitcoin", stats, today=date(2025, 1, 10))["high_52w"] == 450.0
+
     def test_get_coin_stats_not_exists(self, sample_52w_stats):
         """Test getting stats for non-existent coin"""
         result = update_52w_stats.get_coin_52w_stats("dogecoin", sample_52w_stats)
@@ -273,3 +455,35 @@ class TestGetStats:
         empty_stats = {"last_updated": None, "coins": {}}
         result = update_52w_stats.get_coin_52w_stats("bitcoin", empty_stats)
         assert result is None
+
+
+class TestFetchMany:
+    """Test concurrent 52w fetching"""
+
+    def test_fetch_many_wraps_single_fetch(self):
+        """Test fetch_52w_high_low_many calls fetch_52w_high_low for each coin"""
+        def fake_fetch(coin_id, max_retries=3):
+            return {"high_52w": len(coin_id), "low_52w": 1}
+
+        with patch("update_52w_stats.fetch_52w_high_low", side_effect=fake_fetch) as mock_fetch:
+            results = update_52w_stats.fetch_52w_high_low_many(["bitcoin", "ethereum"], max_retries=2)
+
+        assert results["bitcoin"]["high_52w"] == 7
+        assert results["ethereum"]["high_52w"] == 8
+        assert mock_fetch.call_count == 2
+        mock_fetch.assert_any_call("bitcoin", max_retries=2)
+
+    def test_fetch_many_hands_points_on(self):
+        """Test on_points consumes each coin's prices and replaces them in the result"""
+        consumed = {}
+
+        def on_points(coin_id, points):
+            consumed[coin_id] = points
+            return len(points)
+
+        with patch("update_52w_stats.fetch_daily_prices",
+                   side_effect=lambda coin_id, days, **kwargs: [(0, 1.0)] * days if coin_id != "bad" else None):
+            results = update_52w_stats.fetch_daily_prices_many({"bitcoin": 3, "bad": 2}, on_points=on_points)
+
+        assert results == {"bitcoin": 3, "bad": None}
+        assert list(consumed) == ["bitcoin"]
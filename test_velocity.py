@@ -0,0 +1,89 @@
+import random
+import numpy as np
+import velocity
+
+
+def tracker(rules, coin_ids=("btc",), capacity=10, previous=None):
+    return velocity.VelocityTracker(list(coin_ids), rules, capacity, previous)
+
+
+class TestWindowHighs:
+    """Test running window highs over the ring buffer"""
+
+    def test_matches_brute_force(self):
+        """Test deque highs equal the max of the samples inside the window"""
+        rng = random.Random(1)
+        track = tracker([[{"drop_percent": 5, "window_minutes": 30}]], capacity=8)
+        samples = []
+        for tick in range(200):
+            price = rng.uniform(90, 110) if rng.random() > 0.05 else np.nan
+            now = tick * 600.0
+            samples.append((now, price))
+            track.update(now, [price])
+            window = [p for t, p in samples if t >= now - 1800 and p == p]
+            _, highs = track.window_highs()
+            expected = max(window) if window else np.nan
+            assert (highs[0] == expected) or (np.isnan(highs[0]) and np.isnan(expected))
+
+    def test_capacity_covers_longest_window(self):
+        """Test the ring buffer holds a full window of samples"""
+        rules = [[{"drop_percent": 5, "window_minutes": 60}], [{"drop_percent": 5, "window_minutes": 30}]]
+        assert velocity.required_capacity(rules, 900) == 6
+        assert velocity.required_capacity([[]], 900) == 2
+
+
+class TestEvaluate:
+    """Test velocity rule evaluation"""
+
+    def test_drop_within_window_fires_once(self):
+        """Test a fast drop fires, then stays quiet until a new high"""
+        track = tracker([[{"drop_percent": 10, "window_minutes": 30}]])
+        for tick, price in enumerate([100, 95, 89]):
+            track.update(tick * 900.0, [price])
+        rules, highs, drops = track.evaluate([89])
+        assert rules.tolist() == [0]
+        assert highs.tolist() == [100]
+        assert drops[0] == 11
+
+        track.mark_fired(rules)
+        track.update(3 * 900.0, [85])
+        assert track.evaluate([85])[0].size == 0
+
+        # A new high (96) set after the alert re-arms the rule
+        for tick, price in ((4, 96), (5, 80)):
+            track.update(tick * 900.0, [price])
+        assert track.evaluate([80])[0].tolist() == [0]
+
+    def test_slow_drop_does_not_fire(self):
+        """Test a drop spread over more than the window is ignored"""
+        track = tracker([[{"drop_percent": 10, "window_minutes": 30}]])
+        for tick, price in enumerate([100, 97, 94, 91, 88]):
+            track.update(tick * 900.0, [price])
+        assert track.evaluate([88])[0].size == 0
+
+    def test_unknown_price_never_fires(self):
+        """Test NaN prices are skipped"""
+        track = tracker([[{"drop_percent": 10, "window_minutes": 30}]])
+        track.update(0.0, [100])
+        track.update(900.0, [np.nan])
+        assert track.evaluate([np.nan])[0].size == 0
+
+
+class TestCarryOver:
+    """Test rebuilding the tracker for an edited config"""
+
+    def test_samples_and_fired_state_kept(self):
+        """Test retained coins keep their samples and unchanged rules their fired state"""
+        rule = {"drop_percent": 10, "window_minutes": 30}
+        old = tracker([[rule], [rule]], coin_ids=("btc", "eth"))
+        for tick, prices in enumerate([[100, 10], [80, 10]]):
+            old.update(tick * 900.0, prices)
+        old.mark_fired(np.array([0]))
+
+        new = tracker([[rule], [rule]], coin_ids=("eth", "btc"), previous=old)
+        assert new.count == 2
+        rules, highs, _ = new.evaluate([10, 80])
+        assert rules.size == 0
+
+        new.update(1800.0, [5, 80])
+        assert new.evaluate([5, 80])[0].tolist() == [0]
@@ -1,5 +1,14 @@
 import requests
+import http_client
+import circuit_breaker
+import async_fetcher
+import retry_policy
+import json_stream
+import history_store
+import rolling_window
+import storage
 import json
+import sqlite3
 import time
 import logging
 from datetime import date, datetime, timedelta
@@ -18,7 +27,11 @@ logger = logging.getLogger(__name__)
 # Configuration
 COINS_CONFIG_FILE = "coins_config.json"
 STATS_FILE = "52w_stats.json"
-RATE_LIMIT_SLEEP = 3.0  # seconds between API calls (increased for free tier limits)
+HISTORY_FILE = "52w_history.json"  # per-coin refresh state; prices live in history_store
+WINDOW_DAYS = 365
+DAY_MS = 86400 * 1000
+CHART_CHUNK_SIZE = 8192  # bytes read per step while streaming market_chart
+# Request pacing is handled by the shared token bucket in rate_limiter.py
 
 
 def load_coins_config():
@@ -38,68 +51,97 @@ def load_coins_config():
 
 
 def load_52w_stats(filename=STATS_FILE):
-    """Load 52w stats from JSON file"""
+    """
+    Load 52w stats from the state database
+
+    The legacy JSON stats file is imported on first use.
+    """
+    store = storage.get_store()
     try:
-        with open(filename, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        logger.info(f"Stats file {filename} not found, will create new one")
-        return {"last_updated": None, "coins": {}}
-    except json.JSONDecodeError as e:
+        store.migrate_json_once("52w_stats", filename)
+    except ValueError as e:
         logger.error(f"Error parsing stats file: {e}")
-        return {"last_updated": None, "coins": {}}
 
+    return {"last_updated": store.get_meta("52w_last_updated"), "coins": store.get_52w_stats_many()}
+
+
+def save_52w_stats(stats_data):
+    """
+    Save 52w stats to the state database
 
-def save_52w_stats(stats_data, filename=STATS_FILE):
-    """Save 52w stats to JSON file"""
+    Coins are upserted one row each (unchanged rows are not rewritten);
+    coins missing from stats_data are removed.
+    """
+    store = storage.get_store()
     try:
-        with open(filename, 'w') as f:
-            json.dump(stats_data, f, indent=2)
-        logger.info(f"✅ Saved stats to {filename}")
-    except PermissionError:
-        logger.error(f"❌ Permission denied writing to '{filename}'")
-        logger.error(f"💡 Check file permissions or run with appropriate access")
-    except IOError as e:
-        logger.error(f"❌ Failed to save stats to '{filename}': {e}")
+        store.upsert_52w_stats(stats_data["coins"])
+        store.delete_52w_stats_except(stats_data["coins"])
+        store.set_meta("52w_last_updated", stats_data.get("last_updated"))
+        logger.info(f"✅ Saved stats to {store.path}")
+    except sqlite3.Error as e:
+        logger.error(f"❌ Failed to save stats to '{store.path}': {e}")
         logger.error(f"💡 Check disk space and file system permissions")
 
 
-def fetch_52w_high_low(crypto_id, max_retries=3):
+def price_extremes(points):
     """
-    Fetch 52-week high and low for a cryptocurrency with retry logic
-    Returns dict with high_52w and low_52w, or None on error
+    Find the highest and lowest price in one pass
+
+    Args:
+        points: Iterable of (timestamp_ms, price) pairs
+
+    Returns:
+        Tuple of (high_point, low_point), each (timestamp_ms, price) or None if empty
     """
-    url = f"https://api.coingecko.com/api/v3/coins/{crypto_id}/market_chart"
-    params = {
-        "vs_currency": "usd",
-        "days": "365"
-    }
+    high = low = None
+    for point in points:
+        if high is None or point[1] > high[1]:
+            high = point
+        if low is None or point[1] < low[1]:
+            low = point
+    return high, low
 
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
 
-            if "prices" not in data or len(data["prices"]) == 0:
-                logger.warning(f"⚠️  No price data returned for {crypto_id}")
-                return None
+def fetch_market_chart(crypto_id, days, consume, max_retries=3, vs_currency=storage.DEFAULT_CURRENCY):
+    """
+    Stream /coins/{id}/market_chart with retry logic
 
-            # Extract prices from [timestamp, price] pairs
-            prices = [price[1] for price in data["prices"]]
+    Only the prices array is parsed; its (timestamp_ms, price) pairs are
+    passed as an iterator to consume(), whose return value is returned.
 
-            result = {
-                "high_52w": max(prices),
-                "low_52w": min(prices)
-            }
+    Args:
+        crypto_id: CoinGecko coin ID
+        days: Number of days of daily history to request
+        consume: Callable receiving the price pairs iterator
+        max_retries: Attempts before giving up
+        vs_currency: Quote currency of the prices
 
-            logger.info(f"{crypto_id}: 52w high=${result['high_52w']:,.2f}, low=${result['low_52w']:,.2f}")
-            return result
+    Returns:
+        Result of consume(), or None on error
+    """
+    url = http_client.coingecko_url(f"/coins/{crypto_id}/market_chart")
+    params = {
+        "vs_currency": vs_currency,
+        "days": str(days),
+        "interval": "daily"
+    }
+
+    for attempt in range(max_retries):
+        try:
+            response = http_client.get(url, params=params, stream=True)
+            try:
+                response.raise_for_status()
+                # Scan only the prices array; market_caps/total_volumes are never parsed
+                return consume(json_stream.iter_pairs(
+                    response.iter_content(chunk_size=CHART_CHUNK_SIZE), "prices"
+                ))
+            finally:
+                response.close()
 
         except requests.exceptions.Timeout:
             if attempt < max_retries - 1:
-                retry_wait = (attempt + 1) * 10
-                logger.warning(f"⚠️  Timeout fetching {crypto_id}, retrying in {retry_wait}s ({attempt + 1}/{max_retries})")
+                retry_wait = retry_policy.retry_delay(attempt)
+                logger.warning(f"⚠️  Timeout fetching {crypto_id}, retrying in {retry_wait:.1f}s ({attempt + 1}/{max_retries})")
                 time.sleep(retry_wait)
                 continue
             else:
@@ -107,9 +149,8 @@ def fetch_52w_high_low(crypto_id, max_retries=3):
                 return None
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 429:  # Rate limit
-                retry_wait = (attempt + 1) * 10  # 10s, 20s, 30s
-                logger.warning(f"⚠️  Rate limit hit for {crypto_id}, waiting {retry_wait}s before retry ({attempt + 1}/{max_retries})")
-                time.sleep(retry_wait)
+                # The shared limiter has already been drained; the retry waits for budget
+                logger.warning(f"⚠️  Rate limit hit for {crypto_id}, retrying when the rate budget allows ({attempt + 1}/{max_retries})")
                 continue
             elif e.response.status_code >= 500:
                 logger.error(f"❌ CoinGecko API server error ({e.response.status_code}) for {crypto_id}")
@@ -122,6 +163,9 @@ def fetch_52w_high_low(crypto_id, max_retries=3):
             logger.error(f"❌ Network connection error fetching {crypto_id}")
             logger.error(f"💡 Check your internet connection")
             return None
+        except circuit_breaker.CircuitOpenError as e:
+            logger.error(f"❌ Skipping 52w fetch for {crypto_id}: {e}")
+            return None
         except requests.exceptions.RequestException as e:
             logger.error(f"❌ Error fetching 52w data for {crypto_id}: {str(e)}")
             return None
@@ -134,6 +178,155 @@ def fetch_52w_high_low(crypto_id, max_retries=3):
     return None
 
 
+def extremes_to_stats(high, low):
+    """Build the high/low part of a stats entry from price_extremes() output"""
+    return {
+        "high_52w": high[1],
+        "low_52w": low[1],
+        "high_52w_date": rolling_window.timestamp_to_date(high[0]),
+        "low_52w_date": rolling_window.timestamp_to_date(low[0])
+    }
+
+
+def fetch_52w_high_low(crypto_id, max_retries=3):
+    """
+    Fetch 52-week high and low for a cryptocurrency with retry logic
+
+    The market_chart response is streamed and high/low are taken in one
+    pass, so memory per coin stays flat regardless of the series size.
+
+    Returns dict with high_52w, low_52w and the dates they occurred, or None on error
+    """
+    extremes = fetch_market_chart(crypto_id, WINDOW_DAYS, price_extremes, max_retries=max_retries)
+    if extremes is None:
+        return None
+
+    high, low = extremes
+    if high is None:
+        logger.warning(f"⚠️  No price data returned for {crypto_id}")
+        return None
+
+    result = extremes_to_stats(high, low)
+    logger.info(f"{crypto_id}: 52w high=${result['high_52w']:,.2f}, low=${result['low_52w']:,.2f}")
+    return result
+
+
+def fetch_daily_prices(crypto_id, days, max_retries=3, vs_currency=storage.DEFAULT_CURRENCY):
+    """
+    Fetch the last `days` days of daily prices for a coin
+
+    Returns:
+        List of (timestamp_ms, price) tuples (possibly empty), or None on error
+    """
+    return fetch_market_chart(crypto_id, days, list, max_retries=max_retries, vs_currency=vs_currency)
+
+
+def fetch_52w_high_low_many(coin_ids, max_retries=3, concurrency=None, on_result=None):
+    """
+    Fetch 52-week high/low for many coins concurrently
+
+    Thin wrapper running fetch_52w_high_low through the async fetch engine.
+
+    Returns:
+        Dict mapping coin ID to fetch_52w_high_low result (None on error)
+    """
+    return async_fetcher.fetch_all(
+        coin_ids,
+        lambda coin_id: fetch_52w_high_low(coin_id, max_retries=max_retries),
+        concurrency=concurrency,
+        on_result=on_result
+    )
+
+
+def fetch_daily_prices_many(days_by_coin, max_retries=3, concurrency=None, on_result=None, series=None,
+                            on_points=None):
+    """
+    Fetch daily prices for many coins concurrently
+
+    Args:
+        days_by_coin: Dict mapping stats key to the number of days to request
+        series: Dict mapping stats key to (coin ID, quote currency); keys
+            not in it are USD coin IDs
+        on_points: Optional callable(key, points) run as each coin's prices
+            arrive; its return value replaces the price list in the result,
+            so the lists are not held until every coin is done
+
+    Returns:
+        Dict mapping stats key to fetch_daily_prices result, or to the
+        on_points result (None on error)
+    """
+    series = series or {}
+
+    def fetch(key):
+        coin_id, currency = series.get(key, (key, storage.DEFAULT_CURRENCY))
+        points = fetch_daily_prices(coin_id, days_by_coin[key], max_retries=max_retries, vs_currency=currency)
+        if points is None or on_points is None:
+            return points
+        return on_points(key, points)
+
+    return async_fetcher.fetch_all(list(days_by_coin), fetch, concurrency=concurrency, on_result=on_result)
+
+
+def load_price_history(filename=HISTORY_FILE):
+    """
+    Load per-coin refresh metadata from JSON file
+
+    Format: {"coins": {coin_id: {"updated_at": "YYYY-MM-DD", "rolling": {...}}}}
+    The daily prices themselves live in the history_store column files.
+    """
+    try:
+        with open(filename, 'r') as f:
+            history = json.load(f)
+    except FileNotFoundError:
+        logger.info(f"History file {filename} not found, full backfill for all coins")
+        return {"coins": {}}
+    except json.JSONDecodeError as e:
+        logger.error(f"Error parsing history file: {e}")
+        return {"coins": {}}
+
+    if not isinstance(history, dict) or not isinstance(history.get("coins"), dict):
+        logger.warning(f"⚠️  Unexpected format in {filename}, full backfill for all coins")
+        return {"coins": {}}
+    return history
+
+
+def save_price_history(history, filename=HISTORY_FILE):
+    """Save per-coin refresh metadata to JSON file (compact, it is never hand-edited)"""
+    try:
+        with open(filename, 'w') as f:
+            json.dump(history, f, separators=(",", ":"))
+    except (PermissionError, IOError) as e:
+        logger.error(f"❌ Failed to save price history to '{filename}': {e}")
+        logger.error(f"💡 Next run will fetch more days than needed")
+
+
+def days_to_fetch(coin_history, today=None):
+    """
+    Number of days to request for a coin
+
+    Coins with no stored series (coin_history is None) or one older than
+    the window get a full WINDOW_DAYS backfill; otherwise only the days since updated_at. That
+    range includes the updated_at day itself, so an intraday point stored
+    then is replaced by the day's final price.
+
+    Returns:
+        Days to request, 0 if the stored series is already current
+    """
+    today = today or date.today()
+    if not coin_history:
+        return WINDOW_DAYS
+
+    try:
+        updated_at = datetime.strptime(coin_history.get("updated_at"), "%Y-%m-%d").date()
+    except (ValueError, TypeError):
+        return WINDOW_DAYS
+
+    missing = (today - updated_at).days
+    if missing >= WINDOW_DAYS:
+        return WINDOW_DAYS
+    return max(0, missing)
+
+
 def is_stats_stale(last_updated_str, max_age_days=7):
     """
     Check if stats are older than max_age_days
@@ -151,15 +344,19 @@ def is_stats_stale(last_updated_str, max_age_days=7):
         return True
 
 
-def get_coin_52w_stats(crypto_id, stats_data):
+def get_coin_52w_stats(crypto_id, stats_data, today=None):
     """
     Get 52w stats for a specific coin from stats data
+
+    Days that left the 52-week window since the last refresh are dropped
+    using the stored rolling state, without rescanning the series.
+
     Returns dict with high_52w and low_52w, or None if not found
     """
     if "coins" not in stats_data:
         return None
 
-    return stats_data["coins"].get(crypto_id)
+    return rolling_window.stats_as_of(stats_data["coins"].get(crypto_id), today)
 
 
 def update_all_52w_stats():
@@ -180,53 +377,117 @@ def update_all_52w_stats():
         "coins": {}
     }
 
-    # Fetch 52w data for each coin
-    coin_ids = [coin['id'] for coin in coins_config['coins']]
-    total_coins = len(coin_ids)
-    failed_coins = []
-
-    for idx, coin_id in enumerate(coin_ids, 1):
-        logger.info(f"Updating {coin_id} ({idx}/{total_coins})")
-
-        result = fetch_52w_high_low(coin_id)
-
-        if result:
-            stats_data["coins"][coin_id] = {
-                "high_52w": result["high_52w"],
-                "low_52w": result["low_52w"],
-                "updated_at": str(date.today())
-            }
+    # Request only the days missing from each coin's stored series; new
+    # coins get a full backfill. Coins dropped from the config are forgotten.
+    # Each coin's series is kept in its quote currency, under its stats key.
+    series = {}
+    for coin in coins_config['coins']:
+        currency = coin.get('quote_currency', storage.DEFAULT_CURRENCY)
+        series[storage.stats_key(coin['id'], currency)] = (coin['id'], currency)
+    coin_ids = list(series)
+    store = history_store.get_store()
+    stored = load_price_history().get("coins", {})
+    history = {"coins": {}}
+    for coin_id in coin_ids:
+        coin_history = stored.get(coin_id)
+        if not coin_history:
+            continue
+        if "prices" in coin_history:
+            # Series kept inline in the JSON file: move it to the column store once
+            if coin_history["prices"] and not store.exists(coin_id):
+                store.write(coin_id, sorted(coin_history["prices"]))
+            coin_history = {key: value for key, value in coin_history.items() if key != "prices"}
+        if store.exists(coin_id):
+            history["coins"][coin_id] = coin_history
+
+    days_by_coin = {}
+    for coin_id in coin_ids:
+        days = days_to_fetch(history["coins"].get(coin_id))
+        if days:
+            days_by_coin[coin_id] = days
+
+    backfills = sum(1 for days in days_by_coin.values() if days == WINDOW_DAYS)
+    logger.info(f"Fetching {len(days_by_coin)}/{len(coin_ids)} coins ({backfills} full backfills)")
+
+    def store_points(coin_id, points):
+        """
+        Merge a coin's fetched days into its stored series and rolling window
+
+        Returns:
+            Number of points merged, or None if they could not be stored
+            (the coin is then retried like a failed fetch)
+        """
+        coin_history = history["coins"].get(coin_id) or {}
+        try:
+            store.merge_daily(coin_id, points, WINDOW_DAYS)
+            # Extend the persisted rolling window with the new days (amortized
+            # O(1) each); only coins without one are built from the stored series
+            if coin_history.get("rolling"):
+                window = rolling_window.RollingExtremes.from_dict(coin_history["rolling"])
+                window.extend(sorted(points))
+            else:
+                window = rolling_window.RollingExtremes.from_points(store.window(coin_id, WINDOW_DAYS), WINDOW_DAYS)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"❌ Could not store price history for {coin_id}: {e}")
+            return None
+        history["coins"][coin_id] = {
+            "updated_at": str(date.today()),
+            "rolling": window.to_dict()
+        }
+        return len(points)
+
+    # Fetch concurrently (bounded by COINWATCH_CONCURRENCY and the shared
+    # rate limiter), logging each coin as it completes. Each coin's days go
+    # into the history store as soon as they arrive, so only the coins in
+    # flight are held in memory.
+    total_coins = len(days_by_coin)
+    completed = [0]
+
+    def log_progress(coin_id, result):
+        completed[0] += 1
+        if result is not None:
+            logger.info(f"Updated {coin_id} ({completed[0]}/{total_coins})")
         else:
             logger.warning(f"Failed to fetch 52w data for {coin_id}, will retry later")
-            failed_coins.append(coin_id)
 
-        # Rate limiting - don't sleep after last request
-        if idx < total_coins:
-            logger.debug(f"Sleeping {RATE_LIMIT_SLEEP}s for rate limiting")
-            time.sleep(RATE_LIMIT_SLEEP)
+    results = fetch_daily_prices_many(days_by_coin, on_result=log_progress, series=series, on_points=store_points)
+    failed_coins = [coin_id for coin_id in days_by_coin if results.get(coin_id) is None]
 
-    # Retry failed coins after a longer wait
+    # Retry failed coins (the rate limiter spaces them out, including any 429 backoff)
     if failed_coins:
-        logger.info(f"Retrying {len(failed_coins)} failed coins after 60s cooldown")
-        time.sleep(60)
-
-        for idx, coin_id in enumerate(failed_coins, 1):
-            logger.info(f"Retry: Updating {coin_id} ({idx}/{len(failed_coins)})")
-            result = fetch_52w_high_low(coin_id, max_retries=2)
-
-            if result:
-                stats_data["coins"][coin_id] = {
-                    "high_52w": result["high_52w"],
-                    "low_52w": result["low_52w"],
-                    "updated_at": str(date.today())
-                }
+        logger.info(f"Retrying {len(failed_coins)} failed coins")
+        retry_results = fetch_daily_prices_many(
+            {coin_id: days_by_coin[coin_id] for coin_id in failed_coins}, max_retries=2, series=series,
+            on_points=store_points
+        )
+
+        for coin_id in failed_coins:
+            if retry_results.get(coin_id) is not None:
                 logger.info(f"Successfully fetched {coin_id} on retry")
             else:
                 logger.error(f"Failed to fetch {coin_id} even after retry")
 
-            # Rate limiting between retries
-            if idx < len(failed_coins):
-                time.sleep(RATE_LIMIT_SLEEP)
+    # Keep the stats file in config order regardless of completion order.
+    # A coin whose refresh failed keeps the stats of its stored series.
+    for coin_id in coin_ids:
+        coin_history = history["coins"].get(coin_id)
+        if not coin_history:
+            continue
+        if not coin_history.get("rolling"):
+            coin_history["rolling"] = rolling_window.RollingExtremes.from_points(
+                store.window(coin_id, WINDOW_DAYS), WINDOW_DAYS
+            ).to_dict()
+        extremes = rolling_window.RollingExtremes.from_dict(coin_history["rolling"]).stats()
+        if extremes is None:
+            logger.warning(f"⚠️  No price data returned for {coin_id}")
+            continue
+        stats_data["coins"][coin_id] = {
+            **extremes,
+            "updated_at": coin_history.get("updated_at"),
+            "rolling": coin_history["rolling"]
+        }
+
+    save_price_history(history)
 
     # Save results
     if stats_data["coins"]:
@@ -0,0 +1,157 @@
+"""
+Price-velocity alerts over recent snapshots
+
+In daemon mode every coin's price is sampled once per tick. VelocityTracker
+keeps the last `capacity` samples of all coins in one preallocated ring
+buffer (a coin x slot price array plus a shared timestamp row, since all
+coins are sampled on the same tick). For each distinct window length a
+coin's rules use, a monotonic deque of sample numbers with strictly
+decreasing prices tracks the highest price inside the window, so adding a
+tick is amortized O(1) per (coin, window) and "down X% within N minutes"
+rules are checked on every tick rather than once the move shows up in the
+24h change.
+
+A rule fires once per window high: after firing it stays quiet until a
+sample newer than the alert becomes the window high (the old high expired
+or the price set a new one).
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+
+NO_SAMPLE = -1
+
+
+def required_capacity(rules_by_coin, interval_seconds):
+    """Ring buffer length covering the longest window at one sample per interval"""
+    longest = max((rule["window_minutes"] * 60 for rules in rules_by_coin for rule in rules), default=0)
+    return max(2, math.ceil(longest / interval_seconds) + 2)
+
+
+class VelocityTracker:
+    """
+    Ring buffer of recent prices and running window highs for velocity rules
+
+    Args:
+        coin_ids: Coin IDs; price arrays passed to update() are aligned with it
+        rules_by_coin: Per coin, a list of {"drop_percent", "window_minutes"}
+        capacity: Samples kept per coin (see required_capacity)
+        previous: Tracker for an earlier config; samples of coins present in
+            both are carried over, as is the fired state of unchanged rules
+    """
+
+    def __init__(self, coin_ids, rules_by_coin, capacity, previous=None):
+        self.coin_ids = list(coin_ids)
+        self.capacity = capacity
+        self.times = np.full(capacity, np.nan)
+        self.prices = np.full((len(self.coin_ids), capacity), np.nan)
+        self.count = 0
+
+        # One monotonic deque per distinct (coin, window length)
+        self.windows = []
+        window_index = {}
+        rule_coin, rule_window, rule_percent, rule_minutes = [], [], [], []
+        for coin_idx, rules in enumerate(rules_by_coin):
+            for rule in rules:
+                seconds = rule["window_minutes"] * 60
+                key = (coin_idx, seconds)
+                if key not in window_index:
+                    window_index[key] = len(self.windows)
+                    self.windows.append(key)
+                rule_coin.append(coin_idx)
+                rule_window.append(window_index[key])
+                rule_percent.append(float(rule["drop_percent"]))
+                rule_minutes.append(rule["window_minutes"])
+        self._deques = [deque() for _ in self.windows]
+        self._window_coin = np.array([coin for coin, _ in self.windows], dtype=np.intp)
+        self.rule_coin = np.array(rule_coin, dtype=np.intp)
+        self.rule_window = np.array(rule_window, dtype=np.intp)
+        self.rule_percent = np.array(rule_percent, dtype=np.float64)
+        self.rule_minutes = rule_minutes
+        self.fired_seq = np.full(len(rule_coin), NO_SAMPLE, dtype=np.int64)
+
+        if previous is not None:
+            self._carry_over(previous)
+
+    def __len__(self):
+        return len(self.rule_percent)
+
+    def _carry_over(self, previous):
+        first = max(0, previous.count - previous.capacity)
+        old_index = {coin_id: idx for idx, coin_id in enumerate(previous.coin_ids)}
+        kept = [(new_idx, old_index[coin_id]) for new_idx, coin_id in enumerate(self.coin_ids) if coin_id in old_index]
+        new_rows = np.array([new for new, _ in kept], dtype=np.intp)
+        old_rows = np.array([old for _, old in kept], dtype=np.intp)
+        for seq in range(first, previous.count):
+            slot = seq % previous.capacity
+            prices = np.full(len(self.coin_ids), np.nan)
+            prices[new_rows] = previous.prices[old_rows, slot]
+            self.update(previous.times[slot], prices)
+
+        # Sample numbers restart at 0 from the first carried sample
+        fired = {}
+        for rule_idx in range(len(previous)):
+            key = (previous.coin_ids[previous.rule_coin[rule_idx]], previous.rule_minutes[rule_idx],
+                   previous.rule_percent[rule_idx])
+            fired[key] = previous.fired_seq[rule_idx]
+        for rule_idx in range(len(self)):
+            key = (self.coin_ids[self.rule_coin[rule_idx]], self.rule_minutes[rule_idx], self.rule_percent[rule_idx])
+            if fired.get(key, NO_SAMPLE) != NO_SAMPLE:
+                self.fired_seq[rule_idx] = max(fired[key] - first, NO_SAMPLE)
+
+    def update(self, timestamp, prices):
+        """
+        Record one tick's prices (NaN where unknown) taken at `timestamp` (seconds)
+        """
+        seq = self.count
+        slot = seq % self.capacity
+        self.times[slot] = timestamp
+        self.prices[:, slot] = prices
+        self.count += 1
+
+        oldest = seq - self.capacity + 1
+        for (coin_idx, seconds), samples in zip(self.windows, self._deques):
+            price = self.prices[coin_idx, slot]
+            if price == price:
+                while samples and self.prices[coin_idx, samples[-1] % self.capacity] <= price:
+                    samples.pop()
+                samples.append(seq)
+            cutoff = timestamp - seconds
+            while samples and (samples[0] < oldest or self.times[samples[0] % self.capacity] < cutoff):
+                samples.popleft()
+
+    def window_highs(self):
+        """Per window, (sample number, price) arrays of the highest price in the window"""
+        heads = np.array([samples[0] if samples else NO_SAMPLE for samples in self._deques], dtype=np.int64)
+        highs = np.full(len(heads), np.nan)
+        present = heads != NO_SAMPLE
+        highs[present] = self.prices[self._window_coin[present], heads[present] % self.capacity]
+        return heads, highs
+
+    def evaluate(self, prices):
+        """
+        Rules whose coin fell at least drop_percent below its window high
+
+        Args:
+            prices: Current price per coin (the last update's prices)
+
+        Returns:
+            Tuple of (rule indices, window highs, drops %) for triggered rules
+        """
+        if not len(self):
+            return np.empty(0, dtype=np.intp), np.empty(0), np.empty(0)
+        heads, highs = self.window_highs()
+        rule_heads = heads[self.rule_window]
+        rule_highs = highs[self.rule_window]
+        current = np.asarray(prices, dtype=np.float64)[self.rule_coin]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drops = (rule_highs - current) / rule_highs * 100
+            triggered = (drops >= self.rule_percent) & (rule_highs > 0) & (rule_heads > self.fired_seq)
+        rule_indices = np.flatnonzero(triggered)
+        return rule_indices, rule_highs[rule_indices], drops[rule_indices]
+
+    def mark_fired(self, rule_indices):
+        """Silence rules until a newer sample becomes their window high"""
+        self.fired_seq[rule_indices] = self.count - 1